@@ -0,0 +1,116 @@
+"""
+Compares the memory held by the graphs of the nodes of a troika tree when every node keeps a networkx copy of its
+graph (reduce_triple/alter_weight) with the BranchGraph deltas, without and with a GraphCache for the graphs of the
+open nodes. A tree of --nodes nodes is grown by branching on random triples of open nodes, taken in --selection
+order, as perform_branch does, and all of its graphs are kept alive. Every configuration runs in a fresh process;
+the resident set size (RSS) is read from /proc/self/statm before and after growing the tree.
+
+    python benchmarks/bench_branch_graph.py [--sizes 100 200] [--density 0.3] [--nodes 1000]
+                                            [--selection random]
+"""
+import argparse
+import gc
+import os
+import random
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from bench_separators import synthetic_graph  # noqa: E402
+from troika.TroikaImplied import (BranchGraph, GraphCache, alter_weight, branching_delta,  # noqa: E402
+                                  create_troika_edge_attributes, reduce_triple, shift_triple)
+
+
+def rss_bytes():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def take(open_nodes, selection, rng):
+    if selection == "bfs":
+        return open_nodes.pop(0)
+    if selection == "dfs":
+        return open_nodes.pop()
+    return open_nodes.pop(rng.randrange(len(open_nodes)))
+
+
+def grow_tree(Graph, num_nodes, mode, selection="random", seed=0):
+    """
+    Returns the graphs of a tree of num_nodes nodes grown by branching on open nodes taken in selection order
+    """
+    rng = random.Random(seed)
+    n = Graph.number_of_nodes()
+    delta = branching_delta(Graph)
+    if mode == "networkx":
+        root = Graph
+    else:
+        cache = GraphCache(keep_newest=selection != "bfs") if mode == "cached" else None
+        root = BranchGraph.from_graph(Graph, delta, cache)
+    tree = [(root, np.arange(n))]
+    open_nodes = [0]
+    while len(tree) + 1 < num_nodes and open_nodes:
+        graph, supernodes = tree[take(open_nodes, selection, rng)]
+        triple = rng.sample(range(n), 3)
+        graph_triple = supernodes[triple].tolist()
+        if mode == "networkx":
+            left = reduce_triple(graph, triple, delta, supernodes)
+            right = alter_weight(graph, triple, delta, supernodes), supernodes
+        else:
+            # perform_branch materializes the graph of the node and makes the graphs of its children from it
+            materialized = graph.materialize()
+            left_graph, left_supernodes = reduce_triple(materialized, triple, delta, supernodes)
+            shift_triple(materialized, graph_triple, delta)
+            left = graph.merge(graph_triple), left_supernodes
+            right = graph.shift(graph_triple), supernodes
+            left[0].keep(left_graph)
+            right[0].keep(materialized)
+        for child in (left, right):
+            if child[0].number_of_nodes() >= 3:
+                open_nodes.append(len(tree))
+            tree.append(child)
+    return tree
+
+
+def run(n, density, num_nodes, mode, selection):
+    Graph = create_troika_edge_attributes(synthetic_graph(n, density, seed=n))
+    gc.collect()
+    before = rss_bytes()
+    start = time.time()
+    tree = grow_tree(Graph, num_nodes, mode, selection)
+    elapsed = time.time() - start
+    gc.collect()
+    grown = rss_bytes() - before
+    print(len(tree), grown / len(tree) * 1000 / 2 ** 20, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 200])
+    parser.add_argument("--density", type=float, default=0.3)
+    parser.add_argument("--nodes", type=int, default=1000)
+    parser.add_argument("--selection", choices=["random", "bfs", "dfs"], default="random")
+    parser.add_argument("--mode", choices=["networkx", "delta", "cached"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.mode is not None:
+        run(args.sizes[0], args.density, args.nodes, args.mode, args.selection)
+        return
+
+    print(f"{'n':>5}{'edges':>8}{'nodes':>7}{'networkx [MiB/1k]':>19}{'[s]':>8}{'delta [MiB/1k]':>16}{'[s]':>8}"
+          f"{'cached [MiB/1k]':>17}{'[s]':>8}")
+    for n in args.sizes:
+        row = []
+        for mode in ("networkx", "delta", "cached"):
+            out = subprocess.run([sys.executable, os.path.abspath(__file__), "--sizes", str(n), "--density",
+                                  str(args.density), "--nodes", str(args.nodes), "--selection", args.selection,
+                                  "--mode", mode], capture_output=True, text=True, check=True).stdout.split()
+            row.append(out)
+        edges = synthetic_graph(n, args.density, seed=n).number_of_edges()
+        print(f"{n:>5}{edges:>8}{row[0][0]:>7}{float(row[0][1]):>19.1f}{float(row[0][2]):>8.2f}"
+              f"{float(row[1][1]):>16.1f}{float(row[1][2]):>8.2f}{float(row[2][1]):>17.1f}{float(row[2][2]):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
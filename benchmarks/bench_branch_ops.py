@@ -0,0 +1,61 @@
+"""
+Measures the cost of one left (merge_triple) and one right (shift_triple) branching transform of a node graph,
+in place as perform_branch and BranchGraph.materialize apply them, for growing graphs with a fixed average degree.
+The copying reduce_triple/alter_weight are timed as well; a copy costs time linear in the number of edges.
+
+    python benchmarks/bench_branch_ops.py [--sizes 100 200 400 800 1600] [--degree 10] [--repeats 200]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from bench_separators import synthetic_graph  # noqa: E402
+from troika.TroikaImplied import (alter_weight, branching_delta, constrained_edges,  # noqa: E402
+                                  create_troika_edge_attributes, merge_triple, reduce_triple, shift_triple)
+
+
+def per_call(function, calls):
+    start = time.perf_counter()
+    for args in calls:
+        function(*args)
+    return (time.perf_counter() - start) / len(calls) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 200, 400, 800, 1600])
+    parser.add_argument("--degree", type=float, default=10)
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'n':>6}{'edges':>8}{'merge [us]':>12}{'shift [us]':>12}{'reduce_triple [us]':>20}"
+          f"{'alter_weight [us]':>19}")
+    for n in args.sizes:
+        Graph = create_troika_edge_attributes(synthetic_graph(n, min(1.0, args.degree / (n - 1)), seed=n))
+        delta = branching_delta(Graph)
+        rng = random.Random(n)
+        supernodes = np.arange(Graph.number_of_nodes())
+        triples = [rng.sample(range(Graph.number_of_nodes()), 3) for _ in range(args.repeats)]
+
+        # the in-place transforms are applied in turn to one graph; the set of its constrained edges is built once
+        # per materialized graph
+        work = Graph.copy()
+        constrained_edges(work)
+        shift_time = per_call(shift_triple, [(work, triple, delta) for triple in triples])
+        # disjoint triples, so every merge is one of three nodes of the original degrees
+        nodes = rng.sample(range(Graph.number_of_nodes()), 3 * min(args.repeats, Graph.number_of_nodes() // 3))
+        merge_time = per_call(merge_triple, [(work, nodes[k:k + 3], delta) for k in range(0, len(nodes), 3)])
+
+        reduce_time = per_call(reduce_triple, [(Graph, triple, delta, supernodes) for triple in triples[:20]])
+        alter_time = per_call(alter_weight, [(Graph, triple, delta, supernodes) for triple in triples[:20]])
+        print(f"{n:>6}{Graph.number_of_edges():>8}{merge_time:>12.1f}{shift_time:>12.1f}{reduce_time:>20.1f}"
+              f"{alter_time:>19.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Times clique_filtering on hub-heavy graphs against the per-node clustering coefficients it used to compute with
+get_local_clustering_coefficient, which do O(deg^2) has_edge calls per node. Barabasi-Albert graphs have a few hubs
+of large degree, windmill graphs (cliques sharing one node) one hub whose neighbors all have small degree. The
+clustering column is the array replacement (weighted_csr and complete_neighborhoods); the rest of clique_filtering
+copies and relabels the graph.
+
+    python benchmarks/bench_clique_filtering.py [--ba 10000:3 20000:3] [--windmill 5000:4] [--reference-edges 100000]
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+
+import networkx as nx
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from troika.TroikaImplied import (clique_filtering, complete_neighborhoods, create_troika_edge_attributes,  # noqa: E402
+                                  get_local_clustering_coefficient, weighted_csr)
+
+
+def weighted(G, seed):
+    rng = random.Random(seed)
+    for u, v, data in G.edges(data=True):
+        data["weight"] = rng.choice([1.0, 1.0, -1.0])
+    return create_troika_edge_attributes(G)
+
+
+def instances(args):
+    for spec in args.ba:
+        n, m = (int(x) for x in spec.split(":"))
+        yield f"barabasi-albert n={n} m={m}", weighted(nx.barabasi_albert_graph(n, m, seed=0), 0)
+    for spec in args.windmill:
+        cliques, size = (int(x) for x in spec.split(":"))
+        yield f"windmill {cliques}x K{size}", weighted(nx.windmill_graph(cliques, size), 0)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ba", nargs="*", default=["10000:3", "20000:3"])
+    parser.add_argument("--windmill", nargs="*", default=["5000:4"])
+    parser.add_argument("--reference-edges", type=int, default=100000,
+                        help="largest number of edges on which the per-node coefficients are timed")
+    args = parser.parse_args()
+
+    print(f"{'instance':<32}{'edges':>9}{'sum deg^2':>12}{'max deg':>9}{'per-node lcc [s]':>18}"
+          f"{'clustering [s]':>16}{'clique_filtering [s]':>22}{'nodes after':>13}")
+    for name, G in instances(args):
+        degrees = np.array([d for _, d in G.degree()], dtype=np.int64)
+        reference = "-"
+        if G.number_of_edges() <= args.reference_edges:
+            start = time.time()
+            {node: get_local_clustering_coefficient(G, node) for node in G.nodes()}
+            reference = f"{time.time() - start:.2f}"
+        gc.collect()
+        start = time.time()
+        _, indptr, indices, keys, _, _ = weighted_csr(G)
+        complete_neighborhoods(indptr, indices, keys)
+        clustering = time.time() - start
+        start = time.time()
+        reduced = clique_filtering(G)
+        elapsed = time.time() - start
+        print(f"{name:<32}{G.number_of_edges():>9}{int((degrees ** 2).sum()):>12}{degrees.max():>9}{reference:>18}"
+              f"{clustering:>16.2f}{elapsed:>22.2f}{reduced.number_of_nodes():>13}")
+
+
+if __name__ == "__main__":
+    main()
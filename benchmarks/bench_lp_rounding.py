@@ -0,0 +1,76 @@
+"""
+Measures the effect of rounding the nodes' LP solutions (lp_rounding) on the branch-and-bound tree of alg. Every
+instance is solved with and without rounding, with the same gap and time limit; reported are the times, the numbers
+of nodes branched on, and how often the rounding of a node's LP solution was better than the node's Combo result.
+
+    python benchmarks/bench_lp_rounding.py [--sizes 20 30] [--density 0.3] [--seeds 0 1 2] [--gap 0.001]
+                                           [--node-selection best] [--gml corr40-7.gml] [--signs]
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+import networkx as nx
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from bench_separators import synthetic_graph  # noqa: E402
+from troika.TroikaImplied import alg  # noqa: E402
+
+
+def instances(args):
+    for path in args.gml:
+        yield os.path.basename(path), nx.convert_node_labels_to_integers(nx.read_gml(path))
+    for n in args.sizes:
+        for seed in args.seeds:
+            G = nx.convert_node_labels_to_integers(synthetic_graph(n, args.density, seed))
+            if args.signs:
+                for u, v, data in G.edges(data=True):
+                    data["weight"] = float(np.sign(data["weight"]))
+            yield f"n={n} p={args.density} seed={seed}", G
+
+
+def solve(G, args, lp_rounding):
+    random.seed(0)
+    np.random.seed(0)
+    start = time.time()
+    with contextlib.redirect_stdout(io.StringIO()):
+        out = alg(G, global_threshold=args.gap, time_allowed=args.time_allowed, develop_mode=True,
+                  node_selection=args.node_selection, lp_rounding=lp_rounding)
+    return time.time() - start, out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="*", default=[20, 30])
+    parser.add_argument("--density", type=float, default=0.3)
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0, 1, 2])
+    parser.add_argument("--gap", type=float, default=0.001)
+    parser.add_argument("--node-selection", default="best")
+    parser.add_argument("--gml", nargs="*", default=[])
+    parser.add_argument("--time-allowed", type=float, default=600)
+    parser.add_argument("--signs", action="store_true")
+    args = parser.parse_args()
+
+    print(f"{'instance':<28}{'state':>6}{'off [s]':>9}{'nodes':>7}{'on [s]':>9}{'nodes':>7}{'better':>8}"
+          f"{'rounded':>9}{'round [s]':>11}")
+    totals = np.zeros(4)
+    for name, G in instances(args):
+        off_time, off = solve(G, args, False)
+        on_time, on = solve(G, args, True)
+        stats = on[7]
+        row = [off[7].get("nodes", 0), on[7].get("nodes", 0), stats.get("rounding_improvements", 0),
+               stats.get("rounding_runs", 0)]
+        totals += row
+        print(f"{name:<28}{on[0]:>6}{off_time:>9.2f}{row[0]:>7}{on_time:>9.2f}{row[1]:>7}{row[2]:>8}{row[3]:>9}"
+              f"{stats.get('rounding_time', 0):>11.3f}")
+    print(f"{'total':<28}{'':>6}{'':>9}{int(totals[0]):>7}{'':>9}{int(totals[1]):>7}{int(totals[2]):>8}"
+          f"{int(totals[3]):>9}")
+
+
+if __name__ == "__main__":
+    main()
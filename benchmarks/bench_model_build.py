@@ -0,0 +1,53 @@
+"""
+Compares the time and the peak Python-side memory taken to build the root LP model one variable/constraint at a time (matrix=False)
+with the bulk numpy/scipy construction (matrix=True). The models are built but not solved, so the script also
+runs with a size-limited Gurobi license.
+
+    python benchmarks/bench_model_build.py [--sizes 100 200 300] [--density 1.0]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from bench_separators import synthetic_graph  # noqa: E402
+from troika.TroikaImplied import build_lp_model, create_troika_edge_attributes, find_list_of_cut_triads  # noqa: E402
+
+
+def measure(Graph, triads, **kwargs):
+    start = time.time()
+    model, _ = build_lp_model(Graph, triads, lp_method=4, **kwargs)
+    elapsed = time.time() - start
+    rows = model.num_rows
+    model.dispose()
+    # separate pass, tracing allocations slows the Python side down considerably
+    tracemalloc.start()
+    model, _ = build_lp_model(Graph, triads, lp_method=4, **kwargs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    model.dispose()
+    return elapsed, peak / 2 ** 20, rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 200, 300])
+    parser.add_argument("--density", type=float, default=1.0)
+    args = parser.parse_args()
+
+    print(f"{'n':>5}{'rows':>10}{'loop [s]':>10}{'loop [MiB]':>12}{'matrix [s]':>12}{'matrix [MiB]':>14}"
+          f"{'unnamed [s]':>13}")
+    for n in args.sizes:
+        Graph = create_troika_edge_attributes(synthetic_graph(n, args.density, seed=n))
+        triads = find_list_of_cut_triads(Graph)
+        loop_time, loop_mem, rows = measure(Graph, triads, matrix=False, names=True)
+        matrix_time, matrix_mem, _ = measure(Graph, triads, matrix=True, names=True)
+        unnamed_time, _, _ = measure(Graph, triads, matrix=True, names=False)
+        print(f"{n:>5}{rows:>10}{loop_time:>10.2f}{loop_mem:>12.1f}{matrix_time:>12.2f}{matrix_mem:>14.1f}"
+              f"{unnamed_time:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Measures the fixed cost of the model bookkeeping of one branch, i.e. what perform_branch does with the shared model
+for its two children apart from the LP solves: syncing the branching rows, warm-starting from the parent's basis,
+setting and resetting the fixed variables, and reading the solution, the reduced costs and the basis. The model has
+the pair variables of an n-node graph but no triangle rows, so its LPs are cheap and the bookkeeping, which depends
+on the number of variables, dominates; the optimize time reported by Gurobi is subtracted.
+
+    python benchmarks/bench_node_overhead.py [--sizes 40 60] [--density 0.3] [--fixed 0.2] [--repeat 50]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from bench_separators import synthetic_graph  # noqa: E402
+from troika.TroikaImplied import (build_lp_model, create_troika_edge_attributes, lp_basis,  # noqa: E402
+                                  optimize_with_separation, pair_index, reduced_cost_variable_fixing,
+                                  reset_model_variables, solve_branch_lp, sync_branch_constraints)
+
+
+def measure(n, density, fixed, repeat):
+    Graph = create_troika_edge_attributes(synthetic_graph(n, density, seed=n))
+    model, _ = build_lp_model(Graph, [], lp_method=1)
+    optimize_with_separation(model)
+    basis = lp_basis(model)
+    # fix a random share of the pairs, apart from the ones of the branching triple
+    rng = np.random.default_rng(n)
+    triple = (0, 1, 2)
+    candidates = np.setdiff1d(np.arange(n * (n - 1) // 2), [pair_index(0, 1, n), pair_index(1, 2, n),
+                                                            pair_index(0, 2, n)])
+    chosen = rng.choice(candidates, int(fixed * len(candidates)), replace=False)
+    fixed_ones, fixed_zeros = np.sort(chosen[::2]), np.sort(chosen[1::2])
+
+    solve_time = 0.0
+    start = time.time()
+    for _ in range(repeat):
+        for t in (0, 2):
+            sync_branch_constraints(model, [triple + (t,)], n)
+            upper_bound, var_vals, model = solve_branch_lp(model, Graph, fixed_ones, fixed_zeros, basis)
+            solve_time += model.runtime
+            lp_basis(model)
+            reduced_cost_variable_fixing(model, var_vals, upper_bound, upper_bound - 1.0)
+            reset_model_variables(model, fixed_ones, fixed_zeros)
+    elapsed = time.time() - start
+    return model.num_vars, Graph.number_of_edges(), (elapsed - solve_time) / repeat, solve_time / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[40, 60])
+    parser.add_argument("--density", type=float, default=0.3)
+    parser.add_argument("--fixed", type=float, default=0.2)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'n':>5}{'vars':>9}{'edges':>8}{'bookkeeping [ms/node]':>23}{'optimize [ms/node]':>20}")
+    for n in args.sizes:
+        num_vars, edges, overhead, solve = measure(n, args.density, args.fixed, args.repeat)
+        print(f"{n:>5}{num_vars:>9}{edges:>8}{overhead * 1e3:>23.2f}{solve * 1e3:>20.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Compares the node selection strategies of alg by their time to reach a given optimality gap. Every instance is
+solved once per strategy and gap with global_threshold set to that gap, so the reported time is the time until
+the search first proves the gap (or time_allowed if it does not).
+
+    python benchmarks/bench_node_selection.py [--sizes 20 30] [--density 0.3] [--seeds 0 1 2] [--gaps 0.05 0.01 0.001]
+                                              [--strategies bfs best dfs hybrid] [--gml corr40-7.gml] [--signs]
+
+--signs replaces the uniform weights of the synthetic instances by their signs; +-1 weights give weaker LP bounds
+and larger trees.
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+import networkx as nx
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from bench_separators import synthetic_graph  # noqa: E402
+from troika.TroikaImplied import alg  # noqa: E402
+
+
+def instances(args):
+    for path in args.gml:
+        yield os.path.basename(path), nx.convert_node_labels_to_integers(nx.read_gml(path))
+    for n in args.sizes:
+        for seed in args.seeds:
+            G = nx.convert_node_labels_to_integers(synthetic_graph(n, args.density, seed))
+            if args.signs:
+                for u, v, data in G.edges(data=True):
+                    data["weight"] = float(np.sign(data["weight"]))
+            yield f"n={n} p={args.density} seed={seed}", G
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="*", default=[20, 30])
+    parser.add_argument("--density", type=float, default=0.3)
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0, 1, 2])
+    parser.add_argument("--gaps", type=float, nargs="+", default=[0.05, 0.01, 0.001])
+    parser.add_argument("--strategies", nargs="+", default=["bfs", "best", "dfs", "hybrid"])
+    parser.add_argument("--gml", nargs="*", default=[])
+    parser.add_argument("--time-allowed", type=float, default=600)
+    parser.add_argument("--signs", action="store_true")
+    args = parser.parse_args()
+
+    totals = {(strategy, gap): [0.0, 0] for strategy in args.strategies for gap in args.gaps}
+    print(f"{'instance':<28}{'gap':>8}" + "".join(f"{s + ' [s]':>12}{'nodes':>7}" for s in args.strategies))
+    for name, G in instances(args):
+        for gap in args.gaps:
+            row = f"{name:<28}{gap:>8}"
+            for strategy in args.strategies:
+                random.seed(0)
+                np.random.seed(0)
+                start = time.time()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    out = alg(G, global_threshold=gap, time_allowed=args.time_allowed, develop_mode=True,
+                              node_selection=strategy)
+                elapsed = time.time() - start
+                nodes = out[7].get("nodes", 0)
+                totals[(strategy, gap)][0] += elapsed
+                totals[(strategy, gap)][1] += nodes
+                row += f"{elapsed:>12.2f}{nodes:>7}"
+            print(row)
+    for gap in args.gaps:
+        print(f"{'total':<28}{gap:>8}" + "".join(f"{totals[(s, gap)][0]:>12.2f}{totals[(s, gap)][1]:>7}"
+                                                  for s in args.strategies))
+
+
+if __name__ == "__main__":
+    main()
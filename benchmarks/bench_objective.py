@@ -0,0 +1,69 @@
+"""
+Times the evaluation of the CP objective of a partition with PartitionObjective against the pair loop that
+calculate_objective_value used to run (has_edge and a weight lookup for every pair of nodes in a community). The
+partitions are random, with communities of about --community-size nodes; the objective is built once per graph, as
+alg does, and its build time is reported separately. The move column is the time of one move_delta.
+
+    python benchmarks/bench_objective.py [--sizes 1000 5000] [--density 0.01] [--community-size 10 100]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from bench_separators import synthetic_graph  # noqa: E402
+from troika.TroikaImplied import PartitionObjective  # noqa: E402
+
+
+def pair_loop_objective(communities, Graph):
+    OFV = 0
+    for community in communities:
+        for i in range(len(community)):
+            for j in range(i, len(community)):
+                if Graph.has_edge(community[i], community[j]):
+                    OFV += Graph[community[i]][community[j]]['weight']
+    return np.round(OFV, 8)
+
+
+def timed(function, repeat):
+    start = time.time()
+    for _ in range(repeat):
+        result = function()
+    return result, (time.time() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--density", type=float, default=0.01)
+    parser.add_argument("--community-size", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'n':>6}{'edges':>9}{'|C|':>6}{'loop [ms]':>11}{'build [ms]':>12}{'labels [ms]':>13}{'value [ms]':>12}"
+          f"{'move [us]':>11}")
+    for n in args.sizes:
+        G = synthetic_graph(n, args.density, seed=n)
+        objective, build = timed(lambda: PartitionObjective(G), 1)
+        for size in args.community_size:
+            rng = random.Random(size)
+            nodes = list(G.nodes())
+            rng.shuffle(nodes)
+            communities = [nodes[k:k + size] for k in range(0, n, size)]
+            reference, loop = timed(lambda: pair_loop_objective(communities, G), args.repeat)
+            labels, labelling = timed(lambda: objective.labels(communities), args.repeat)
+            value, evaluation = timed(lambda: objective.value(labels), args.repeat)
+            assert abs(value - reference) < 1e-6, (value, reference)
+            # node 0 moves into a community of its own
+            singleton = labels.max() + 1
+            _, move = timed(lambda: objective.move_delta(labels, 0, singleton), 100 * args.repeat)
+            print(f"{n:>6}{G.number_of_edges():>9}{size:>6}{loop * 1e3:>11.2f}{build * 1e3:>12.2f}"
+                  f"{labelling * 1e3:>13.2f}{evaluation * 1e3:>12.3f}{move * 1e6:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
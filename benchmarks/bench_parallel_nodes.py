@@ -0,0 +1,72 @@
+"""
+Measures the branch-and-bound throughput of alg for several numbers of node worker processes. Every instance is
+solved once per worker count with the same gap and time limit; the reported rate is the number of nodes branched
+on per second after the root LP, which includes starting the worker processes and building their models.
+
+    python benchmarks/bench_parallel_nodes.py [--sizes 20 30] [--density 0.3] [--seeds 0 1 2] [--gap 0.001]
+                                              [--workers 1 2 4 8] [--node-selection best] [--gml corr40-7.gml]
+                                              [--signs]
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+import networkx as nx
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from bench_separators import synthetic_graph  # noqa: E402
+from troika.TroikaImplied import alg  # noqa: E402
+
+
+def instances(args):
+    for path in args.gml:
+        yield os.path.basename(path), nx.convert_node_labels_to_integers(nx.read_gml(path))
+    for n in args.sizes:
+        for seed in args.seeds:
+            G = nx.convert_node_labels_to_integers(synthetic_graph(n, args.density, seed))
+            if args.signs:
+                for u, v, data in G.edges(data=True):
+                    data["weight"] = float(np.sign(data["weight"]))
+            yield f"n={n} p={args.density} seed={seed}", G
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="*", default=[20, 30])
+    parser.add_argument("--density", type=float, default=0.3)
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0, 1, 2])
+    parser.add_argument("--gap", type=float, default=0.001)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--node-selection", default="best")
+    parser.add_argument("--gml", nargs="*", default=[])
+    parser.add_argument("--time-allowed", type=float, default=600)
+    parser.add_argument("--signs", action="store_true")
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} cpus")
+    print(f"{'instance':<28}" + "".join(f"{str(w) + ' [s]':>10}{'nodes':>7}{'nodes/s':>9}" for w in args.workers))
+    for name, G in instances(args):
+        row = f"{name:<28}"
+        for workers in args.workers:
+            random.seed(0)
+            np.random.seed(0)
+            start = time.time()
+            with contextlib.redirect_stdout(io.StringIO()):
+                out = alg(G, global_threshold=args.gap, time_allowed=args.time_allowed, develop_mode=True,
+                          node_selection=args.node_selection, n_workers=workers)
+            elapsed = time.time() - start
+            stats = out[7]
+            nodes = stats.get("nodes", 0)
+            search_time = max(elapsed - stats.get("cut_triads_time", 0) - stats.get("model_build_time", 0)
+                              - stats.get("root_lp_time", 0), 1e-9)
+            row += f"{elapsed:>10.2f}{nodes:>7}{nodes / search_time:>9.1f}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Compares the per-pair networkx separator path of find_list_of_cut_triads with the batched CSR engine.
+
+    python benchmarks/bench_separators.py [--n-jobs N] [--skip-networkx-above N]
+"""
+import argparse
+import os
+import sys
+import time
+
+import networkx as nx
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from troika.separators import find_cut_triads_csr  # noqa: E402
+from troika.TroikaImplied import find_list_of_cut_triads, create_troika_edge_attributes  # noqa: E402
+
+
+def synthetic_graph(n, density, seed):
+    rng = np.random.default_rng(seed)
+    G = nx.Graph()
+    G.add_nodes_from(range(n))
+    first, second = np.triu_indices(n, k=1)
+    keep = rng.random(len(first)) < density
+    weights = rng.uniform(-1, 1, keep.sum())
+    G.add_weighted_edges_from(zip(first[keep].tolist(), second[keep].tolist(), weights.tolist()))
+    G = G.subgraph(max(nx.connected_components(G), key=len)).copy()
+    return nx.convert_node_labels_to_integers(G)
+
+
+def instances():
+    here = os.path.dirname(os.path.abspath(__file__))
+    yield "corr40-7", nx.convert_node_labels_to_integers(nx.read_gml(os.path.join(here, "..", "corr40-7.gml")))
+    for n, density in ((100, 0.1), (100, 0.5), (100, 1.0), (200, 0.05), (200, 0.5), (300, 0.03), (300, 1.0)):
+        yield f"synthetic n={n} p={density}", synthetic_graph(n, density, seed=n)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    parser.add_argument("--skip-networkx-above", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'instance':<26}{'pairs':>8}{'triads':>9}{'networkx [s]':>14}{'csr [s]':>10}{'speedup':>9}")
+    for name, G in instances():
+        G = create_troika_edge_attributes(G)
+        n = G.number_of_nodes()
+        start = time.time()
+        triads = find_cut_triads_csr(G, n_jobs=args.n_jobs)
+        csr_time = time.time() - start
+        if n <= args.skip_networkx_above:
+            start = time.time()
+            reference = find_list_of_cut_triads(G, method="networkx")
+            nx_time = time.time() - start
+            assert set(map(tuple, np.sort(reference, axis=1).tolist())) == set(map(tuple, triads.tolist()))
+            speedup = f"{nx_time / csr_time:8.1f}x"
+            nx_time = f"{nx_time:14.2f}"
+        else:
+            nx_time, speedup = f"{'-':>14}", f"{'-':>9}"
+        print(f"{name:<26}{n * (n - 1) // 2:>8}{len(triads):>9}{nx_time}{csr_time:10.2f}{speedup}")
+
+
+if __name__ == "__main__":
+    main()
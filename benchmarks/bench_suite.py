@@ -0,0 +1,231 @@
+"""
+Reproducible benchmark suite: solves synthetic instances (see instances.py) and CP-Lib .gml files with alg under
+fixed seeds and records, per instance, the preprocessing, cut triad and root LP times, the total time, the node and
+LP iteration counts, the peak memory, and the time-to-gap curve (incumbent and bound after every change, from the
+search's events). Every instance runs in a fresh process so that its peak resident set size is its own.
+The results are written as JSON; --compare flags the instances that got slower, bigger or worse than in an earlier
+result file and exits with status 1 if there are any.
+
+    python benchmarks/bench_suite.py [--generators correlation planted signed] [--sizes 30 40] [--seeds 0 1]
+                                     [--gml corr40-7.gml] [--gap 0.001] [--time-allowed 60] [--lazy-constraints]
+                                     [--solver gurobi highs] [--output run.json] [--compare baseline.json]
+                                     [--tolerance 0.25]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+
+import networkx as nx
+import numpy as np
+import scipy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from instances import GENERATORS  # noqa: E402
+from troika.TroikaImplied import alg  # noqa: E402
+from troika.events import BoundUpdated, IncumbentImproved  # noqa: E402
+
+GAP_TARGETS = (0.1, 0.01, 0.001)
+
+# metric: (how a regression shows, smallest absolute change that counts)
+REGRESSION_METRICS = {
+    "total_time": ("higher", 0.05),
+    "nodes": ("higher", 2),
+    "peak_rss_mib": ("higher", 10.0),
+    "objective": ("lower", 1e-6),
+    "gap": ("higher", 1e-6),
+}
+
+
+def instance_specs(args):
+    specs = [{"name": os.path.splitext(os.path.basename(path))[0], "gml": os.path.abspath(path), "seed": 0}
+             for path in args.gml]
+    specs += [{"name": f"{generator}-n{n}-s{seed}", "generator": generator, "n": n, "seed": seed}
+              for generator in args.generators for n in args.sizes for seed in args.seeds]
+    for spec in specs:
+        for solver in args.solver:
+            yield dict(spec, solver=solver)
+
+
+def build_instance(spec):
+    if "gml" in spec:
+        return nx.convert_node_labels_to_integers(nx.read_gml(spec["gml"]))
+    return GENERATORS[spec["generator"]](spec["n"], seed=spec["seed"])
+
+
+def gap(lower_bound, upper_bound):
+    return 0.0 if upper_bound == 0 else (upper_bound - lower_bound) / abs(upper_bound)
+
+
+def peak_rss_mib():
+    # kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_instance(spec, args):
+    """
+    Solves one instance in this process and returns its record
+    """
+    G = build_instance(spec)
+    random.seed(spec["seed"])
+    np.random.seed(spec["seed"])
+    rss_before = peak_rss_mib()
+    curve = []
+    bounds = {}
+
+    def record(event):
+        if isinstance(event, IncumbentImproved):
+            bounds["incumbent"] = event.incumbent
+        elif isinstance(event, BoundUpdated):
+            bounds["incumbent"], bounds["bound"] = event.incumbent, event.best_bound
+        else:
+            return
+        if "bound" in bounds:
+            curve.append([time.time() - start, float(bounds["incumbent"]), float(bounds["bound"])])
+
+    start = time.time()
+    state, lower_bound, upper_bound, _, preprocessing_time, _, solve_time, stats = alg(
+        G, args.gap, args.time_allowed, develop_mode=True, node_selection=args.node_selection,
+        n_workers=args.n_workers, lazy_constraints=args.lazy_constraints, callbacks=[record], solver=spec["solver"])
+    total_time = time.time() - start
+    curve.append([total_time, float(lower_bound), float(upper_bound)])
+    time_to_gap = {str(target): next((t for t, lower, upper in curve if gap(lower, upper) <= target), None)
+                   for target in GAP_TARGETS}
+    return dict(spec, **{
+        "graph_nodes": G.number_of_nodes(),
+        "graph_edges": G.number_of_edges(),
+        "state": int(state),
+        "objective": float(lower_bound),
+        "bound": float(upper_bound),
+        "gap": gap(lower_bound, upper_bound),
+        "preprocessing_time": preprocessing_time,
+        "cut_triads_time": stats.get("cut_triads_time", 0.0),
+        "model_build_time": stats.get("model_build_time", 0.0),
+        "root_lp_time": stats.get("root_lp_time", 0.0),
+        "solve_time": solve_time,
+        "total_time": total_time,
+        "nodes": stats.get("nodes", 0),
+        "branch_lp_iterations": stats.get("branch_lp_iterations", 0),
+        "peak_rss_mib": peak_rss_mib(),
+        "peak_rss_growth_mib": peak_rss_mib() - rss_before,
+        "time_to_gap": time_to_gap,
+        "curve": curve,
+    })
+
+
+def run_in_subprocess(spec, args):
+    command = [sys.executable, os.path.abspath(__file__), "--run", json.dumps(spec), "--gap", str(args.gap),
+               "--time-allowed", str(args.time_allowed), "--node-selection", args.node_selection,
+               "--n-workers", str(args.n_workers)] + (["--lazy-constraints"] if args.lazy_constraints else [])
+    run = subprocess.run(command, capture_output=True, text=True)
+    if run.returncode != 0:
+        # e.g. a model too large for the Gurobi license; the other instances still run
+        return dict(spec, error=(run.stderr.strip().splitlines() or ["exit status %d" % run.returncode])[-1])
+    # gurobipy may print its license banner before the record
+    return json.loads(run.stdout.strip().splitlines()[-1])
+
+
+def metadata(args):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    import gurobipy
+    return {
+        "commit": commit,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "scipy": scipy.__version__,
+        "networkx": nx.__version__,
+        "gurobi": ".".join(map(str, gurobipy.gurobi.version())),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "settings": {"gap": args.gap, "time_allowed": args.time_allowed, "node_selection": args.node_selection,
+                     "n_workers": args.n_workers, "lazy_constraints": args.lazy_constraints},
+    }
+
+
+def compare(baseline, results, tolerance):
+    """
+    Returns the regressions of results against baseline (both lists of records) as messages
+    """
+    # files written before the solver option hold Gurobi runs
+    previous = {(record["name"], record.get("solver", "gurobi")): record for record in baseline}
+    regressions = []
+    for record in results:
+        old = previous.get((record["name"], record["solver"]))
+        if old is None or "error" in old:
+            continue
+        if "error" in record:
+            regressions.append(f"{record['name']} ({record['solver']}): {record['error']}")
+            continue
+        for metric, (direction, min_change) in REGRESSION_METRICS.items():
+            before, after = old[metric], record[metric]
+            change = after - before if direction == "higher" else before - after
+            relative = change / abs(before) if before else float("inf")
+            # times, counts and memory get the relative tolerance, objective values and gaps none
+            limit = tolerance if metric in ("total_time", "nodes", "peak_rss_mib") else 0.0
+            if change > min_change and relative > limit:
+                regressions.append(f"{record['name']} ({record['solver']}): {metric} {before:.6g} -> {after:.6g}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--generators", nargs="*", default=sorted(GENERATORS), choices=sorted(GENERATORS))
+    parser.add_argument("--sizes", type=int, nargs="+", default=[30, 40])
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0, 1])
+    parser.add_argument("--gml", nargs="*", default=[])
+    parser.add_argument("--gap", type=float, default=0.001)
+    parser.add_argument("--time-allowed", type=float, default=60)
+    parser.add_argument("--node-selection", default="best")
+    parser.add_argument("--n-workers", type=int, default=1)
+    parser.add_argument("--lazy-constraints", action="store_true")
+    parser.add_argument("--solver", nargs="+", default=["gurobi"], choices=["gurobi", "highs"])
+    parser.add_argument("--output", help="JSON file the results are written to")
+    parser.add_argument("--compare", help="JSON result file of an earlier run to flag regressions against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="relative increase of times, node counts and memory that counts as a regression")
+    parser.add_argument("--run", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.run is not None:
+        print(json.dumps(run_instance(json.loads(args.run), args)))
+        return
+
+    print(f"{'instance':<24}{'solver':>8}{'n':>5}{'edges':>7}{'state':>6}{'objective':>12}{'gap':>9}{'prep [s]':>10}"
+          f"{'triads [s]':>12}{'root lp [s]':>13}{'total [s]':>11}{'nodes':>7}{'peak [MiB]':>12}")
+    results = []
+    for spec in instance_specs(args):
+        record = run_in_subprocess(spec, args)
+        results.append(record)
+        if "error" in record:
+            print(f"{record['name']:<24}{record['solver']:>8}  failed: {record['error']}", flush=True)
+            continue
+        print(f"{record['name']:<24}{record['solver']:>8}{record['graph_nodes']:>5}{record['graph_edges']:>7}{record['state']:>6}"
+              f"{record['objective']:>12.4f}{record['gap']:>9.4f}{record['preprocessing_time']:>10.3f}"
+              f"{record['cut_triads_time']:>12.3f}{record['root_lp_time']:>13.3f}{record['total_time']:>11.2f}"
+              f"{record['nodes']:>7}{record['peak_rss_mib']:>12.1f}", flush=True)
+
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump({"meta": metadata(args), "results": results}, f, indent=1)
+    if args.compare is not None:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(baseline, results, args.tolerance)
+        for message in regressions:
+            print("REGRESSION", message)
+        print(f"{len(regressions)} regressions against {args.compare}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Generators of synthetic clique partitioning instances in the style of CP-Lib, each determined by its arguments and
+seed: correlation graphs (integer weights from the correlations of noisy samples of a few latent groups, like the
+corr instances such as corr40-7.gml), planted partitions whose +1/-1 signs are flipped with some noise, and sparse
+signed graphs. Every generator returns the largest connected component, relabeled to the nodes 0..n'-1
+"""
+import networkx as nx
+import numpy as np
+
+
+def largest_component(G):
+    G = G.subgraph(max(nx.connected_components(G), key=len)).copy()
+    return nx.convert_node_labels_to_integers(G)
+
+
+def weighted_pairs(n, weights, keep):
+    G = nx.Graph()
+    G.add_nodes_from(range(n))
+    first, second = np.triu_indices(n, k=1)
+    keep = keep & (weights != 0)
+    G.add_weighted_edges_from(zip(first[keep].tolist(), second[keep].tolist(), weights[keep].tolist()))
+    return largest_component(G)
+
+
+def correlation_graph(n, density=1.0, seed=0, groups=4, samples=None, scale=100):
+    """
+    Nodes are variables sampled as one of groups latent factors plus noise; the weight of a pair is its Pearson
+    correlation minus the median one, times scale and rounded, so about half the weights are positive. A random
+    share density of the pairs is kept
+    """
+    rng = np.random.default_rng(seed)
+    samples = samples or 2 * n
+    membership = rng.integers(groups, size=n)
+    loadings = rng.uniform(0.3, 1.0, size=n)
+    factors = rng.standard_normal((samples, groups))
+    data = factors[:, membership] * loadings + rng.standard_normal((samples, n))
+    correlations = np.corrcoef(data, rowvar=False)[np.triu_indices(n, k=1)]
+    weights = np.round(scale * (correlations - np.median(correlations)))
+    return weighted_pairs(n, weights, rng.random(len(weights)) < density)
+
+
+def planted_partition(n, groups=4, density=0.5, noise=0.1, seed=0):
+    """
+    Pairs inside one of groups random communities weigh +1 and the others -1; every sign is flipped with
+    probability noise, and a random share density of the pairs is kept
+    """
+    rng = np.random.default_rng(seed)
+    membership = rng.integers(groups, size=n)
+    first, second = np.triu_indices(n, k=1)
+    weights = np.where(membership[first] == membership[second], 1.0, -1.0)
+    weights[rng.random(len(weights)) < noise] *= -1
+    return weighted_pairs(n, weights, rng.random(len(weights)) < density)
+
+
+def signed_sparse(n, degree=4.0, positive=0.5, seed=0):
+    """
+    Erdos-Renyi graph of average degree degree whose edges are positive with probability positive, with weights
+    of magnitude uniform in [0.1, 1]
+    """
+    rng = np.random.default_rng(seed)
+    num_pairs = n * (n - 1) // 2
+    magnitudes = rng.uniform(0.1, 1.0, size=num_pairs)
+    weights = np.where(rng.random(num_pairs) < positive, magnitudes, -magnitudes)
+    return weighted_pairs(n, weights, rng.random(num_pairs) < degree / (n - 1))
+
+
+GENERATORS = {"correlation": correlation_graph, "planted": planted_partition, "signed": signed_sparse}
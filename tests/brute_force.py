@@ -0,0 +1,61 @@
+"""
+Small random instances and exhaustive reference solutions for the tests
+"""
+import itertools
+
+import networkx as nx
+import numpy as np
+
+
+def random_graph(n, density, seed, signs=False):
+    """
+    Returns a graph on the nodes 0..n-1 whose pairs are edges with probability density, with weights drawn
+    uniformly from [-1, 1] (rounded to three decimals), or from {-1, 1} with signs
+    """
+    rng = np.random.default_rng(seed)
+    G = nx.Graph()
+    G.add_nodes_from(range(n))
+    for i, j in itertools.combinations(range(n), 2):
+        if rng.random() < density:
+            G.add_edge(i, j, weight=float(rng.choice([-1.0, 1.0])) if signs else round(float(rng.uniform(-1, 1)), 3))
+    return G
+
+
+def partitions(nodes):
+    """
+    Generates every partition of the list nodes as a list of communities
+    """
+    if not nodes:
+        yield []
+        return
+    first, rest = nodes[0], nodes[1:]
+    for partition in partitions(rest):
+        yield [[first]] + partition
+        for k in range(len(partition)):
+            yield partition[:k] + [[first] + partition[k]] + partition[k + 1:]
+
+
+def labelings(n):
+    """
+    Generates every partition of 0..n-1 as an array of community labels
+    """
+    for partition in partitions(list(range(n))):
+        labels = np.empty(n, dtype=np.int64)
+        for label, community in enumerate(partition):
+            labels[community] = label
+        yield labels
+
+
+def objective(G, partition):
+    """
+    Returns the sum of the weights of the edges inside the communities of partition
+    """
+    return sum(G.edges[u, v]["weight"] for community in partition for u, v in itertools.combinations(community, 2)
+               if G.has_edge(u, v))
+
+
+def optimum(G):
+    """
+    Returns the largest objective value of a partition of G
+    """
+    return max(objective(G, partition) for partition in partitions(list(G.nodes())))
@@ -0,0 +1,79 @@
+import glob
+import os
+import random
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from troika.TroikaImplied import alg, alg_steps, output_arrays, output_from_arrays, troika
+from troika.cache import SearchCheckpoints, graph_fingerprint
+
+from .brute_force import objective, optimum, random_graph
+
+
+@pytest.fixture(autouse=True)
+def seeded():
+    # Combo draws from the global generators
+    random.seed(0)
+    np.random.seed(0)
+
+
+def test_output_round_trip():
+    out = (6, 5.0, 5.5, [[0, 2], [1], [3, 4, 5]], 0.25, 0.5, 1.75, {"nodes": 3, "lp_time": 0.125})
+    assert output_from_arrays(output_arrays(out)) == out
+
+
+def test_search_resumes_from_checkpoint(tmp_path):
+    # a complete graph with +-1 weights that takes about ten nodes
+    G = random_graph(9, 1.0, 12, signs=True)
+    checkpoints = SearchCheckpoints(str(tmp_path))
+    steps = alg_steps(G, 0.001, 60, develop_mode=True, checkpoint=checkpoints, checkpoint_interval=0)
+    try:
+        for _ in range(3):
+            next(steps)
+        steps.send(True)
+    except StopIteration as stop:
+        stopped = stop.value
+    assert stopped[0] in (3, 4, 5)
+    saved = checkpoints.load(graph_fingerprint(G))
+    assert len(saved["open_levels"]) > 0
+
+    resumed = alg(G, 0.001, 60, develop_mode=True, checkpoint=checkpoints, resume=checkpoints)
+    assert resumed[0] in (6, 7, 8)
+    assert resumed[1] == pytest.approx(optimum(G))
+    assert resumed[1] == pytest.approx(objective(G, resumed[3]))
+    assert sorted(v for community in resumed[3] for v in community) == list(G.nodes())
+    # the restored statistics count the nodes before the checkpoint as well
+    assert resumed[7]["nodes"] >= stopped[7]["nodes"]
+
+
+def test_troika_resumes_from_checkpoint_dir(tmp_path):
+    components = [random_graph(9, 1.0, 12, signs=True), random_graph(8, 1.0, 16, signs=True)]
+    G = nx.disjoint_union(*components)
+    best = sum(optimum(component) for component in components)
+    checkpoint_dir = str(tmp_path)
+
+    # no time for more than the roots: both searches are saved unfinished
+    troika(G, 0.001, 0.0001, checkpoint_dir=checkpoint_dir)
+    paths = glob.glob(os.path.join(checkpoint_dir, "*.npz"))
+    assert len(paths) == 2
+    checkpoints = SearchCheckpoints(checkpoint_dir)
+    for path in paths:
+        assert "incumbent" in checkpoints.load(os.path.basename(path)[:-4])
+
+    resumed = troika(G, 0.001, 60, checkpoint_dir=checkpoint_dir, resume_from=checkpoint_dir)
+    assert resumed[0] == pytest.approx(best)
+    for path in paths:
+        assert "final_state" in checkpoints.load(os.path.basename(path)[:-4])
+
+    # finished components are taken from the checkpoints, with the times of the run that finished them
+    finished = troika(G, 0.001, 60, resume_from=checkpoint_dir)
+    assert finished[0] == pytest.approx(best)
+    assert sorted(map(sorted, finished[2])) == sorted(map(sorted, resumed[2]))
+    assert finished[4] == pytest.approx(resumed[4])
+
+
+def test_resume_from_missing_dir(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        troika(random_graph(5, 1.0, 0), resume_from=str(tmp_path / "missing"))
@@ -0,0 +1,102 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from troika.TroikaImplied import pair_index, propagate_fixings, right_implied
+
+from .brute_force import labelings
+
+N = 6
+FIRST, SECOND = np.triu_indices(N, k=1)
+
+
+def pair_values(labels):
+    """
+    Returns the x variables of the partition labels, indexed by pair_index: 0 for a pair in one community
+    """
+    return (labels[FIRST] != labels[SECOND]).astype(np.int64)
+
+
+def satisfies(labels, ones, zeros, constraints):
+    x = pair_values(labels)
+    if np.any(x[ones] != 1) or np.any(x[zeros] != 0):
+        return False
+    for i, j, k, t in constraints:
+        total = x[pair_index(i, j, N)] + x[pair_index(j, k, N)] + x[pair_index(i, k, N)]
+        if (t == 0 and total != 0) or (t == 2 and total < 2):
+            return False
+    return True
+
+
+def random_instance(seed):
+    """
+    Returns random fixings (pair indices) and branching constraints (i, j, k, t) of a graph with N nodes
+    """
+    rng = np.random.default_rng(seed)
+    num_pairs = len(FIRST)
+    ones = rng.choice(num_pairs, rng.integers(0, 3), replace=False)
+    zeros = rng.choice(num_pairs, rng.integers(0, 3), replace=False)
+    constraints = [tuple(sorted(rng.choice(N, 3, replace=False).tolist())) + (int(rng.choice([0, 2])),)
+                   for _ in range(rng.integers(0, 4))]
+    return ones, zeros, constraints
+
+
+def test_propagate_fixings_example():
+    # a left branch on (0, 1, 2) with x_23 = 1 separates 0 and 1 from 3 as well
+    ones, zeros, classes = propagate_fixings(np.array([pair_index(2, 3, N)]), np.empty(0, dtype=np.int64),
+                                             [(0, 1, 2, 0)], N)
+    assert set(ones.tolist()) == {pair_index(0, 3, N), pair_index(1, 3, N), pair_index(2, 3, N)}
+    assert set(zeros.tolist()) == {pair_index(0, 1, N), pair_index(0, 2, N), pair_index(1, 2, N)}
+    assert classes[0] == classes[1] == classes[2] != classes[3]
+
+
+def test_propagate_fixings_contradiction():
+    # a right branch allows only one pair of its triple in a community
+    stats = {}
+    assert propagate_fixings(np.empty(0, dtype=np.int64), np.array([pair_index(0, 1, N), pair_index(1, 2, N)]),
+                             [(0, 1, 2, 2)], N, stats) is None
+    assert stats["contradicting_fixings"] == 1
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_propagate_fixings_brute_force(seed):
+    ones, zeros, constraints = random_instance(seed)
+    feasible = [labels for labels in labelings(N) if satisfies(labels, ones, zeros, constraints)]
+    fixed = propagate_fixings(ones, zeros, constraints, N)
+    if fixed is None:
+        assert not feasible
+        return
+    fixed_ones, fixed_zeros, classes = fixed
+    assert set(ones.tolist()) <= set(fixed_ones.tolist())
+    assert set(zeros.tolist()) <= set(fixed_zeros.tolist())
+    # every partition that satisfies the fixings and constraints satisfies the implied fixings
+    for labels in feasible:
+        x = pair_values(labels)
+        assert np.all(x[fixed_ones] == 1) and np.all(x[fixed_zeros] == 0)
+        for u, v in itertools.combinations(range(N), 2):
+            if classes[u] == classes[v]:
+                assert labels[u] == labels[v]
+
+
+def test_right_implied_example():
+    # 3 is in the community of 0, so it takes the place of 0 in the right branch on (0, 1, 2)
+    classes = np.array([0, 1, 2, 0, 3, 4])
+    assert right_implied(classes, (0, 1, 2)) == [(1, 2, 3, 2)]
+
+
+def test_right_implied_brute_force():
+    num_implied = 0
+    for seed in range(300):
+        ones, zeros, constraints = random_instance(seed)
+        branch_triple = tuple(sorted(np.random.default_rng(seed + 1000).choice(N, 3, replace=False).tolist()))
+        constraints = constraints + [branch_triple + (2,)]
+        fixed = propagate_fixings(ones, zeros, constraints, N)
+        if fixed is None:
+            continue
+        implied = right_implied(fixed[2], branch_triple)
+        num_implied += len(implied)
+        for labels in labelings(N):
+            if satisfies(labels, ones, zeros, constraints):
+                assert satisfies(labels, [], [], implied)
+    assert num_implied > 0
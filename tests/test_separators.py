@@ -0,0 +1,66 @@
+import itertools
+
+import networkx as nx
+import numpy as np
+import pytest
+from networkx.algorithms.connectivity import minimum_st_node_cut
+
+from troika.separators import SeparatorEngine, build_separator_csr, find_cut_triads_csr
+
+from .brute_force import random_graph
+
+INSTANCES = [(n, density, seed) for n in (6, 9) for density in (0.3, 0.6) for seed in range(4)]
+
+
+def without_pair(G, s, t):
+    H = G.copy()
+    H.remove_edges_from(list(nx.selfloop_edges(H)))
+    if H.has_edge(s, t):
+        H.remove_edge(s, t)
+    return H
+
+
+def reference_triads(G):
+    """
+    The cut triads as find_list_of_cut_triads(method="networkx") finds them, one minimum_st_node_cut per pair
+    """
+    triads = []
+    for s, t in itertools.combinations(sorted(G.nodes()), 2):
+        triads += [tuple(sorted((s, t, k))) for k in minimum_st_node_cut(without_pair(G, s, t), s, t)]
+    return sorted(triads)
+
+
+def separates(H, s, t, cut):
+    H = H.copy()
+    H.remove_nodes_from(cut)
+    return not nx.has_path(H, s, t)
+
+
+@pytest.mark.parametrize("n, density, seed", INSTANCES)
+def test_cut_triads_match_networkx(n, density, seed):
+    G = random_graph(n, density, seed)
+    # labels that are not positions, and a self loop, which never changes a node cut
+    G = nx.relabel_nodes(G, {v: 10 * v + 3 for v in G.nodes()})
+    G.add_edge(3, 3, weight=1.0)
+    triads = find_cut_triads_csr(G, n_jobs=1)
+    assert sorted(map(tuple, triads.tolist())) == reference_triads(G)
+    # the chunks processed in parallel give the same triads
+    parallel = find_cut_triads_csr(G, n_jobs=2, chunk_size=5)
+    assert sorted(map(tuple, parallel.tolist())) == sorted(map(tuple, triads.tolist()))
+
+
+@pytest.mark.parametrize("n, density, seed", INSTANCES[:8])
+def test_separating_sets_are_minimum(n, density, seed):
+    G = random_graph(n, density, seed)
+    nodes, csr = build_separator_csr(G)
+    engine = SeparatorEngine(csr)
+    for s, t in itertools.combinations(range(n), 2):
+        H = without_pair(G, s, t)
+        cut = nodes[engine.separating_set(s, t)].tolist()
+        others = [v for v in H.nodes() if v not in (s, t)]
+        if not nx.has_path(H, s, t):
+            assert cut == []
+            continue
+        assert separates(H, s, t, cut)
+        for size in range(len(cut)):
+            assert not any(separates(H, s, t, smaller) for smaller in itertools.combinations(others, size))
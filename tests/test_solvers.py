@@ -0,0 +1,50 @@
+import random
+
+import numpy as np
+import pytest
+
+from troika.TroikaImplied import alg, build_lp_model, create_troika_edge_attributes, lp_objective_value
+from troika.separators import find_cut_triads_csr
+
+from .brute_force import optimum, random_graph
+
+INSTANCES = [(n, density, seed, signs) for n in (6, 8) for density in (0.5, 1.0) for seed in range(2)
+             for signs in (False, True)]
+
+
+def root_model(G, solver):
+    Graph = create_troika_edge_attributes(G.copy())
+    model, _ = build_lp_model(Graph, find_cut_triads_csr(Graph, n_jobs=1).tolist(), -1, solver=solver)
+    return model
+
+
+@pytest.mark.parametrize("n, density, seed, signs", INSTANCES)
+def test_gurobi_and_highs_agree(n, density, seed, signs):
+    G = random_graph(n, density, seed, signs)
+    best = optimum(G)
+    lp_values, ip_values = [], []
+    for solver in ("gurobi", "highs"):
+        model = root_model(G, solver)
+        model.optimize()
+        assert model.has_solution()
+        lp_values.append(lp_objective_value(model))
+        # with the triangle rows of all cut triads the IP is the clique partitioning problem itself
+        model.set_integral(True)
+        model.optimize()
+        ip_values.append(lp_objective_value(model))
+        model.dispose()
+    assert lp_values[0] == pytest.approx(lp_values[1], abs=1e-6)
+    assert lp_values[0] >= best - 1e-6
+    assert ip_values == pytest.approx([best, best], abs=1e-6)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_searches_agree(seed):
+    G = random_graph(9, 1.0, 12 + seed, signs=True)
+    best = optimum(G)
+    for solver in ("gurobi", "highs"):
+        random.seed(0)
+        np.random.seed(0)
+        out = alg(G, 0.001, 60, develop_mode=True, solver=solver)
+        assert out[1] == pytest.approx(best)
+        assert out[2] >= best - 1e-6
@@ -1,18 +1,26 @@
 import networkx as nx
 import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components
+import os
 import time
 import multiprocessing
 import pycombo
-from itertools import combinations
-from collections import defaultdict
+from itertools import combinations, count
+from collections import OrderedDict, defaultdict, deque
+from heapq import heapify, heappop, heappush
 from gurobipy import *
 from networkx.algorithms.connectivity import minimum_st_node_cut
 from joblib import Parallel, delayed, parallel_backend
-from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, TimeoutError, wait, as_completed, FIRST_COMPLETED
 from itertools import chain
 import random
 import EstimateUB
 from typing import Optional, Tuple, Dict, List
+from .separators import find_cut_triads_csr
+from .solvers import SOLVERS, GurobiLP, gurobi_model
+from .events import BoundUpdated, IncumbentImproved, LPSolved, NodeEvaluated, emit
+from .cache import PreprocessingCache, SearchCheckpoints, graph_fingerprint, graph_to_arrays, graph_from_arrays
 
 # global var for pycombo execution
 start_separate = None
@@ -70,70 +78,151 @@ def deconstruct_graph(graph, weight: Optional[str] = None):
     return nodes, edges
 
 
-def clique_filtering(G):
+def weighted_csr(G):
     """
-    Returns G' which is a clique reduction on the input graph G
+    Returns the nodes of G, the symmetric adjacency of G without self-loops as CSR arrays (indptr, indices sorted
+    within every row, sorted keys u * n + v, weights) and the self-loop weight of every node (NaN without one)
     """
-    lcc_dict = {node: get_local_clustering_coefficient(G, node) for node in G.nodes()}
-    shrink_dict = {}
-    for node in G.nodes():
-        if node in shrink_dict:
-            continue
-        neighbors = list(G.neighbors(node))
+    nodes = list(G.nodes())
+    n = len(nodes)
+    index = {node: k for k, node in enumerate(nodes)}
+    edges = [(index[u], index[v], w) for u, v, w in G.edges(data='weight')]
+    rows = np.array([e[0] for e in edges], dtype=np.int64)
+    cols = np.array([e[1] for e in edges], dtype=np.int64)
+    weights = np.array([e[2] for e in edges], dtype=np.float64)
+    loop_weights = np.full(n, np.nan)
+    loops = rows == cols
+    loop_weights[rows[loops]] = weights[loops]
+    rows, cols, weights = rows[~loops], cols[~loops], weights[~loops]
+    keys = np.concatenate((rows * n + cols, cols * n + rows))
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    indices = keys % n
+    weights = np.concatenate((weights, weights))[order]
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys // n, minlength=n), out=indptr[1:])
+    return nodes, indptr, indices, keys, weights, loop_weights
+
+
+def neighbor_pairs(indptr, indices, nodes, max_pairs=1 << 22):
+    """
+    Yields the pairs (a, b) of distinct neighbors of the given nodes as chunks of arrays (owner, a, b) of at most
+    about max_pairs pairs, owner being the position of the pair's node in nodes
+    """
+    degrees = indptr[nodes + 1] - indptr[nodes]
+    sizes = degrees * degrees
+    ends = np.cumsum(sizes)
+    lo = 0
+    while lo < len(nodes):
+        hi = max(lo + 1, int(np.searchsorted(ends, ends[lo] - sizes[lo] + max_pairs, side="right")))
+        chunk_sizes = sizes[lo:hi]
+        owner = np.repeat(np.arange(lo, hi), chunk_sizes)
+        local = np.arange(chunk_sizes.sum()) - np.repeat(np.cumsum(chunk_sizes) - chunk_sizes, chunk_sizes)
+        degree = degrees[owner]
+        start = indptr[nodes[owner]]
+        first, second = local // degree, local % degree
+        keep = first < second
+        yield owner[keep], indices[start[keep] + first[keep]], indices[start[keep] + second[keep]]
+        lo = hi
+
+
+def edge_positions(keys, n, a, b):
+    """
+    Returns the CSR positions of the edges (a, b) (see weighted_csr) and whether each of them exists
+    """
+    query = a * n + b
+    positions = np.minimum(np.searchsorted(keys, query), len(keys) - 1)
+    return positions, keys[positions] == query
 
-        # merge if pendant node has positive-degree
-        if len(neighbors) == 1:
-            neighbor = neighbors[0]
-            if G[node][neighbor]['weight'] > 0:
-                shrink_dict[node] = neighbor
-            continue
-    
-        count_of_ones = 0
-        count_of_not_one = 0
-        not_one_neighbour = -1
 
-        for neighbour in neighbors:
-            if lcc_dict[neighbour] == 1:
-                count_of_ones += 1
-            else:
-                count_of_not_one += 1
-                not_one_neighbour = neighbour
-
-        # only merge iff node and its neighbors form a pendant clique with only positive internal edges
-        if count_of_ones == len(neighbors) - 1 and count_of_not_one == 1 and lcc_dict[node] == 1:
-            all_positive_weights = all(G[i][j]['weight'] > 0 for i in neighbors for j in neighbors if i != j) and \
-                            all(G.edges[(node, i)]['weight'] > 0 for i in neighbors)
-            if all_positive_weights:
-                shrink_dict[node] = not_one_neighbour
-        if node not in shrink_dict:
-            shrink_dict[node] = node
+def complete_neighborhoods(indptr, indices, keys):
+    """
+    Returns for every node whether its neighbors are pairwise adjacent, the triangle count against the number of
+    neighbor pairs. Such a node has neighbors of at least its own degree, and only the neighbor pairs of these
+    candidates are looked up in the edge keys: that is bounded by the sum over the edges of the smaller degree,
+    whereas A.A counts the paths through the hubs as well
+    """
+    n = len(indptr) - 1
+    degrees = np.diff(indptr)
+    min_neighbor_degree = np.full(n, np.iinfo(np.int64).max)
+    has_neighbors = degrees > 0
+    if has_neighbors.any():
+        min_neighbor_degree[has_neighbors] = np.minimum.reduceat(degrees[indices], indptr[:-1][has_neighbors])
+    candidates = np.flatnonzero(min_neighbor_degree >= degrees)
+    triangles = np.zeros(len(candidates), dtype=np.int64)
+    for owner, a, b in neighbor_pairs(indptr, indices, candidates):
+        triangles += np.bincount(owner[edge_positions(keys, n, a, b)[1]], minlength=len(candidates))
+    complete = np.zeros(n, dtype=bool)
+    complete[candidates] = triangles == degrees[candidates] * (degrees[candidates] - 1) // 2
+    return complete
+
+
+def clique_filtering(G):
+    """
+    Returns G' which is a clique reduction on the input graph G: a pendant node with a positive edge is merged into
+    its neighbor, and a node whose neighbors, apart from one, form a clique with it (local clustering coefficient 1,
+    see get_local_clustering_coefficient) with only positive edges is merged into that one neighbor
+    """
+    nodes, indptr, indices, keys, weights, loop_weights = weighted_csr(G)
+    n = len(nodes)
+    degrees = np.diff(indptr)
+    loops = ~np.isnan(loop_weights)
+    # networkx counts a node with a self-loop among its own neighbors
+    num_neighbors = degrees + loops
+    complete = complete_neighborhoods(indptr, indices, keys)
+    # a self-loop adds the node and its edges to its neighbors' pairs, which are all adjacent
+    lcc_one = complete & (num_neighbors >= 2)
+    row = np.repeat(np.arange(n), degrees)
+    shrink = np.arange(n)
+
+    # merge if pendant node has positive-degree
+    pendant = np.flatnonzero((num_neighbors == 1) & (degrees == 1))
+    positive = weights[indptr[pendant]] > 0
+    shrink[pendant[positive]] = indices[indptr[pendant[positive]]]
+
+    # only merge iff node and its neighbors form a pendant clique with only positive internal edges
+    not_one = ~lcc_one[indices]
+    count_of_not_one = np.bincount(row[not_one], minlength=n)
+    clique = np.flatnonzero(lcc_one & (count_of_not_one == 1))
+    nonpositive = np.bincount(row[weights <= 0], minlength=n)[clique] + (loop_weights[clique] <= 0)
+    for owner, a, b in neighbor_pairs(indptr, indices, clique):
+        nonpositive += np.bincount(owner[weights[edge_positions(keys, n, a, b)[0]] <= 0], minlength=len(clique))
+    clique = clique[nonpositive == 0]
+    entries = np.flatnonzero(not_one & np.isin(row, clique))
+    shrink[row[entries]] = indices[entries]
 
     G_prime = G.copy()
-    for key in shrink_dict:
-        supernode = shrink_dict[key]
-        if key != supernode:
-            if supernode not in G_prime:
-                continue
-
-            G_prime.nodes[supernode]['super node of'].extend(G_prime.nodes[key].get('super node of', []))
-            
-            edges_to_del = list(G_prime.edges(key))
-            total_weight = 0
-            for edge in edges_to_del:
-                total_weight += G_prime.edges[edge]['weight']
-            
-            if G_prime.has_edge(supernode, supernode):
-                G_prime.edges[(supernode, supernode)]['weight'] += total_weight
-                G_prime.edges[(supernode, supernode)]['constrained_weight'] = False
-            else:
-                G_prime.add_edge(supernode, supernode, weight=total_weight, constrained_weight=False)
+    for k in np.flatnonzero(shrink != np.arange(n)):
+        key, supernode = nodes[k], nodes[shrink[k]]
+        if supernode not in G_prime:
+            continue
 
-            G_prime.remove_node(key)
+        G_prime.nodes[supernode]['super node of'].extend(G_prime.nodes[key].get('super node of', []))
+        
+        edges_to_del = list(G_prime.edges(key))
+        total_weight = 0
+        for edge in edges_to_del:
+            total_weight += G_prime.edges[edge]['weight']
+        
+        if G_prime.has_edge(supernode, supernode):
+            G_prime.edges[(supernode, supernode)]['weight'] += total_weight
+            G_prime.edges[(supernode, supernode)]['constrained_weight'] = False
+        else:
+            G_prime.add_edge(supernode, supernode, weight=total_weight, constrained_weight=False)
+
+        G_prime.remove_node(key)
 
     G_prime = nx.convert_node_labels_to_integers(G_prime, first_label=0)
     return G_prime
 
-def find_list_of_cut_triads(G):
+def find_list_of_cut_triads(G, method="csr", n_jobs=-1, chunk_size=None):
+    """
+    Returns the list of cut triads [i, j, k] (sorted) where k is in the minimum separating set of the pair i, j.
+    method="csr" uses the batched separator engine of troika.separators, method="networkx" runs
+    minimum_st_node_cut once per pair (the reference implementation)
+    """
+    if method == "csr":
+        return find_cut_triads_csr(G, n_jobs=n_jobs, chunk_size=chunk_size).tolist()
     list_of_cut_triads = []
 
     pairs = set(combinations(np.sort(list((G).nodes())), 2))
@@ -196,19 +285,15 @@ def model_to_communities(var_vals, graph):
     """
     communities = []
     visited = set()
+    n = num_pair_nodes(len(var_vals))
 
     def dfs(node, community):
         visited.add(node)
         community.add(node)
         for neighbor in graph.neighbors(node):
-            if neighbor not in visited:
-                edge_key = (str(node)+','+str(neighbor)) \
-                    if (str(node)+','+str(neighbor)) in var_vals \
-                    else (str(neighbor)+','+str(node)) 
-                if edge_key in var_vals:
-                    var = var_vals[edge_key]
-                    if var < 0.5:
-                        dfs(neighbor, community)
+            if neighbor not in visited and neighbor != node and max(node, neighbor) < n:
+                if var_vals[pair_index(min(node, neighbor), max(node, neighbor), n)] < 0.5:
+                    dfs(neighbor, community)
 
     for node in sorted(graph.nodes()):
         if node not in visited:
@@ -255,10 +340,11 @@ def post_processing(var_vals, Graph):
     '''
     The processing step to ammend the results of the RP*(G) formulation
     '''
+    n = num_pair_nodes(len(var_vals))
     G_new = defaultdict(set)
     for (i, j) in Graph.edges():
         i, j = tuple(sorted((i, j)))
-        if var_vals.get(str(i) + ',' + str(j)) == 0 and Graph[i][j]['weight'] > 0:
+        if i != j and j < n and var_vals[pair_index(i, j, n)] == 0 and Graph[i][j]['weight'] > 0:
             G_new[i].add(j)
             G_new[j].add(i)
 
@@ -276,53 +362,249 @@ def post_processing(var_vals, Graph):
             dfs(G_new, node, component)
             components.append(component)
             visited.update(component)
-    var_vals_pp = {}
-    for key in var_vals.keys():
-        var_vals_pp[key] = 1.0
+    var_vals_pp = np.ones(len(var_vals))
     OFV = 0.0
     for c in components:
-        c = list(np.sort(list(c)))
-        for i in range(len(c)):
-            for j in range(i + 1, len(c)):
-                node_i = c[i]
-                node_j = c[j]
-                var_vals_pp[str(node_i) + ',' + str(node_j)] = 0.0
-                if Graph.has_edge(node_i, node_j):
-                    OFV += Graph[node_i][node_j]['weight']
+        c = np.sort(list(c))
+        first, second = np.triu_indices(len(c), k=1)
+        var_vals_pp[pair_index(c[first], c[second], n)] = 0.0
+        for node_i, node_j in zip(c[first].tolist(), c[second].tolist()):
+            if Graph.has_edge(node_i, node_j):
+                OFV += Graph[node_i][node_j]['weight']
     return OFV, var_vals_pp
 
 
-def lp_formulation(Graph, list_of_cut_triads, lp_method, warmstart=int(0), branching_priotiy=int(0)):
+def pair_index(i, j, n):
     """
-    Method to create the LP model and run it for the root node
+    Returns the index of the variable x_ij (i < j) of a graph with n nodes, i.e. its position in the row-major
+    order of the upper triangle in which lp_formulation creates the variables. Works on numpy arrays as well
     """
-    formulation_time_start = time.time()
+    return i * (2 * n - i - 1) // 2 + j - i - 1
 
-    x = {}
-    model = Model("Clique Partitioning")
-    model.setParam(GRB.param.OutputFlag, 0)
-    model.setParam(GRB.param.Method, lp_method)
-    model.setParam(GRB.Param.Crossover, 0)
-    model.setParam(GRB.Param.Threads, min(64, multiprocessing.cpu_count()))
 
-    for i in range(Graph.number_of_nodes()):
-        for j in range(i + 1, Graph.number_of_nodes()):
-            x[(i, j)] = model.addVar(lb=0, ub=1, vtype=GRB.CONTINUOUS, name=str(i) + ',' + str(j))
+def num_pair_nodes(num_pairs):
+    """
+    Returns the number of nodes n of a solution vector with num_pairs = n(n-1)/2 entries
+    """
+    return int(round((1 + np.sqrt(1 + 8 * num_pairs)) / 2))
+
+
+def solution_vector(model):
+    """
+    Returns the values of the model's variables as a float array indexed by pair_index
+    """
+    return model.solution()
+
+
+def lp_objective_value(model):
+    """
+    Returns the objective value of the current solution of model on the CP objective, i.e. with the weights of the
+    self-loops (constant in every partition) added, or None if there is no solution
+    """
+    if not model.has_solution():
+        return None
+    return np.round(model.objective_value() + model.loop_weight, 8)
+
+
+def set_variable_bounds(model, fixed_ones, fixed_zeros, one_bound, zero_bound):
+    """
+    Sets the lower bound of the variables in fixed_ones and the upper bound of those in fixed_zeros (pair indices).
+    The changes are applied by the next optimize
+    """
+    if len(fixed_ones):
+        model.set_bounds(fixed_ones, lower=one_bound)
+    if len(fixed_zeros):
+        model.set_bounds(fixed_zeros, upper=zero_bound)
+
+
+def triangle_constraint_rows(Graph, list_of_cut_triads):
+    """
+    Returns the triangle constraints of the cut triads as three arrays of variable indices (p, q, r),
+    one entry per constraint x_p + x_q >= x_r. These are the same constraints lp_formulation adds eagerly:
+    a constraint is only needed if one of the two pairs on its left-hand side is a positive edge
+    """
+    n = Graph.number_of_nodes()
+    positive = np.zeros((n, n), dtype=bool)
+    for u, v, w in Graph.edges(data='weight'):
+        if w > 0:
+            positive[u, v] = positive[v, u] = True
+    triads = np.array(list_of_cut_triads, dtype=np.int64).reshape(-1, 3)
+    i, j, k = triads[:, 0], triads[:, 1], triads[:, 2]
+    ij, ik, jk = pair_index(i, j, n), pair_index(i, k, n), pair_index(j, k, n)
+    needed_1 = positive[i, k] | positive[j, k]
+    needed_2 = positive[j, k] | positive[i, j]
+    needed_3 = positive[i, j] | positive[i, k]
+    p = np.concatenate((ik[needed_1], jk[needed_2], ij[needed_3]))
+    q = np.concatenate((jk[needed_1], ij[needed_2], ik[needed_3]))
+    r = np.concatenate((ij[needed_1], ik[needed_2], jk[needed_3]))
+    return p, q, r
+
+
+def triangle_constraint_matrix(p, q, r, num_vars):
+    """
+    Returns the sparse matrix A of the triangle constraints x_p + x_q - x_r >= 0, i.e. A x >= 0
+    """
+    m = len(p)
+    # every row has exactly three entries, so the CSR arrays can be written down without a COO conversion
+    indptr = np.arange(0, 3 * m + 1, 3, dtype=np.int64)
+    indices = np.column_stack((p, q, r)).astype(np.int32).ravel()
+    data = np.tile(np.array([1.0, 1.0, -1.0]), m)
+    return sp.csr_matrix((data, indices, indptr), shape=(m, num_vars))
+
+
+def init_lazy_triangles(model, Graph, list_of_cut_triads, batch_size=None, max_age=None):
+    """
+    Prepares model for separation-based (lazy) triangle constraints: the candidate rows are kept as index
+    arrays on the model, and only the seed rows, i.e. the ones most violated by the LP optimum without
+    triangle constraints (x_ij = 0 on positive edges and 1 elsewhere), are added
+    """
+    p, q, r = triangle_constraint_rows(Graph, list_of_cut_triads)
+    n = Graph.number_of_nodes()
+    if batch_size is None:
+        batch_size = max(100, n * (n - 1) // 2)
+    model._lazy_triangles = {
+        "p": p,
+        "q": q,
+        "r": r,
+        "active": np.zeros(len(p), dtype=bool),
+        "removed": np.zeros(len(p), dtype=bool),
+        "age": np.zeros(len(p), dtype=np.int64),
+        "constrs": {},
+        "batch_size": batch_size,
+        "max_age": max_age,
+    }
+    unconstrained_x = np.ones(n * (n - 1) // 2)
+    for u, v, w in Graph.edges(data='weight'):
+        if u != v and w > 0:
+            unconstrained_x[pair_index(min(u, v), max(u, v), n)] = 0
+    separate_triangle_rows(model, unconstrained_x)
+
+
+def separate_triangle_rows(model, x_values, tolerance=1e-6):
+    """
+    Adds the (at most batch_size) most violated candidate triangle rows that are not in the model yet.
+    Rows that stayed slack for max_age consecutive rounds are removed from the model in the same round; a row is
+    removed at most once, so the separation cannot cycle. Returns the number of rows added
+    """
+    lazy = model._lazy_triangles
+    p, q, r, active = lazy["p"], lazy["q"], lazy["r"], lazy["active"]
+    slack = x_values[p] + x_values[q] - x_values[r]
+    violated = np.flatnonzero(~active & (slack < -tolerance))
+    if len(violated) == 0:
+        # leave the model untouched so that its current solution stays available
+        return 0
+    if len(violated) > lazy["batch_size"]:
+        violated = violated[np.argsort(slack[violated], kind="stable")[:lazy["batch_size"]]]
+
+    if lazy["max_age"] is not None:
+        rows = np.flatnonzero(active)
+        lazy["age"][rows] = np.where(slack[rows] > tolerance, lazy["age"][rows] + 1, 0)
+        retire = rows[(lazy["age"][rows] >= lazy["max_age"]) & ~lazy["removed"][rows]]
+        if len(retire):
+            model.remove_rows([lazy["constrs"].pop(row) for row in retire.tolist()])
+        active[retire] = False
+        lazy["removed"][retire] = True
+
+    rows = triangle_constraint_matrix(p[violated], q[violated], r[violated], model.num_vars)
+    constrs = model.add_rows(rows, '>', np.zeros(len(violated)))
+    lazy["constrs"].update(zip(violated.tolist(), constrs))
+    active[violated] = True
+    lazy["age"][violated] = 0
     model.update()
+    return len(violated)
 
-    OFV = sum(Graph[i][j]['weight'] * (1 - x[tuple(sorted((i, j)))]) for i, j in Graph.edges() if (i, j) in x or (j, i) in x)
-    model.setObjective(OFV, GRB.MAXIMIZE)
 
-    for [i, j, k] in list_of_cut_triads:
-        if (Graph.has_edge(i, k) and Graph[i][k]['weight'] > 0) or (Graph.has_edge(j, k) and Graph[j][k]['weight'] > 0):
-            model.addConstr(x[(i, k)] + x[(j, k)] >= x[(i, j)], 'triangle1' + ',' + str(i) + ',' + str(j) + ',' + str(k))
-        if (Graph.has_edge(j, k) and Graph[j][k]['weight'] > 0) or (Graph.has_edge(i, j) and Graph[i][j]['weight'] > 0):
-            model.addConstr(x[(j, k)] + x[(i, j)] >= x[(i, k)], 'triangle2' + ',' + str(i) + ',' + str(j) + ',' + str(k))
-        if (Graph.has_edge(i, j) and Graph[i][j]['weight'] > 0) or (Graph.has_edge(i, k) and Graph[i][k]['weight'] > 0):
-            model.addConstr(x[(i, j)] + x[(i, k)] >= x[(j, k)], 'triangle3' + ',' + str(i) + ',' + str(j) + ',' + str(k))
+def optimize_with_separation(model):
+    """
+    Optimizes model; if it uses lazy triangle constraints, violated rows are added and the LP re-solved
+    until the solution satisfies every candidate row, which makes the bound the one of the full formulation
+    """
+    model.optimize()
+    if getattr(model, "_lazy_triangles", None) is None:
+        return
+    while model.is_optimal():
+        if separate_triangle_rows(model, solution_vector(model)) == 0:
+            return
+        model.optimize()
+
+
+def build_lp_model(Graph, list_of_cut_triads, lp_method, lazy=False, lazy_batch_size=None, lazy_max_age=None,
+                   matrix=True, names=False, solver="gurobi"):
+    """
+    Builds the LP relaxation of the RP*(G) formulation and returns it with the seconds taken to build it.
+    The model is an LPModel of the given solver (see troika.solvers): "gurobi" or "highs" (SciPy's HiGHS, no
+    license needed).
+    With lazy=True the triangle constraints are generated by separation (see init_lazy_triangles) instead of
+    being added for every cut triad up front; the model then separates in every later solve as well.
+    With matrix=True the objective vector and the triangle constraint matrix are assembled with numpy/scipy and
+    loaded in bulk; matrix=False builds a Gurobi model one variable and one constraint at a time.
+    The variables are created in pair_index order; names=True also names them "i,j" (and, without matrix, the
+    triangle constraints) in a Gurobi model
+    """
+    formulation_time_start = time.time()
+    if solver not in SOLVERS:
+        raise ValueError(f"solver must be one of {tuple(SOLVERS)}, got {solver!r}")
+    if not matrix and solver != "gurobi":
+        raise ValueError("only the Gurobi model can be built one constraint at a time")
+
+    n = Graph.number_of_nodes()
+    if matrix:
+        first, second = np.triu_indices(n, k=1)
+        var_names = [f"{i},{j}" for i, j in zip(first.tolist(), second.tolist())] if names else ""
+
+        # sum over edges of w_ij * (1 - x_ij) = sum of the weights - w . x
+        weights = np.zeros(len(first))
+        total_weight = 0.0
+        for i, j, w in Graph.edges(data='weight'):
+            if i != j:
+                weights[pair_index(min(i, j), max(i, j), n)] = w
+                total_weight += w
+        model = SOLVERS[solver](len(first), -weights, total_weight, lp_method, names=var_names)
+
+        if not lazy:
+            p, q, r = triangle_constraint_rows(Graph, list_of_cut_triads)
+            model.add_rows(triangle_constraint_matrix(p, q, r, len(first)), '>', np.zeros(len(p)))
+    else:
+        model = gurobi_model(lp_method)
+        x = {}
+        for i in range(n):
+            for j in range(i + 1, n):
+                x[(i, j)] = model.addVar(lb=0, ub=1, vtype=GRB.CONTINUOUS, name=str(i) + ',' + str(j) if names else "")
+        model.update()
+
+        OFV = sum(Graph[i][j]['weight'] * (1 - x[tuple(sorted((i, j)))]) for i, j in Graph.edges() if (i, j) in x or (j, i) in x)
+        model.setObjective(OFV, GRB.MAXIMIZE)
+
+        for [i, j, k] in ([] if lazy else list_of_cut_triads):
+            suffix = ',' + str(i) + ',' + str(j) + ',' + str(k)
+            if (Graph.has_edge(i, k) and Graph[i][k]['weight'] > 0) or (Graph.has_edge(j, k) and Graph[j][k]['weight'] > 0):
+                model.addConstr(x[(i, k)] + x[(j, k)] >= x[(i, j)], 'triangle1' + suffix if names else "")
+            if (Graph.has_edge(j, k) and Graph[j][k]['weight'] > 0) or (Graph.has_edge(i, j) and Graph[i][j]['weight'] > 0):
+                model.addConstr(x[(j, k)] + x[(i, j)] >= x[(i, k)], 'triangle2' + suffix if names else "")
+            if (Graph.has_edge(i, j) and Graph[i][j]['weight'] > 0) or (Graph.has_edge(i, k) and Graph[i][k]['weight'] > 0):
+                model.addConstr(x[(i, j)] + x[(i, k)] >= x[(j, k)], 'triangle3' + suffix if names else "")
+        model = GurobiLP.from_model(model)
 
-    formulation_time = time.time() - formulation_time_start
     model.update()
+    model.loop_weight = sum(w for u, v, w in Graph.edges(data='weight') if u == v)
+    if lazy:
+        init_lazy_triangles(model, Graph, list_of_cut_triads, lazy_batch_size, lazy_max_age)
+    formulation_time = time.time() - formulation_time_start
+    return model, formulation_time
+
+
+def lp_formulation(Graph, list_of_cut_triads, lp_method, warmstart=int(0), branching_priotiy=int(0), root_lp=None,
+                   lazy=False, lazy_batch_size=None, lazy_max_age=None, matrix=True, names=False, solver="gurobi"):
+    """
+    Method to create the LP model and run it for the root node.
+    root_lp is a cached root LP (see root_lp_arrays) of this same model; if given, the model is built but not
+    solved, and the cached solution and basis are used instead.
+    The remaining keyword arguments are passed to build_lp_model; warmstart and branching_priotiy need a Gurobi model.
+    The solution is returned as an array indexed by pair_index
+    """
+    model, formulation_time = build_lp_model(Graph, list_of_cut_triads, lp_method, lazy, lazy_batch_size,
+                                             lazy_max_age, matrix, names, solver)
+    n = Graph.number_of_nodes()
 
     # Using a warm start
     # A known partition can be used as a starting point to "warm-start" the algorithm.
@@ -332,12 +614,13 @@ def lp_formulation(Graph, list_of_cut_triads, lp_method, warmstart=int(0), branc
         # Solution from Combo algorithm to be used as warm-start
         partition = pycombo.execute(Graph, weight="weight", treat_as_modularity=True)
         community_combo = convert_to_com_list(partition[0])
+        variables = model.model.getVars()
         for i in (Graph).nodes():
             for j in filter(lambda x: x > i, (Graph).nodes()):
                 if find_in_list_of_list(community_combo, i) == find_in_list_of_list(community_combo, j):
-                    x[(i, j)].start = 0
+                    variables[pair_index(i, j, n)].start = 0
                 else:
-                    x[(i, j)].start = 1
+                    variables[pair_index(i, j, n)].start = 1
     # branching priority is based on total degrees of pairs of nodes
     if branching_priotiy == 1:
         neighbors = {}
@@ -347,95 +630,97 @@ def lp_formulation(Graph, list_of_cut_triads, lp_method, warmstart=int(0), branc
                 neighbors[i] = list((Graph)[i])
                 neighbors[j] = list((Graph)[j])
                 Degree.append(len(neighbors[i]) + len(neighbors[j]))
-        model.setAttr('BranchPriority', model.getVars()[:], Degree)
+        model.model.setAttr('BranchPriority', model.model.getVars()[:], Degree)
         model.update()
 
+    if root_lp is not None:
+        if "root_vbasis" in root_lp:
+            # children start from the cached optimal basis
+            model.set_basis(root_lp["root_vbasis"], root_lp["root_cbasis"])
+        return float(root_lp["root_objective"]), root_lp["root_x"].copy(), model, formulation_time, 0.0
+ 
     start_time = time.time()
-    model.optimize()
+    optimize_with_separation(model)
     solveTime = (time.time() - start_time)
-    obj = model.getObjective()
 
-    objective_value = np.round(obj.getValue() + sum(data['weight'] for u, v, data in Graph.edges(data=True) if u == v), 8)
+    return lp_objective_value(model), solution_vector(model), model, formulation_time, solveTime
 
-    var_vals = {}
-    for var in model.getVars():
-        var_vals[var.varName] = var.x
 
-    return objective_value, var_vals, model, formulation_time, solveTime
+def root_lp_arrays(model, objective_value):
+    """
+    Returns the solved root LP as arrays for the preprocessing cache: objective value, solution and reduced costs
+    in variable order, plus the optimal basis when the LP method left one (barrier without crossover and HiGHS do not)
+    """
+    arrays = {
+        "root_objective": np.float64(objective_value),
+        "root_x": solution_vector(model),
+        "root_rc": model.reduced_costs(),
+    }
+    basis = model.basis()
+    if basis is not None:
+        arrays["root_vbasis"], arrays["root_cbasis"] = basis
+    return arrays
 
 
 def run_ip(model, Graph, fixed_ones, fixed_zeros):
     """
-    Run the IP based on model and the original Graph as input, this should only be used when there are no violating triples
+    Run the IP based on model and the original Graph as input, this should only be used when there are no violating triples.
+    fixed_ones and fixed_zeros are pair indices; returns (-1, None, model) if there is no solution.
+    The variables are made continuous again afterwards, the model is shared with the LPs of the other nodes
     """
-    for var_name in fixed_ones:
-        var = model.getVarByName(var_name)
-        var.setAttr("LB", 1.0)
-    model.update()
-    for var_name in fixed_zeros:
-        var = model.getVarByName(var_name)
-        var.setAttr("UB", 0.0)
-    model.update()
-    for var in model.getVars():
-        var.setAttr(GRB.Attr.VType, GRB.BINARY)
-    model.update()
+    set_variable_bounds(model, fixed_ones, fixed_zeros, 1.0, 0.0)
+    model.set_integral(True)
 
-    obj = model.getObjective()
-    try:
-        obj_val = obj.getValue()
-    except AttributeError as error:
-        return -1, -1, model
+    optimize_with_separation(model)
 
-    objective_value = np.round(obj.getValue() + sum(data['weight'] for u, v, data in Graph.edges(data=True) if u == v), 8)
-
-    var_vals = {}
-    for var in model.getVars():
-        var_vals[var.varName] = var.X
-    return objective_value, var_vals, model
+    obj_val = lp_objective_value(model)
+    if obj_val is not None:
+        # MIP solutions are integral up to the integrality tolerance
+        var_vals = np.round(solution_vector(model))
+    model.set_integral(False)
+    if obj_val is None:
+        return -1, None, model
+    return obj_val, var_vals, model
 
 
 def run_lp(model, Graph, fixed_ones, fixed_zeros):
     """
-    Run the LP based on model and the original Graph as input
+    Run the LP based on model and the original Graph as input.
+    fixed_ones and fixed_zeros are pair indices; returns (-1, None, model) if the LP has no solution
     """
-    for var_name in fixed_ones:
-        var = model.getVarByName(var_name)
-        var.setAttr("LB", 1.0)
-    model.update()
-    for var_name in fixed_zeros:
-        var = model.getVarByName(var_name)
-        var.setAttr("UB", 0.0)
-    model.update()
+    set_variable_bounds(model, fixed_ones, fixed_zeros, 1.0, 0.0)
 
-    model.optimize()
+    optimize_with_separation(model)
 
-    obj = model.getObjective()
-    try:
-        obj_val = obj.getValue()
-    except AttributeError as error:
-        return -1, -1, model
+    obj_val = lp_objective_value(model)
+    if obj_val is None:
+        return -1, None, model
+    return obj_val, solution_vector(model), model
 
-    objective_value = np.round(obj.getValue() + sum(data['weight'] for u, v, data in Graph.edges(data=True) if u == v), 8)
 
-    var_vals = {}
-    for var in model.getVars():
-        var_vals[var.varName] = var.x
-
-    return objective_value, var_vals, model
+def add_time(stats, name, start):
+    """
+    Adds the seconds since start to stats[name], if stats is given
+    """
+    if stats is not None:
+        stats[name] = stats.get(name, 0.0) + time.time() - start
 
 
-def run_combo(graph, original_graph, isolated_nodes, timeout=3):
+def run_combo(graph, original_graph, isolated_nodes, timeout=3, stats=None, separate=None):
     """
-    Runs combo algorithm on input graph
+    Runs combo algorithm on input graph. separate is the start_separate mode to run Combo in; without it the
+    module's start_separate is used, which the first run settles. Timeouts and the time spent are counted in stats
     """
     global start_separate
+    start = time.time()
+    mode = start_separate if separate is None else separate
 
     # Function to execute pycombo with a specified start_separate value
     def execute_pycombo(ss):
         return pycombo.execute(graph, weight='weight', treat_as_modularity=True, start_separate=ss)
     
     # first execution
-    if start_separate is None:
+    if mode is None:
         partition_combo = execute_pycombo(ss=False)
         communities_combo = convert_to_com_list(partition_combo[0])
         decluster_combo = decluster_communities(communities_combo, graph, isolated_nodes)
@@ -456,7 +741,7 @@ def run_combo(graph, original_graph, isolated_nodes, timeout=3):
                 start_separate = True if lower_bound == 0 else False
 
     # if first execution timed out
-    elif start_separate is False:
+    elif mode is False:
         partition_combo = execute_pycombo(ss=False)
         communities_combo = convert_to_com_list(partition_combo[0])
         decluster_combo = decluster_communities(communities_combo, graph, isolated_nodes)
@@ -472,8 +757,10 @@ def run_combo(graph, original_graph, isolated_nodes, timeout=3):
                 decluster_combo = decluster_communities(communities_combo, graph, isolated_nodes)
                 lower_bound = calculate_objective_value(decluster_combo, original_graph)
             except TimeoutError:
-                print("Timeout occurred during PyCombo execution with start_separate=True")
-    
+                if stats is not None:
+                    stats["combo_timeouts"] = stats.get("combo_timeouts", 0) + 1
+
+    add_time(stats, "combo_time", start)
     return lower_bound, decluster_combo
 
 
@@ -481,30 +768,86 @@ def reset_model_variables(model, fixed_ones, fixed_zeros):
     """
     Reset fixed variables of the LP model
     """
-    for var_name in fixed_ones:
-        var = model.getVarByName(var_name)
-        var.setAttr("LB", 0.0)
-    model.update()
-    for var_name in fixed_zeros:
-        var = model.getVarByName(var_name)
-        var.setAttr("UB", 1.0)
-    model.update()
+    set_variable_bounds(model, fixed_ones, fixed_zeros, 0.0, 1.0)
     return model
 
 
 # In[12]:
 
+class PartitionObjective:
+    """
+    The CP objective of partitions of a fixed graph given as label arrays: labels[k] is the community of nodes[k].
+    The edges are kept as arrays, so a partition is evaluated in O(m) numpy work, and as a symmetric sparse weight
+    matrix, from which the change of the objective when one node moves is read off its row in O(degree)
+    """
+
+    def __init__(self, Graph):
+        self.nodes = list(Graph.nodes())
+        self.index = {node: k for k, node in enumerate(self.nodes)}
+        n = len(self.nodes)
+        edges = [(self.index[u], self.index[v], w) for u, v, w in Graph.edges(data='weight')]
+        u = np.array([e[0] for e in edges], dtype=np.int64)
+        v = np.array([e[1] for e in edges], dtype=np.int64)
+        w = np.array([e[2] for e in edges], dtype=np.float64)
+        loops = u == v
+        # a self-loop is inside every partition
+        self.loop_weight = w[loops].sum()
+        self.u, self.v, self.w = u[~loops], v[~loops], w[~loops]
+        self.weights = sp.csr_matrix((np.concatenate((self.w, self.w)),
+                                      (np.concatenate((self.u, self.v)), np.concatenate((self.v, self.u)))),
+                                     shape=(n, n))
+
+    def labels(self, communities):
+        """
+        Returns the label array of a list of communities; nodes in none of them are labelled as singletons and nodes
+        not in the graph are ignored
+        """
+        labels = np.arange(len(self.nodes)) + len(communities)
+        for label, community in enumerate(communities):
+            labels[[self.index[node] for node in community if node in self.index]] = label
+        return labels
+
+    def communities(self, labels):
+        """
+        Inverse of labels: returns the sorted communities of a label array
+        """
+        order = np.argsort(labels, kind="stable")
+        groups = np.split(order, np.flatnonzero(np.diff(labels[order])) + 1)
+        return sorted(sorted(self.nodes[k] for k in group) for group in groups)
+
+    def value(self, labels):
+        """
+        Returns the objective value of the partition labels, rounded as calculate_objective_value
+        """
+        return np.round(self.loop_weight + self.w[labels[self.u] == labels[self.v]].sum(), 8)
+
+    def move_delta(self, labels, k, label):
+        """
+        Returns the change of the objective value when nodes[k] moves from its community to community label
+        """
+        if label == labels[k]:
+            return 0.0
+        start, end = self.weights.indptr[k], self.weights.indptr[k + 1]
+        neighbor_labels = labels[self.weights.indices[start:end]]
+        weights = self.weights.data[start:end]
+        return weights[neighbor_labels == label].sum() - weights[neighbor_labels == labels[k]].sum()
+
+
+def partition_objective(Graph):
+    """
+    Returns the PartitionObjective of Graph, the one cached in Graph.graph["objective"] if there is one. alg caches
+    it on its copy of the input graph, which is not changed during the search
+    """
+    objective = Graph.graph.get("objective")
+    return objective if objective is not None else PartitionObjective(Graph)
+
+
 def calculate_objective_value(communities, Graph):
     """
     Computes the CP problem objective value through list of clusters, and returns it
     """
-    OFV = 0
-    for community in communities:
-        for i in range(len(community)):
-            for j in range(i, len(community)):
-                if Graph.has_edge(community[i], community[j]):
-                    OFV += Graph[community[i]][community[j]]['weight']    
-    return np.round(OFV, 8)
+    objective = partition_objective(Graph)
+    return objective.value(objective.labels(communities))
 
 
 def calculate_model_objective_value(var_vals, Graph):
@@ -514,53 +857,124 @@ def calculate_model_objective_value(var_vals, Graph):
     """
     weights_matrix = nx.adjacency_matrix(Graph, weight='weight').astype(float)
     decision_vars_matrix = np.zeros_like(weights_matrix.toarray())
-    for var_name, value in var_vals.items():
-        i, j = var_name.split(',')
-        i, j = int(i), int(j)
-        value = 0 if value == 1 else 1
-        decision_vars_matrix[i, j] = value
-        decision_vars_matrix[j, i] = value
+    first, second = np.triu_indices(num_pair_nodes(len(var_vals)), k=1)
+    values = np.where(var_vals == 1, 0, 1)
+    decision_vars_matrix[first, second] = values
+    decision_vars_matrix[second, first] = values
     hadamard_product = np.multiply(weights_matrix.toarray(), decision_vars_matrix)
     return np.round(np.sum(hadamard_product) / 2, 8)
     
 
-def find_violating_triples(G, var_vals, list_of_cut_triads):
+# the x values below which lp_rounding puts the two nodes of a pair into the same cluster
+ROUNDING_THRESHOLDS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9)
+# number of edges of the materialized graphs of open nodes that a search keeps, see GraphCache
+GRAPH_CACHE_EDGES = 1 << 18
+
+
+def rounding_arrays(Graph, original_graph, isolated_nodes):
     """
-    Returns a dictionary whose key is a violated constraint and value is the sum, 
-    triples with high count of positive edge weights are heavily prioritized
-    """
-    t_3, t_2, t_1, t_0 = {}, {}, {}, {}
-    for [i, j, k] in list_of_cut_triads:
-        triple_sum = var_vals[str(i) + "," + str(j)] + var_vals[str(j) + "," + str(k)] + var_vals[str(i) + "," + str(k)]
-        if 0 < triple_sum < 2:
-            num_positive_edges = 0
-            if G.has_edge(i, j) and G[i][j]['weight'] > 0:
-                num_positive_edges += 1
-            if G.has_edge(i, k) and G[i][k]['weight'] > 0:
-                num_positive_edges += 1
-            if G.has_edge(j, k) and G[j][k]['weight'] > 0:
-                num_positive_edges += 1
-            if num_positive_edges == 3:
-                t_3[(i, j, k)] = triple_sum
-            elif num_positive_edges == 2:
-                t_2[(i, j, k)] = triple_sum
-            elif num_positive_edges == 1:
-                t_1[(i, j, k)] = triple_sum
-            else:
-                t_0[(i, j, k)] = triple_sum
-    if len(t_3) > 0:
-        return t_3
-    elif len(t_2) > 0:
-        return t_2
-    elif len(t_1) > 0:
-        return t_1
-    else:
-        return t_0
+    Returns what lp_rounding needs of a tree as a dict of arrays: the nodes (i, j) of every pair index of Graph, the
+    node of Graph of every node of original_graph (isolated nodes get labels of their own) and the
+    PartitionObjective of original_graph
+    """
+    n = Graph.number_of_nodes()
+    first, second = np.triu_indices(n, k=1)
+    objective = partition_objective(original_graph)
+    owner = np.empty(len(objective.nodes), dtype=np.int64)
+    for v in range(n):
+        owner[[objective.index[member] for member in Graph.nodes[v]['super node of']]] = v
+    owner[[objective.index[node] for node in isolated_nodes]] = n + np.arange(len(isolated_nodes))
+    return {"num_nodes": n, "first": first, "second": second, "owner": owner, "num_isolated": len(isolated_nodes),
+            "objective": objective}
+
+
+def lp_rounding(var_vals, rounding, thresholds=ROUNDING_THRESHOLDS):
+    """
+    Rounds the LP solution var_vals to partitions: for every threshold t the clusters are the connected components
+    of the pairs with x < t. Returns the objective value on the original graph and the communities of the best one,
+    rounding is the output of rounding_arrays
+    """
+    first, second, owner = rounding["first"], rounding["second"], rounding["owner"]
+    n = rounding["num_nodes"]
+    objective = rounding["objective"]
+    isolated_labels = n + np.arange(rounding["num_isolated"])
+    best_value, best_labels, previous = None, None, None
+    for t in thresholds:
+        close = var_vals < t
+        adjacency = sp.coo_matrix((np.ones(np.count_nonzero(close)), (first[close], second[close])), shape=(n, n))
+        labels = connected_components(adjacency, directed=False)[1]
+        # consecutive thresholds often give the same components
+        if previous is not None and np.array_equal(labels, previous):
+            continue
+        previous = labels
+        labels = np.concatenate((labels, isolated_labels))[owner]
+        value = objective.value(labels)
+        if best_value is None or value > best_value:
+            best_value, best_labels = value, labels
+    return best_value, objective.communities(best_labels)
 
 
-def get_best_triple(violated_triples_sums, node, orig_g):
+def round_node(node, rounding, stats=None):
+    """
+    Rounds the LP solution of node (see lp_rounding) and makes the result the node's lower bound and communities
+    if it is better than the node's Combo result. Runs and improvements are counted in stats
+    """
+    rounding_start = time.time()
+    lower_bound, communities = lp_rounding(node.var_vals, rounding)
+    improved = lower_bound > node.lower_bound
+    if improved:
+        node.set_bounds(lower_bound, node.upper_bound)
+        node.combo_communities = communities
+    if stats is not None:
+        stats["rounding_runs"] = stats.get("rounding_runs", 0) + 1
+        stats["rounding_improvements"] = stats.get("rounding_improvements", 0) + int(improved)
+        stats["rounding_time"] = stats.get("rounding_time", 0) + time.time() - rounding_start
+    return improved
+
+
+def cut_triad_arrays(Graph, list_of_cut_triads):
+    """
+    Returns the cut triads [i, j, k] (i < j < k) of Graph as a dict of arrays that find_violating_triples scans:
+    the (m, 3) int32 triads, the pair indices of x_ij, x_jk and x_ik, and the number of positive edges of each triad
+    """
+    n = Graph.number_of_nodes()
+    triads = np.asarray(list_of_cut_triads, dtype=np.int32).reshape(-1, 3)
+    positive = np.zeros((n, n), dtype=np.int8)
+    for u, v, w in Graph.edges(data='weight'):
+        if w > 0:
+            positive[u, v] = positive[v, u] = 1
+    i, j, k = (triads[:, c].astype(np.int64) for c in range(3))
+    index_type = np.int32 if n * (n - 1) // 2 <= np.iinfo(np.int32).max else np.int64
+    return {
+        "triads": triads,
+        "ij": pair_index(i, j, n).astype(index_type),
+        "jk": pair_index(j, k, n).astype(index_type),
+        "ik": pair_index(i, k, n).astype(index_type),
+        "num_positive": positive[i, j] + positive[i, k] + positive[j, k],
+    }
+
+
+def find_violating_triples(G, var_vals, cut_triads):
+    """
+    Returns a dictionary whose key is a violated constraint and value is the sum, 
+    triples with high count of positive edge weights are heavily prioritized.
+    cut_triads is the output of cut_triad_arrays; a list of cut triads is converted using the edges of G
     """
-    Returns the constraint with the most in common with the previous nodes constraint
+    if not isinstance(cut_triads, dict):
+        cut_triads = cut_triad_arrays(G, cut_triads)
+    triple_sums = var_vals[cut_triads["ij"]] + var_vals[cut_triads["jk"]] + var_vals[cut_triads["ik"]]
+    violated = (0 < triple_sums) & (triple_sums < 2)
+    for num_positive_edges in (3, 2, 1, 0):
+        bucket = np.flatnonzero(violated & (cut_triads["num_positive"] == num_positive_edges))
+        if len(bucket) > 0:
+            return dict(zip(map(tuple, cut_triads["triads"][bucket].tolist()), triple_sums[bucket].tolist()))
+    return {}
+
+
+def get_best_triple(violated_triples_sums, node, orig_g, graph):
+    """
+    Returns the constraint with the most in common with the previous nodes constraint.
+    graph is the materialized graph of node
     """
 
     num_nodes = len(list(orig_g.nodes()))
@@ -568,36 +982,23 @@ def get_best_triple(violated_triples_sums, node, orig_g):
     violated_triples = list(violated_triples_sums.keys()) if len(violated_triples_sums) <= 100 \
         else random.sample(list(violated_triples_sums.keys()), 100)
     for triple in violated_triples:
-        new_triple = [-1, -1, -1]
-        value_zero = orig_g.nodes[triple[0]]['super node of'][0]
-        value_one = orig_g.nodes[triple[1]]['super node of'][0]
-        value_two = orig_g.nodes[triple[2]]['super node of'][0]
-        for n in node.graph.nodes():
-            # check if any of the values in the triples are a part of the supernode n
-            if value_zero in node.graph.nodes[n]["super node of"]:
-                new_triple[0] = n
-            if value_one in node.graph.nodes[n]["super node of"]:
-                new_triple[1] = n
-            if value_two in node.graph.nodes[n]["super node of"]:
-                new_triple[2] = n
-            if new_triple[0] != -1 and new_triple[1] != -1 and new_triple[2] != -1:
-                break
+        new_triple = node.supernodes[list(triple)].tolist()
         total_score = 0
         for t in range(3):
+            # the pairs (triple[t], i), i > triple[t], are a contiguous range of pair indices
+            first = pair_index(triple[t], triple[t] + 1, num_nodes)
+            last = first + num_nodes - triple[t] - 1
             alpha = 0
-            for i in range(triple[t] + 1, num_nodes):
-                variable = str(triple[t]) + "," + str(i)
-                if variable in node.get_fixed_ones():
-                    alpha += 1
-                if variable in node.get_fixed_zeros():
-                    alpha += 1
+            for fixed in (node.get_fixed_ones(), node.get_fixed_zeros()):
+                alpha += np.searchsorted(fixed, last) - np.searchsorted(fixed, first)
             beta = 0
-            if node.parent is not None:
+            # node may be a detached copy in a worker process (see detached_node), only the root has no constraints
+            if node.constraints:
                 for constr in node.constraints:
                     if triple[t] in constr[:3]:
                         beta += 1
-            delta = node.graph.degree(new_triple[t], weight="weight")
-            score = 1 - np.exp(-alpha) + beta + abs(delta / node.graph.number_of_nodes())
+            delta = graph.degree(new_triple[t], weight="weight")
+            score = 1 - np.exp(-alpha) + beta + abs(delta / graph.number_of_nodes())
             total_score += score
         score_list.append(total_score)
     sum_of_scores = np.sum(score_list)
@@ -610,55 +1011,51 @@ def is_integer_solution(Graph, var_vals):
     """
     Return whether all the varaible values are integer
     """
-    for i in range(len(Graph.nodes())):
-        for j in range(i + 1, len(Graph.nodes())):
-            if var_vals[str(i) + "," + str(j)] != 1 and var_vals[str(i) + "," + str(j)] != 0:
-                return False
-    return True
+    return bool(np.all((var_vals == 0) | (var_vals == 1)))
 
 
-def reduce_triple(G, triple, orig_g):
+def branching_delta(orig_g):
     """
-    Reduces G by creating a supernode for nodes in triple (for left branching).
-    Returns the reduced graph
+    Returns the amount by which branching shifts the weights of constrained edges, the median absolute edge weight
+    of the original graph
     """
-    new_triple = [-1, -1, -1]
-    value_zero = orig_g.nodes[triple[0]]['super node of'][0]
-    value_one = orig_g.nodes[triple[1]]['super node of'][0]
-    value_two = orig_g.nodes[triple[2]]['super node of'][0]
-    for node in G.nodes():
-        if value_zero in G.nodes[node]["super node of"]:
-            new_triple[0] = node
-        if value_one in G.nodes[node]["super node of"]:
-            new_triple[1] = node
-        if value_two in G.nodes[node]["super node of"]:
-            new_triple[2] = node
-    triple = new_triple
-    Graph = G.copy()
+    edge_weights = [abs(orig_g[i][j]['weight']) for i, j in orig_g.edges()]
+    return abs(np.median(edge_weights))
+
+
+def constrained_edges(Graph):
+    """
+    Returns the set of the (u, v), u <= v, edges of Graph whose 'constrained_weight' is set. Branching keeps it up to
+    date in Graph.graph, where a new set replaces the old one, as copies of Graph share it
+    """
+    if "constrained_edges" not in Graph.graph:
+        Graph.graph["constrained_edges"] = {(min(u, v), max(u, v)) for u, v, constrained
+                                            in Graph.edges(data='constrained_weight') if constrained}
+    return Graph.graph["constrained_edges"]
+
+
+def merge_triple(Graph, triple, delta):
+    """
+    Merges the nodes triple of Graph into triple[0], in place, and shifts the weights of the constrained edges by
+    delta. The remaining nodes keep their labels. Only the edges of the triple are touched
+    """
+    constrained = constrained_edges(Graph)
     self_weight = 0
     for u in range(3):
         for v in range(u, 3):
             if Graph.has_edge(triple[u], triple[v]):
                 if 'weight' in Graph.edges[triple[u], triple[v]]:
                     self_weight += Graph.edges[triple[u], triple[v]]["weight"]
-    if Graph.has_edge(triple[0], triple[0]):
-        Graph.edges[triple[0], triple[0]]["weight"] = self_weight
-        curr = Graph.nodes[triple[0]]['super node of']
-        new1 = Graph.nodes[triple[1]]['super node of']
-        new2 = Graph.nodes[triple[2]]['super node of']
-        super_list = list(set(curr + new1 + new2))
-        super_list.sort()
-        Graph.nodes[triple[0]]['super node of'] = super_list
-    else:
+    if not Graph.has_edge(triple[0], triple[0]):
         Graph.add_edge(triple[0], triple[0])
-        Graph.edges[triple[0], triple[0]]["weight"] = self_weight
         Graph.edges[triple[0], triple[0]]['constrained_weight'] = False
-        curr = Graph.nodes[triple[0]]['super node of']
-        new1 = Graph.nodes[triple[1]]['super node of']
-        new2 = Graph.nodes[triple[2]]['super node of']
-        super_list = list(set(curr + new1 + new2))
-        super_list.sort()
-        Graph.nodes[triple[0]]['super node of'] = super_list
+    Graph.edges[triple[0], triple[0]]["weight"] = self_weight
+    curr = Graph.nodes[triple[0]]['super node of']
+    new1 = Graph.nodes[triple[1]]['super node of']
+    new2 = Graph.nodes[triple[2]]['super node of']
+    super_list = list(set(curr + new1 + new2))
+    super_list.sort()
+    Graph.nodes[triple[0]]['super node of'] = super_list
 
     if triple[0] != triple[1]:
         edge_list = list(Graph.edges(triple[1]))
@@ -684,70 +1081,202 @@ def reduce_triple(G, triple, orig_g):
                     Graph.edges[triple[0], edge[1]]['constrained_weight'] = False
         Graph.remove_node(triple[2])
 
-    Graph = nx.convert_node_labels_to_integers(Graph)
-    edge_weights = [abs(orig_g[i][j]['weight']) for i, j in orig_g.edges()]
-    delta = abs(np.median(edge_weights))
-    for i in range(Graph.number_of_nodes()):
-        for j in range(i, Graph.number_of_nodes()):
-            if Graph.has_edge(i, j):
-                if Graph.edges[(i, j)]['constrained_weight']:
-                    Graph.edges[(i, j)]['weight'] = Graph.edges[(i, j)]['weight'] - delta
-    return Graph
+    # the edges created above are not constrained, the constrained ones of the merged nodes are gone
+    constrained = {(u, v) for u, v in constrained if Graph.has_edge(u, v)}
+    Graph.graph["constrained_edges"] = constrained
+    for u, v in constrained:
+        Graph.edges[u, v]['weight'] -= delta
 
 
-def alter_weight(G, triple, orig_g):
+def shift_triple(Graph, triple, delta):
     """
-    Alter the weight associated with nodes in triple by median of all edge weights (for right branching).
-    Returns the reduced graph
+    Shifts the weights of the edges between the nodes triple of Graph by delta, in place. These become the only
+    constrained edges. Only the edges of the triple and the previously constrained edges are touched
     """
-    new_triple = [-1, -1, -1]
-    value_zero = orig_g.nodes[triple[0]]['super node of'][0]
-    value_one = orig_g.nodes[triple[1]]['super node of'][0]
-    value_two = orig_g.nodes[triple[2]]['super node of'][0]
-    for node in G.nodes():
-        if value_zero in G.nodes[node]["super node of"]:
-            new_triple[0] = node
-        if value_one in G.nodes[node]["super node of"]:
-            new_triple[1] = node
-        if value_two in G.nodes[node]["super node of"]:
-            new_triple[2] = node
-    triple = new_triple
-
-    AdjancencyMatrix = nx.adjacency_matrix(G, weight="weight")
-    edge_weights = [abs(orig_g[i][j]['weight']) for i, j in orig_g.edges()]
-    delta = abs(np.median(edge_weights))
+    pairs = {(min(u, v), max(u, v)) for u, v in ((triple[0], triple[1]), (triple[0], triple[2]),
+                                                  (triple[1], triple[2])) if Graph.has_edge(u, v)}
+    for u, v in constrained_edges(Graph) - pairs:
+        Graph.edges[u, v]['constrained_weight'] = False
+    for u, v in pairs:
+        Graph.edges[u, v]['weight'] -= delta
+        Graph.edges[u, v]['constrained_weight'] = True
+    Graph.graph["constrained_edges"] = pairs
+
 
+def reduce_triple(G, triple, delta, supernodes):
+    """
+    Reduces G by creating a supernode for nodes in triple (for left branching). triple is given in the nodes of the
+    root graph, supernodes maps those to the nodes of G (see Node). delta is the output of branching_delta.
+    Returns the reduced graph and its supernodes array
+    """
+    triple = supernodes[list(triple)].tolist()
+    Graph = G.copy()
+    merge_triple(Graph, triple, delta)
+    supernodes = np.where(np.isin(supernodes, triple[1:]), triple[0], supernodes)
+    return Graph, supernodes
+
+
+def alter_weight(G, triple, delta, supernodes):
+    """
+    Alter the weight associated with nodes in triple by median of all edge weights (for right branching).
+    triple is given in the nodes of the root graph, supernodes maps those to the nodes of G (see Node). delta is
+    the output of branching_delta.
+    Returns the reduced graph, whose supernodes are those of G
+    """
+    triple = supernodes[list(triple)].tolist()
     Graph = G.copy()
-    num_nodes = len(Graph.nodes())
-    for i in range(num_nodes):
-        for j in range(i, num_nodes):
-            if (i, j) in [(triple[0], triple[1]), (triple[0], triple[2]), (triple[1], triple[2]),
-                            (triple[1], triple[0]), (triple[2], triple[0]), (triple[2], triple[1])] and Graph.has_edge(i,
-                                                                                                                     j):
-                Graph.edges[(i, j)]['weight'] = AdjancencyMatrix[i, j] - delta
-                Graph.edges[(i, j)]['constrained_weight'] = True
-            elif Graph.has_edge(i, j):
-                Graph.edges[(i, j)]['constrained_weight'] = False
+    shift_triple(Graph, triple, delta)
     return Graph
 
 
-def reduced_cost_variable_fixing(model, var_vals, obj_value, lower_bound):
-    vars_one = []
-    vars_zero = []
-    for key in var_vals.keys():
-        var = model.getVarByName(key)
-        if var_vals[key] == 1:
-            if obj_value - var.getAttr(GRB.Attr.RC) < lower_bound:
-                vars_one.append(key)
-        elif var_vals[key] == 0:
-            if obj_value + var.getAttr(GRB.Attr.RC) < lower_bound:
-                vars_zero.append(key)
+def reduced_cost_variable_fixing(model, var_vals, obj_value, lower_bound, reduced_costs=None):
+    """
+    Returns the pair indices of the variables that can be fixed to one and to zero based on their reduced costs.
+    reduced_costs (an array like var_vals) replaces the model's, e.g. for a root LP loaded from the cache
+    """
+    if reduced_costs is None:
+        reduced_costs = model.reduced_costs()
+    vars_one = np.flatnonzero((var_vals == 1) & (obj_value - reduced_costs < lower_bound))
+    vars_zero = np.flatnonzero((var_vals == 0) & (obj_value + reduced_costs < lower_bound))
     return vars_one, vars_zero
 
 
+class GraphCache:
+    """
+    Materialized graphs of open nodes of a troika tree, keyed by their BranchGraph, with at most max_edges edges in
+    total. When a graph does not fit, keep_newest drops the graphs kept longest ago to make room for it, which suits
+    the strategies of NodeQueue that branch on the newest nodes first; otherwise the new graph is not kept, which
+    suits "bfs", where the oldest open nodes are branched on first
+    """
+
+    def __init__(self, max_edges=GRAPH_CACHE_EDGES, keep_newest=True):
+        self.max_edges = max_edges
+        self.keep_newest = keep_newest
+        self.graphs = OrderedDict()
+        self.num_edges = 0
+
+    def __len__(self):
+        return len(self.graphs)
+
+    def keep(self, key, Graph):
+        num_edges = Graph.number_of_edges()
+        if self.keep_newest:
+            while self.graphs and self.num_edges + num_edges > self.max_edges:
+                self.num_edges -= self.graphs.popitem(last=False)[1][1]
+        if self.num_edges + num_edges <= self.max_edges:
+            self.graphs[key] = Graph, num_edges
+            self.num_edges += num_edges
+
+    def take(self, key):
+        """
+        Returns the graph kept for key, which is dropped from the cache, or None
+        """
+        Graph, num_edges = self.graphs.pop(key, (None, 0))
+        self.num_edges -= num_edges
+        return Graph
+
+
+class BranchGraph:
+    """
+    Graph of a node of the troika tree, stored as its change from the graph of the parent node: the triple merged
+    by left branching (see merge_triple) or the triple whose edges were shifted by right branching (see
+    shift_triple). Only the root keeps a whole graph, as the arrays of graph_to_arrays, and materialize() replays
+    the changes on a copy of it. The nodes of a materialized graph keep their labels in the root graph.
+    delta (see branching_delta) and cache, a GraphCache for the graphs of open nodes or None, are shared by the
+    whole tree
+    """
+    __slots__ = ("parent", "merged", "shifted", "num_nodes", "arrays", "delta", "cache")
+
+    def __init__(self, parent, merged=None, shifted=None, num_nodes=None, arrays=None, delta=None, cache=None):
+        self.parent = parent
+        self.merged = merged
+        self.shifted = shifted
+        self.num_nodes = num_nodes
+        self.arrays = arrays
+        self.delta = delta
+        self.cache = cache
+
+    @classmethod
+    def from_graph(cls, Graph, delta, cache=None):
+        """
+        Root of a tree of branch graphs; Graph must have the nodes 0..n-1
+        """
+        return cls(None, num_nodes=Graph.number_of_nodes(), arrays=graph_to_arrays(Graph), delta=delta, cache=cache)
+
+    def merge(self, triple):
+        return BranchGraph(self, merged=tuple(triple), num_nodes=self.num_nodes - len(set(triple)) + 1,
+                           delta=self.delta, cache=self.cache)
+
+    def shift(self, triple):
+        return BranchGraph(self, shifted=tuple(triple), num_nodes=self.num_nodes, delta=self.delta, cache=self.cache)
+
+    def number_of_nodes(self):
+        return self.num_nodes
+
+    def keep(self, Graph):
+        """
+        Keeps Graph, the materialized graph, in the cache of the tree for the next materialize()
+        """
+        if self.cache is not None:
+            self.cache.keep(self, Graph)
+
+    def release(self):
+        """
+        Drops the graph kept by keep(), e.g. when the node is closed
+        """
+        if self.cache is not None:
+            self.cache.take(self)
+
+    def materialize(self):
+        """
+        Returns the graph as a networkx graph. A graph kept by keep() is returned as it is and dropped from the
+        cache, otherwise the changes are replayed on a copy of the root
+        """
+        if self.cache is not None:
+            Graph = self.cache.take(self)
+            if Graph is not None:
+                return Graph
+        changes = []
+        root = self
+        while root.parent is not None:
+            changes.append(root)
+            root = root.parent
+        Graph = graph_from_arrays(root.arrays)
+        for change in reversed(changes):
+            if change.merged is not None:
+                merge_triple(Graph, change.merged, self.delta)
+            else:
+                shift_triple(Graph, change.shifted, self.delta)
+        return Graph
+
+    def changes(self):
+        """
+        Returns the changes from the root as rows (kind, a, b, c), oldest first: kind 0 merges the triple (a, b, c),
+        kind 1 shifts it
+        """
+        changes = []
+        graph = self
+        while graph.parent is not None:
+            changes.append((0,) + graph.merged if graph.merged is not None else (1,) + graph.shifted)
+            graph = graph.parent
+        return changes[::-1]
+
+    def replay(self, changes):
+        """
+        Returns the graph reached from this one by changes (see changes())
+        """
+        graph = self
+        for kind, a, b, c in changes:
+            graph = graph.merge((a, b, c)) if kind == 0 else graph.shift((a, b, c))
+        return graph
+
+
 class Node:
     """
-    Represents one node in the troika tree
+    Represents one node in the troika tree. var_vals is the LP solution as an array indexed by pair_index, and
+    the fixed variables are kept as sorted arrays of pair indices.
+    graph is a BranchGraph; supernodes[t] is the node of graph that node t of the root graph has been merged into by
+    left branching
     """
 
     def __init__(self, constraint_list, var_vals, g, combo_comms):
@@ -763,8 +1292,12 @@ class Node:
         self.is_integer = False
         self.is_infeasible = False
         self.level = -1
-        self.fixed_zeros = []
-        self.fixed_ones = []
+        self.fixed_zeros = np.empty(0, dtype=np.int64)
+        self.fixed_ones = np.empty(0, dtype=np.int64)
+        # optimal basis of the node's LP (see lp_basis), kept until its children are solved
+        self.basis = None
+        self.in_queue = False
+        self.supernodes = None
         for com in combo_comms:
             com.sort()
         combo_comms.sort()
@@ -774,11 +1307,14 @@ class Node:
         self.lower_bound = lb
         self.upper_bound = ub
 
-    def get_violated_triples(self, list_of_cut_triads):
-        return find_violating_triples(self.graph, self.var_vals, list_of_cut_triads)
+    def get_violated_triples(self, cut_triads):
+        return find_violating_triples(self.graph, self.var_vals, cut_triads)
 
     def close_node(self):
         self.close = True
+        # a closed node is not branched on, so the graph cache need not keep its graph
+        if self.graph is not None:
+            self.graph.release()
 
     def set_is_integer(self):
         self.is_integer = True
@@ -793,10 +1329,10 @@ class Node:
         return self.constraints
 
     def set_fixed_ones(self, ones):
-        self.fixed_ones = ones
+        self.fixed_ones = np.unique(np.asarray(ones, dtype=np.int64))
 
     def set_fixed_zeros(self, zeros):
-        self.fixed_zeros = zeros
+        self.fixed_zeros = np.unique(np.asarray(zeros, dtype=np.int64))
 
     def get_fixed_ones(self):
         return self.fixed_ones
@@ -805,6 +1341,92 @@ class Node:
         return self.fixed_zeros
 
 
+class NodeQueue:
+    """
+    Open nodes of the troika tree. pop() returns the next node to branch on according to the strategy:
+    "bfs" explores the tree level by level, "best" takes the node with the largest LP bound first, "dfs" dives
+    into the child with the larger bound to find incumbents quickly, and "hybrid" dives but takes the best node
+    every hybrid_period pops. bound() is the largest LP bound among the open nodes, i.e. the global upper bound
+    """
+
+    strategies = ("bfs", "best", "dfs", "hybrid")
+
+    def __init__(self, strategy="bfs", hybrid_period=10):
+        self.strategy = strategy
+        self.hybrid_period = hybrid_period
+        self.heap = []
+        self.order = deque()
+        self.counter = count()
+        self.num_open = 0
+        self.pops = 0
+
+    def __len__(self):
+        return self.num_open
+
+    def push(self, *nodes):
+        for node in nodes:
+            node.in_queue = True
+            heappush(self.heap, (-node.upper_bound, next(self.counter), node))
+        self.num_open += len(nodes)
+        if self.strategy in ("dfs", "hybrid"):
+            # the child with the larger bound ends up on top of the stack
+            self.order.extend(sorted(nodes, key=lambda node: node.upper_bound))
+        elif self.strategy == "bfs":
+            self.order.extend(nodes)
+
+    def _take(self, node):
+        node.in_queue = False
+        self.num_open -= 1
+        # drop the entries of taken nodes once they make up most of the containers
+        if len(self.heap) > 2 * self.num_open + 64:
+            self.heap = [entry for entry in self.heap if entry[2].in_queue]
+            heapify(self.heap)
+            self.order = deque(node for node in self.order if node.in_queue)
+        return node
+
+    def _pop_best(self):
+        while self.heap:
+            node = heappop(self.heap)[2]
+            if node.in_queue:
+                return node
+        return None
+
+    def _pop_order(self):
+        while self.order:
+            node = self.order.popleft() if self.strategy == "bfs" else self.order.pop()
+            if node.in_queue:
+                return node
+        return None
+
+    def pop(self, incumbent):
+        """
+        Returns the next open node whose bound is not below incumbent (the others are closed), or None
+        """
+        while self.num_open > 0:
+            self.pops += 1
+            if self.strategy == "best" or (self.strategy == "hybrid" and self.pops % self.hybrid_period == 0):
+                node = self._take(self._pop_best())
+            else:
+                node = self._take(self._pop_order())
+            if node.upper_bound >= incumbent:
+                return node
+            node.close_node()
+        return None
+
+    def open_nodes(self):
+        """
+        Returns the open nodes in the order in which pushing them one by one into an empty queue restores it
+        """
+        if self.strategy == "best":
+            return [entry[2] for entry in sorted(self.heap, key=lambda entry: entry[:2]) if entry[2].in_queue]
+        return [node for node in self.order if node.in_queue]
+
+    def bound(self):
+        while self.heap and not self.heap[0][2].in_queue:
+            heappop(self.heap)
+        return -self.heap[0][0] if self.heap else None
+
+
 def create_troika_edge_attributes(G):
     # 'super node of' stores all the nodes that are a part of this super node
     for edge in G.edges():
@@ -843,12 +1465,13 @@ def convert_to_com_list(com_dict):
     return out
 
 
-def output(develop, state, lower_bound, upper_bound, communities, preprocessing_time, formulation_time, solve_time):
+def output(develop, state, lower_bound, upper_bound, communities, preprocessing_time, formulation_time, solve_time,
+           stats=None):
     """
-    Final output wrapper function
+    Final output wrapper function. In develop mode the run statistics (a dict of timings and counters) are appended
     """
     if develop:
-        out = state, lower_bound, upper_bound, communities, preprocessing_time, formulation_time, solve_time
+        out = state, lower_bound, upper_bound, communities, preprocessing_time, formulation_time, solve_time, stats
     else:
         if upper_bound == 0:
             gap = 0
@@ -858,153 +1481,490 @@ def output(develop, state, lower_bound, upper_bound, communities, preprocessing_
     return out
 
 
-def troika(G, global_threshold=0.001, time_allowed=600, lp_method=4, develop_mode=False):
+def output_arrays(out):
+    """
+    Returns the develop mode output of alg as arrays for a checkpoint, see output_from_arrays
+    """
+    state, lower_bound, upper_bound, communities, preprocessing_time, formulation_time, solve_time, stats = out
+    members, indptr = ragged_arrays(communities, np.int64)
+    return {
+        "final_state": np.int64(state),
+        "final_bounds": np.array([lower_bound, upper_bound], dtype=np.float64),
+        "final_times": np.array([preprocessing_time, formulation_time, solve_time], dtype=np.float64),
+        "final_communities": members,
+        "final_communities_indptr": indptr,
+        **stats_arrays(stats),
+    }
+
+
+def output_from_arrays(arrays):
+    """
+    Inverse of output_arrays
+    """
+    lower_bound, upper_bound = arrays["final_bounds"].tolist()
+    return output(True, int(arrays["final_state"]), lower_bound, upper_bound,
+                  ragged_lists(arrays["final_communities"], arrays["final_communities_indptr"]),
+                  *arrays["final_times"].tolist(), stats=stats_from_arrays(arrays))
+
+
+def set_partitions(nodes):
+    """
+    Generates every partition of the list nodes into non-empty communities
+    """
+    if not nodes:
+        yield []
+        return
+    first, rest = nodes[0], nodes[1:]
+    for partition in set_partitions(rest):
+        yield [[first]] + partition
+        for k in range(len(partition)):
+            yield partition[:k] + [[first] + partition[k]] + partition[k + 1:]
+
+
+def solve_by_enumeration(G, develop_mode=False):
+    """
+    Solves the CP problem on a small graph exactly by evaluating all of its partitions, in the output format of alg
+    (state 9). Meant for components of a handful of nodes, which have at most a few dozen partitions
+    """
+    start = time.time()
+    best_value, best_partition = None, None
+    objective = PartitionObjective(G)
+    for partition in set_partitions(list(G.nodes())):
+        value = objective.value(objective.labels(partition))
+        if best_value is None or value > best_value:
+            best_value, best_partition = value, partition
+    return output(develop_mode, 9, best_value, best_value, best_partition, 0, 0, time.time() - start, stats={})
+
+
+def solve_components(components, component_workers, **alg_kwargs):
+    """
+    Runs alg on every (index, graph) pair of components in a pool of component_workers processes, in the given
+    order, and yields (index, output) as the components finish
+    """
+    with ProcessPoolExecutor(min(component_workers, len(components)),
+                             mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = {pool.submit(alg, sub_graph, **alg_kwargs): sub_inx for sub_inx, sub_graph in components}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+
+def schedule_components(components, global_threshold, deadline, lower_bound=0.0, upper_bound=0.0, **alg_kwargs):
+    """
+    Interleaves the searches of the (index, graph) pairs of components (see alg_steps, alg_kwargs must include
+    develop_mode=True) under one deadline, and yields (index, output) as the components finish.
+    Every node goes to the open component with the largest gap between its bounds, i.e. the one that contributes
+    most to the aggregate gap, and all searches are stopped once the aggregate gap is at most global_threshold
+    (with states 10 to 12, see alg_steps) or the deadline has passed (states 3 to 5).
+    lower_bound and upper_bound are the aggregate bounds of the components solved already
     """
-    Troika algorithm
+    searches = {}
+    bounds = {}
+    for sub_inx, sub_graph in components:
+        steps = alg_steps(sub_graph, global_threshold, deadline=deadline, **alg_kwargs)
+        try:
+            bounds[sub_inx] = next(steps)
+            searches[sub_inx] = steps
+        except StopIteration as stop:
+            lower_bound += stop.value[1]
+            upper_bound += stop.value[2]
+            yield sub_inx, stop.value
+
+    stop = True
+    while searches:
+        lower = lower_bound + sum(lower for lower, _ in bounds.values())
+        upper = upper_bound + sum(upper for _, upper in bounds.values())
+        if time.time() >= deadline:
+            break
+        if upper - lower <= global_threshold * abs(upper):
+            stop = "gap"
+            break
+        sub_inx = max(bounds, key=lambda k: bounds[k][1] - bounds[k][0])
+        try:
+            bounds[sub_inx] = next(searches[sub_inx])
+        except StopIteration as stop:
+            del searches[sub_inx], bounds[sub_inx]
+            lower_bound += stop.value[1]
+            upper_bound += stop.value[2]
+            yield sub_inx, stop.value
+
+    for sub_inx, steps in searches.items():
+        try:
+            steps.send(stop)
+        except StopIteration as stopped:
+            yield sub_inx, stopped.value
+
+
+def troika(G, global_threshold=0.001, time_allowed=600, lp_method=4, develop_mode=False, cache_dir=None,
+           cache_max_bytes=1 << 30, lazy_constraints=False, node_selection="bfs", n_workers=1, component_workers=1,
+           max_enumeration_nodes=3, lp_rounding=True, checkpoint_dir=None,
+           checkpoint_interval=600, resume_from=None, callbacks=None, solver="gurobi"):
     """
+    Troika algorithm.
+    time_allowed is one wall-clock limit for the whole graph and global_threshold bounds the gap between the sums
+    of the components' upper and lower bounds. The connected components are solved largest first, with
+    component_workers > 1 in that many processes at once (see solve_components), otherwise interleaved so that the
+    time goes to the components with the largest gaps (see schedule_components). Components of at most
+    max_enumeration_nodes nodes are solved by enumeration in this process (see solve_by_enumeration).
+    With checkpoint_dir, the search of every component is saved to a SearchCheckpoints directory every
+    checkpoint_interval seconds and when time runs out, and its result once it is finished. resume_from is such a
+    directory of an earlier run of the same graph: finished components are taken from it and the others continue
+    their saved searches (see alg). Pass the same directory as both to keep checkpointing a resumed run.
+    callbacks are passed to alg; with component_workers > 1 they are called in the components' processes.
+    solver is the LP/IP solver of the searches, "gurobi" or "highs" (see alg)
+    """
+    deadline = time.time() + time_allowed
+    cache = PreprocessingCache(cache_dir, cache_max_bytes) if cache_dir is not None else None
+    if resume_from is not None and not os.path.isdir(resume_from):
+        raise FileNotFoundError(f"no checkpoint directory {resume_from!r}")
+    checkpoint = SearchCheckpoints(checkpoint_dir) if checkpoint_dir is not None else None
+    resume = SearchCheckpoints(resume_from) if resume_from is not None else None
     # Running troika for a network with multiple connected components
     optimal_partition = []
-    list_of_subgraphs = [G.subgraph(c).copy() for c in nx.connected_components(G)]
-    n_sub = len(list_of_subgraphs)
+    list_of_subgraphs = sorted((G.subgraph(c).copy() for c in nx.connected_components(G)),
+                               key=lambda sub_graph: sub_graph.number_of_nodes(), reverse=True)
     sub_results = {}
-    total_gap = 0
-    total_modeling_time = 0
-    total_solve_time = 0
     total_preprocessing_time = 0
     total_formulation_time = 0
-    threshold_sub = global_threshold / float(n_sub)
+    total_solve_time = 0
+    total_upper_bound = 0.0
+    total_stats = defaultdict(float)
+    mappings = {}
+    # checkpoint keys of the components, see SearchCheckpoints
+    keys = {}
+    solved = []
+    components = []
     for sub_inx, sub_graph in enumerate(list_of_subgraphs):
         if sub_graph.number_of_edges() == 0:
             optimal_partition.append([a for a in sub_graph.nodes()])
+            sub_results[sub_inx] = None
             continue
 
         sub_graph = nx.convert_node_labels_to_integers(sub_graph, label_attribute="original_label")
-        mapping = nx.get_node_attributes(sub_graph, 'original_label')
-        troika_output = alg(sub_graph, global_threshold=threshold_sub, time_allowed=time_allowed,
-                             lp_method=lp_method, develop_mode=develop_mode)
-        if develop_mode:
-            sub_results[sub_inx] = troika_output
-            optimal_partition += [[mapping[i] for i in com] for com in troika_output[3]]
-            total_preprocessing_time += troika_output[4]
-            total_formulation_time += troika_output[5]
-            total_solve_time += troika_output[6]
+        mappings[sub_inx] = nx.get_node_attributes(sub_graph, 'original_label')
+        if checkpoint is not None or resume is not None:
+            keys[sub_inx] = graph_fingerprint(sub_graph)
+        finished = resume.load(keys[sub_inx]) if resume is not None else None
+        if finished is not None and "final_state" in finished:
+            solved.append((sub_inx, output_from_arrays(finished)))
+        elif sub_graph.number_of_nodes() <= max_enumeration_nodes:
+            solved.append((sub_inx, solve_by_enumeration(sub_graph, develop_mode=True)))
         else:
-            optimal_partition += [[mapping[i] for i in com] for com in troika_output[2]]
-            total_gap += troika_output[1]
-            total_modeling_time += troika_output[3]
-            total_solve_time += troika_output[4]
+            components.append((sub_inx, sub_graph))
+
+    # the components are always solved in develop mode, for their upper bounds and statistics
+    alg_kwargs = dict(time_allowed=time_allowed, lp_method=lp_method, develop_mode=True, cache=cache,
+                      lazy_constraints=lazy_constraints, node_selection=node_selection, n_workers=n_workers,
+                      lp_rounding=lp_rounding, checkpoint=checkpoint,
+                      checkpoint_interval=checkpoint_interval, resume=resume, callbacks=callbacks, solver=solver)
+    if component_workers > 1 and len(components) > 1:
+        # every component may use the time the others leave before the deadline
+        outputs = solve_components(components, component_workers, global_threshold=global_threshold,
+                                   deadline=deadline, **alg_kwargs)
+    else:
+        solved_lower = sum(troika_output[1] for _, troika_output in solved)
+        solved_upper = sum(troika_output[2] for _, troika_output in solved)
+        outputs = schedule_components(components, global_threshold, deadline, solved_lower, solved_upper,
+                                      **alg_kwargs)
+    for sub_inx, troika_output in chain(solved, outputs):
+        mapping = mappings[sub_inx]
+        sub_results[sub_inx] = troika_output
+        if checkpoint is not None and troika_output[0] not in (3, 4, 5, 10, 11, 12):
+            # a search stopped by time or by the global gap keeps its checkpoint, to be continued
+            checkpoint.save(keys[sub_inx], **output_arrays(troika_output))
+        optimal_partition += [[mapping[i] for i in com] for com in troika_output[3]]
+        total_upper_bound += troika_output[2]
+        total_preprocessing_time += troika_output[4]
+        total_formulation_time += troika_output[5]
+        total_solve_time += troika_output[6]
+        for key, value in troika_output[7].items():
+            total_stats[key] += value
 
     G = nx.convert_node_labels_to_integers(G, label_attribute="original_label")
     mapping = nx.get_node_attributes(G, 'original_label')
     mapping = {val: key for key, val in mapping.items()}
     int_optimal_partition = [[mapping[i] for i in com] for com in optimal_partition]
     lower_bound = calculate_objective_value(int_optimal_partition, G)
+    total_stats["upper_bound"] = total_upper_bound
 
     if develop_mode:
         for sub_inx, sub_graph in enumerate(list_of_subgraphs):
             print(f"Connected component {sub_inx}")
             print(sub_results[sub_inx])
-        out = lower_bound, optimal_partition, total_preprocessing_time, total_formulation_time, total_solve_time
+        out = (lower_bound, optimal_partition, total_preprocessing_time, total_formulation_time, total_solve_time,
+               dict(total_stats))
     else:
-        out = lower_bound, total_gap, optimal_partition, total_modeling_time, total_solve_time
+        total_gap = 0 if total_upper_bound == 0 else (total_upper_bound - lower_bound) / total_upper_bound
+        out = (lower_bound, total_gap, optimal_partition, total_preprocessing_time + total_formulation_time,
+               total_solve_time)
 
     return out
 
 
-def alg(G, global_threshold=0.001, time_allowed=600, lp_method=4, develop_mode=False):
+def alg(G, global_threshold=0.001, time_allowed=600, lp_method=4, develop_mode=False, cache=None,
+        cache_root_lp=True, lazy_constraints=False, node_selection="bfs", n_workers=1, deadline=None,
+        lp_rounding=True, checkpoint=None, checkpoint_interval=600, resume=None,
+        callbacks=None, solver="gurobi"):
     """
-    Run troika on input Graph while MIP gap > threshold and runtime < time_allowed (default is 600 seconds)
+    Run troika on input Graph while MIP gap > threshold and runtime < time_allowed (default is 600 seconds).
+    deadline is an optional time.time() value at which the search stops as well.
+    node_selection is the order in which open nodes are branched on, see NodeQueue.
+    With n_workers > 1 the open nodes are branched on by that many worker processes, each with its own copy of the
+    root model (see init_node_worker); this process keeps the incumbent and the queue and prunes.
+    cache is an optional PreprocessingCache; on a hit the reduced graph, the cut triads and (if cache_root_lp)
+    the root LP are loaded from it instead of being recomputed.
+    lazy_constraints generates the triangle constraints by separation (see lp_formulation); the rows of such a
+    model depend on the separation rounds, so its root LP is not cached.
+    lp_rounding rounds the LP solution of every node to partitions as well (see lp_rounding), which may give a
+    better lower bound than Combo.
+    checkpoint is an optional SearchCheckpoints to which the state of the search is saved every
+    checkpoint_interval seconds and when it stops with open nodes; resume is one from which a saved search of G
+    is continued instead of starting over (time_allowed applies to the continued search alone).
+    callbacks are called with every event of the search (see troika.events), e.g. print_progress; without them
+    the search prints nothing.
+    solver selects the LPModel the LPs and IPs are solved with (see troika.solvers): "gurobi", or "highs" for SciPy's
+    HiGHS, which needs no license but solves every LP from scratch; lp_method is Gurobi's Method code either way
     """
+    steps = alg_steps(G, global_threshold, time_allowed, lp_method, develop_mode, cache, cache_root_lp,
+                      lazy_constraints, node_selection, n_workers, deadline, lp_rounding,
+                      checkpoint, checkpoint_interval, resume, callbacks, solver)
+    try:
+        while True:
+            next(steps)
+    except StopIteration as stop:
+        return stop.value
+
+
+def alg_steps(G, global_threshold=0.001, time_allowed=600, lp_method=4, develop_mode=False, cache=None,
+              cache_root_lp=True, lazy_constraints=False, node_selection="bfs", n_workers=1, deadline=None,
+              lp_rounding=True, checkpoint=None, checkpoint_interval=600, resume=None,
+              callbacks=None, solver="gurobi"):
+    """
+    Generator version of alg, with the same arguments, that returns alg's output. It yields (incumbent, global
+    bound) after the root and after every node; sending it True stops the search as if time ran out (states 3, 4
+    and 5), sending it "gap" stops it because the global gap of troika was reached (states 10, 11 and 12, which are
+    otherwise the same). The time spent suspended is not counted as solve time.
+    A checkpoint holds the preprocessing cache entry of G (reduced graph, isolated nodes, cut triads and, without
+    lazy constraints, the root LP), the root Combo value and upper bound estimate, and the state of the search
+    (see search_state_arrays). A resumed search loads the first part as from the cache, skips the root heuristics
+    and the root's early exits, and restarts from the open nodes; their first LPs are solved without a basis. With
+    a looser global_threshold than the checkpointed run it returns the restored incumbent at once
+    """
+    cache_root_lp = cache_root_lp and not lazy_constraints
+    if node_selection not in NodeQueue.strategies:
+        raise ValueError(f"node_selection must be one of {NodeQueue.strategies}, got {node_selection!r}")
+    if solver not in SOLVERS:
+        raise ValueError(f"solver must be one of {tuple(SOLVERS)}, got {solver!r}")
 
     preprocessing_time_start = time.time()
     global start_separate
     start_separate = None
+    stats = {}
+    cache_key = graph_fingerprint(G) if cache is not None or checkpoint is not None or resume is not None else None
+    resumed = resume.load(cache_key) if resume is not None else None
+    if resumed is not None and "incumbent" not in resumed:
+        # the result of a finished search, see troika
+        resumed = None
+    if resumed is not None:
+        cached = resumed
+    else:
+        cached = cache.load(cache_key) if cache is not None else None
     G1 = G.copy()                           
     orig_graph = create_troika_edge_attributes(G1)   # orig_graph = troika edge attributes only
-    G2 = orig_graph.copy()
-    Graph, isolated_nodes = handle_isolated_nodes(G2)
-    Graph = clique_filtering(Graph)             # Graph = isolated nodes handled + troika edge attributes + positive cliques and pendant nodes combined
+    if cached is not None:
+        Graph = graph_from_arrays(cached)
+        isolated_nodes = cached["isolated_nodes"].tolist()
+    else:
+        G2 = orig_graph.copy()
+        Graph, isolated_nodes = handle_isolated_nodes(G2)
+        Graph = clique_filtering(Graph)             # Graph = isolated nodes handled + troika edge attributes + positive cliques and pendant nodes combined
+        if cache is not None:
+            cache.store(cache_key, isolated_nodes=np.array(isolated_nodes, dtype=np.int64), **graph_to_arrays(Graph))
+    # every lower bound is an objective value on orig_graph, see run_combo; Graph was copied from it before
+    orig_graph.graph["objective"] = PartitionObjective(orig_graph)
     preprocessing_time = time.time() - preprocessing_time_start
 
-    # get initial lower bound using Combo heuristic algorithm
-    root_combo_time_start = time.time()
-    obj_val_combo, communities_combo_declustered = run_combo(Graph, orig_graph, isolated_nodes)
-    print('initial lower bound', obj_val_combo)
-    root_combo_time = time.time() - root_combo_time_start
-
+    if resumed is not None:
+        # the root heuristics ran before the checkpoint, their partition is not needed anymore
+        obj_val_combo, bp_upper_bound_estimate = float(resumed["root_combo"]), float(resumed["root_estimate"])
+        communities_combo_declustered = []
+        root_combo_time = root_estimate_time = 0.0
+    else:
+        # get initial lower bound using Combo heuristic algorithm
+        root_combo_time_start = time.time()
+        obj_val_combo, communities_combo_declustered = run_combo(Graph, orig_graph, isolated_nodes)
+        root_combo_time = time.time() - root_combo_time_start
 
-    # get initial upper bound estimate using best partition
-    _, edge_list = deconstruct_graph(Graph, "weight")
-    root_estimate_start = time.time()
-    bp_upper_bound_estimate = EstimateUB.estimateUB_chains_fast(Graph.number_of_nodes(), edge_list)
-    root_estimate_time = time.time() - root_estimate_start
-    print("initial upper bound estimate", bp_upper_bound_estimate)
-    if abs(bp_upper_bound_estimate - obj_val_combo) / bp_upper_bound_estimate < global_threshold:
-        return output(develop_mode, 0, obj_val_combo, bp_upper_bound_estimate, communities_combo_declustered, preprocessing_time,
-                        0, root_combo_time + root_estimate_time)
+        # get initial upper bound estimate using best partition
+        _, edge_list = deconstruct_graph(Graph, "weight")
+        root_estimate_start = time.time()
+        bp_upper_bound_estimate = EstimateUB.estimateUB_chains_fast(Graph.number_of_nodes(), edge_list)
+        root_estimate_time = time.time() - root_estimate_start
+        if abs(bp_upper_bound_estimate - obj_val_combo) / bp_upper_bound_estimate < global_threshold:
+            return output(develop_mode, 0, obj_val_combo, bp_upper_bound_estimate, communities_combo_declustered,
+                          preprocessing_time, 0, root_combo_time + root_estimate_time, stats=stats)
 
 
     # create initial LP formulation and run it
     cut_triads_time_start = time.time()
-    list_of_cut_triads = find_list_of_cut_triads(Graph)
+    if cached is not None and "cut_triads" in cached:
+        list_of_cut_triads = cached["cut_triads"]
+    else:
+        list_of_cut_triads = np.array(find_list_of_cut_triads(Graph), dtype=np.int32).reshape(-1, 3)
+        if cache is not None:
+            cache.store(cache_key, cut_triads=list_of_cut_triads)
+    cut_triads = cut_triad_arrays(Graph, list_of_cut_triads)
     cut_triads_time = time.time() - cut_triads_time_start
-    obj_val_lp, var_vals, model, formulation_time, root_lp_time = lp_formulation(Graph,list_of_cut_triads, lp_method)
+    use_root_lp = cache_root_lp or (resumed is not None and not lazy_constraints)
+    root_lp = cached if use_root_lp and cached is not None and "root_x" in cached else None
+    obj_val_lp, var_vals, model, formulation_time, root_lp_time = lp_formulation(Graph, list_of_cut_triads, lp_method,
+                                                                                 root_lp=root_lp, lazy=lazy_constraints,
+                                                                                 solver=solver)
+    if root_lp is not None:
+        root_reduced_costs = root_lp["root_rc"]
+    else:
+        root_reduced_costs = None
+        if cache is not None and cache_root_lp:
+            cache.store(cache_key, **root_lp_arrays(model, obj_val_lp))
+    if checkpoint is not None:
+        checkpoint_base = dict(graph_to_arrays(Graph), isolated_nodes=np.array(isolated_nodes, dtype=np.int64),
+                               cut_triads=list_of_cut_triads, root_combo=np.float64(obj_val_combo),
+                               root_estimate=np.float64(bp_upper_bound_estimate))
+        if root_lp is not None:
+            checkpoint_base.update((name, value) for name, value in root_lp.items() if name.startswith("root_"))
+        elif not lazy_constraints:
+            checkpoint_base.update(root_lp_arrays(model, obj_val_lp))
+    stats["cut_triads_time"] = cut_triads_time
+    stats["model_build_time"] = formulation_time
+    stats["root_lp_time"] = root_lp_time
     formulation_time += cut_triads_time
-    print('initial lp upper bound', obj_val_lp)
-    if is_integer_solution(Graph, var_vals):
+    callbacks = list(callbacks or ())
+    if callbacks and root_lp is None:
+        emit(callbacks, LPSolved("root", obj_val_lp, model.iterations, root_lp_time))
+    # a resumed search is past the root: its root partition was not kept, the restored incumbent is returned instead
+    if resumed is None and is_integer_solution(Graph, var_vals):
         obj_val_lp, var_vals = post_processing(var_vals, Graph)
         return output(develop_mode, 1, obj_val_lp, obj_val_lp,
                         decluster_communities(model_to_communities(var_vals, Graph), Graph, isolated_nodes),
-                        preprocessing_time, formulation_time, root_lp_time)
+                        preprocessing_time, formulation_time, root_lp_time, stats=stats)
     
-    if abs(obj_val_lp - obj_val_combo) / obj_val_lp < global_threshold:
+    if resumed is None and abs(obj_val_lp - obj_val_combo) / obj_val_lp < global_threshold:
         return output(develop_mode, 2, obj_val_combo, obj_val_lp, communities_combo_declustered, preprocessing_time,
-                        formulation_time, root_combo_time + root_lp_time + root_estimate_time)
+                        formulation_time, root_combo_time + root_lp_time + root_estimate_time, stats=stats)
 
     best_bound = min(obj_val_lp, bp_upper_bound_estimate)
-    incumbent = obj_val_combo
-    root = Node([], var_vals, Graph, communities_combo_declustered)
-    root.set_level(0)
-    root.set_bounds(obj_val_combo, obj_val_lp)
-    var_fixed_ones, var_fixed_zeros = reduced_cost_variable_fixing(model, var_vals, obj_val_lp, incumbent)
-    root.set_fixed_ones(var_fixed_ones)
-    root.set_fixed_zeros(var_fixed_zeros)
-    current_node = root
-    current_level = 1
-    nodes_previous_level = [root]
-    best_combo = root
-    best_lp = root
+    # the workers replay the graphs of their nodes on roots of their own, without a cache
+    graph_cache = GraphCache(keep_newest=node_selection != "bfs") if n_workers == 1 else None
+    root_graph = BranchGraph.from_graph(Graph, branching_delta(orig_graph), graph_cache)
+    rounding = rounding_arrays(Graph, orig_graph, isolated_nodes) if lp_rounding else None
+    queue = NodeQueue(node_selection)
+    resumed_time = 0.0
+    if resumed is not None:
+        incumbent, best_bound, best_combo, open_nodes, resumed_stats = restore_search_state(resumed, root_graph)
+        stats.update(resumed_stats)
+        resumed_time = float(resumed["elapsed"])
+        separate = int(resumed["start_separate"])
+        start_separate = None if separate < 0 else bool(separate)
+        for node in open_nodes:
+            queue.push(node)
+    else:
+        root = Node([], var_vals, root_graph, communities_combo_declustered)
+        root.set_level(0)
+        root.set_bounds(obj_val_combo, obj_val_lp)
+        root.supernodes = np.arange(Graph.number_of_nodes())
+        if rounding is not None:
+            round_node(root, rounding, stats)
+        incumbent = root.lower_bound
+        var_fixed_ones, var_fixed_zeros = reduced_cost_variable_fixing(model, var_vals, obj_val_lp, incumbent,
+                                                                       root_reduced_costs)
+        root_fixed = propagate_fixings(var_fixed_ones, var_fixed_zeros, [], Graph.number_of_nodes(), stats)
+        if root_fixed is not None:
+            var_fixed_ones, var_fixed_zeros = root_fixed[:2]
+        else:
+            # the reduced cost fixings contradict each other, no partition beats the incumbent
+            best_bound = incumbent
+        root.set_fixed_ones(var_fixed_ones)
+        root.set_fixed_zeros(var_fixed_zeros)
+        if root_lp is not None and "root_vbasis" in root_lp and not lazy_constraints:
+            root.basis = root_lp["root_vbasis"], row_basis(root_lp["root_cbasis"]), {}
+        else:
+            root.basis = lp_basis(model)
+        queue.push(root)
+        best_combo = root
+    reported_bound = best_bound
+    if callbacks:
+        emit(callbacks, IncumbentImproved(incumbent, None, 0))
+        emit(callbacks, BoundUpdated(best_bound, None, incumbent))
+    # a branch LP is its parent's LP plus one row, which dual simplex re-solves from the parent's basis
+    model.use_dual_simplex()
     root_time = root_lp_time + root_combo_time + root_estimate_time
-    solve_start = time.time()
-    while (incumbent < best_bound and abs(best_bound - incumbent) / best_bound > global_threshold and nodes_previous_level != []
-             and time.time() - solve_start + root_time <= time_allowed):  # add time_limit as a user parameter
-        print('==============================================LEVEL: ',current_level, '==============================================')
-        nodes_current_level = []
-        lower_bounds = []
-        upper_bounds = []
-        
-        for node in nodes_previous_level:
-            if time.time() - solve_start + root_time >= time_allowed:
-                if best_combo.is_integer:
-                    if best_combo.lower_bound <= best_combo.upper_bound:
-                        obj_val, var_vals = post_processing(best_combo.var_vals, Graph)
-                        return output(develop_mode, 3, obj_val, obj_val,
-                                        decluster_communities(model_to_communities(var_vals, Graph), Graph,
-                                                            isolated_nodes), preprocessing_time, formulation_time,
-                                        time.time() - solve_start + root_time)
-                    else:
-                        return output(develop_mode, 4, best_combo.lower_bound, best_lp.upper_bound,
-                                        best_combo.combo_communities, preprocessing_time, formulation_time,
-                                        time.time() - solve_start + root_time)
-                else:
-                    return output(develop_mode, 5, best_combo.lower_bound, best_lp.upper_bound,
-                                    best_combo.combo_communities, preprocessing_time, formulation_time,
-                                    time.time() - solve_start + root_time)
-
-            current_node = node
-            left_node, right_node = perform_branch(node, model, incumbent, Graph, orig_graph,
-                                                     isolated_nodes, list_of_cut_triads)
-
+    # nodes being branched on by the worker processes, by future
+    in_flight = {}
+    pool = combo_executor = None
+    if n_workers == 1:
+        # runs the children's Combo heuristics alongside their LPs, see perform_branch
+        combo_executor = ThreadPoolExecutor(max_workers=1)
+    else:
+        pool = ProcessPoolExecutor(n_workers, mp_context=multiprocessing.get_context("spawn"),
+                                   initializer=init_node_worker,
+                                   initargs=(Graph, orig_graph, isolated_nodes, list_of_cut_triads, lp_method,
+                                             lazy_constraints, start_separate, lp_rounding, solver))
+
+    def save_checkpoint():
+        open_nodes = queue.open_nodes() + list(in_flight.values())
+        elapsed = time.time() - solve_start + root_time + resumed_time
+        checkpoint.save(cache_key, **checkpoint_base,
+                        **search_state_arrays(open_nodes, incumbent, best_bound, best_combo, stats, elapsed))
+
+    solve_start = last_checkpoint = time.time()
+    stopped_on_gap = False
+    while (incumbent < best_bound and abs(best_bound - incumbent) / best_bound > global_threshold
+             and (len(queue) > 0 or in_flight)
+             and time.time() - solve_start + root_time <= time_allowed
+             and (deadline is None or time.time() < deadline)):  # add time_limit as a user parameter
+        # other searches may run while this one is suspended, among them other components' alg_steps
+        separate, suspended = start_separate, time.time()
+        stop = yield incumbent, best_bound
+        start_separate = separate
+        solve_start += time.time() - suspended
+        if stop:
+            stopped_on_gap = stop == "gap"
+            break
+        if pool is None:
+            node = queue.pop(incumbent)
+            if node is None:
+                # every open node was pruned by the incumbent
+                best_bound = incumbent
+                break
+            node_stats, node_events = {}, [] if callbacks else None
+            left_node, right_node = perform_branch(node, model, incumbent, Graph, orig_graph, isolated_nodes,
+                                                   cut_triads, node_stats, rounding, node_events, combo_executor)
+            branched = [(node, left_node, right_node, node_stats, node_events)]
+        else:
+            # keep every worker busy, the coordinator only does the bookkeeping
+            while len(in_flight) < n_workers:
+                node = queue.pop(incumbent)
+                if node is None:
+                    break
+                in_flight[pool.submit(evaluate_node, detached_node(node), incumbent, bool(callbacks))] = node
+            if not in_flight:
+                best_bound = incumbent
+                break
+            timeout = time_allowed - (time.time() - solve_start + root_time)
+            if deadline is not None:
+                timeout = min(timeout, deadline - time.time())
+            done, _ = wait(in_flight, timeout=max(0.0, timeout), return_when=FIRST_COMPLETED)
+            branched = []
+            for future in done:
+                node = in_flight.pop(future)
+                node.basis = None
+                left_node, right_node, node_stats, node_events = future.result()
+                branched.append((node,) + attach_children(node, left_node, right_node) + (node_stats, node_events))
+
+        for node, left_node, right_node, node_stats, node_events in branched:
+            for key, value in node_stats.items():
+                stats[key] = stats.get(key, 0) + value
+            stats["nodes"] = stats.get("nodes", 0) + 1
+            previous_incumbent = incumbent
             if left_node.close and left_node.is_integer and incumbent <= left_node.upper_bound:
                 incumbent = left_node.upper_bound
                 best_combo = left_node
@@ -1012,253 +1972,593 @@ def alg(G, global_threshold=0.001, time_allowed=600, lp_method=4, develop_mode=F
                 incumbent = right_node.upper_bound
                 best_combo = right_node
 
-            current_node.left = left_node
-            nodes_current_level.append(left_node)
-            left_node.parent = current_node
-            left_node.set_level(current_level)
-            lower_bounds.append(left_node.lower_bound)
-            if left_node.upper_bound >= incumbent:
-                upper_bounds.append(left_node.upper_bound)
-            else:
-                left_node.close_node()
-
-            current_node.right = right_node
-            nodes_current_level.append(right_node)
-            right_node.parent = current_node
-            right_node.set_level(current_level)
-            lower_bounds.append(right_node.lower_bound)
-            if right_node.upper_bound >= incumbent:
-                upper_bounds.append(right_node.upper_bound)
-            else:
-                right_node.close_node()
-
-            incumbent = max(lower_bounds + [incumbent])
+            node.left = left_node
+            node.right = right_node
+            # the IP leaf is returned as both children
+            children = [left_node] if left_node is right_node else [left_node, right_node]
+            for child in children:
+                child.parent = node
+                child.set_level(node.level + 1)
+                if child.upper_bound < incumbent:
+                    child.close_node()
+            incumbent = max([child.lower_bound for child in children] + [incumbent])
             if right_node.lower_bound == incumbent:
                 best_combo = right_node
             elif left_node.lower_bound == incumbent:
                 best_combo = left_node
-
-        if len(upper_bounds) > 0:
-            best_bound = max(upper_bounds)
-        for n in nodes_current_level:
-            if n.upper_bound == best_bound:
-                best_lp = n
-        current_level += 1
-        nodes_p_level = []
-        for a in nodes_current_level:
-            if a.close == False:
-                nodes_p_level.append(a)
-        nodes_previous_level = nodes_p_level
-    
-        print("Bounds", incumbent, best_bound)
-
+            queue.push(*[child for child in children if not child.close])
+            if callbacks:
+                for event in node_events:
+                    emit(callbacks, event)
+                if incumbent > previous_incumbent:
+                    emit(callbacks, IncumbentImproved(incumbent, previous_incumbent, node.level + 1))
+                triple = left_node.constraints[-1][:3] if left_node is not right_node else None
+                timers = {key: value for key, value in node_stats.items() if key.endswith("_time")}
+                counters = {key: value for key, value in stats.items() if not key.endswith("_time")}
+                emit(callbacks, NodeEvaluated(node.level, triple, tuple(child_status(child) for child in children),
+                                              incumbent, best_bound, timers, counters))
+
+        # the global bound is the best bound of the open nodes, updated after every node
+        open_bounds = [node.upper_bound for node in in_flight.values()]
+        if len(queue) > 0:
+            open_bounds.append(queue.bound())
+        best_bound = min(best_bound, max(open_bounds + [incumbent]))
+        if callbacks and best_bound != reported_bound:
+            emit(callbacks, BoundUpdated(best_bound, reported_bound, incumbent))
+            reported_bound = best_bound
+        if checkpoint is not None and time.time() - last_checkpoint >= checkpoint_interval:
+            save_checkpoint()
+            last_checkpoint = time.time()
+
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+    if combo_executor is not None:
+        combo_executor.shutdown(wait=False)
+    if callbacks and best_bound != reported_bound:
+        # all open nodes were pruned
+        emit(callbacks, BoundUpdated(best_bound, reported_bound, incumbent))
+    timed_out = (incumbent < best_bound and abs(best_bound - incumbent) / best_bound > global_threshold
+                 and (len(queue) > 0 or len(in_flight) > 0))
+    if checkpoint is not None and timed_out:
+        # the search can be continued with more time or a smaller gap
+        save_checkpoint()
+    # the states of a search stopped with open nodes are 3 to 5, or 10 to 12 if troika stopped it on the global gap
+    stopped_state = 10 if stopped_on_gap else 3
+    stats["open_nodes"] = stats.get("open_nodes", 0) + len(queue) + len(in_flight)
     if best_combo.is_integer:
         if best_combo.lower_bound <= best_combo.upper_bound:
             obj_val, var_vals = post_processing(best_combo.var_vals, Graph)
-            return output(develop_mode, 6, obj_val, obj_val,
+            return output(develop_mode, stopped_state if timed_out else 6, obj_val, best_bound if timed_out else obj_val,
                             decluster_communities(model_to_communities(var_vals, Graph), Graph,
                                                 isolated_nodes), preprocessing_time, formulation_time,
-                            time.time() - solve_start + root_time)
+                            time.time() - solve_start + root_time + resumed_time, stats=stats)
         else:
-            return output(develop_mode, 7, best_combo.lower_bound, best_lp.upper_bound, best_combo.combo_communities,
-                            preprocessing_time, formulation_time, time.time() - solve_start + root_time)
+            return output(develop_mode, stopped_state + 1 if timed_out else 7, best_combo.lower_bound, best_bound,
+                            best_combo.combo_communities, preprocessing_time, formulation_time,
+                            time.time() - solve_start + root_time + resumed_time, stats=stats)
     else:
-        return output(develop_mode, 8, best_combo.lower_bound, best_lp.upper_bound, best_combo.combo_communities,
-                        preprocessing_time, formulation_time, time.time() - solve_start + root_time)
+        return output(develop_mode, stopped_state + 2 if timed_out else 8, best_combo.lower_bound, best_bound,
+                        best_combo.combo_communities, preprocessing_time, formulation_time,
+                        time.time() - solve_start + root_time + resumed_time, stats=stats)
+
+
+# state of a node worker process, see init_node_worker
+_node_worker = {}
+
+
+def init_node_worker(Graph, orig_graph, isolated_nodes, list_of_cut_triads, lp_method, lazy_constraints, separate,
+                     lp_rounding=False, solver="gurobi"):
+    """
+    Initializer of the worker processes of alg: builds the worker's own copy of the root model and the root
+    BranchGraph, on which the graphs of the nodes are replayed from their changes (see detached_node).
+    The rows are added in the same order as in the coordinator's model, so the bases of the nodes are valid in both
+    """
+    global start_separate
+    start_separate = separate
+    model, _ = build_lp_model(Graph, list_of_cut_triads, lp_method, lazy=lazy_constraints, solver=solver)
+    # the parallelism comes from the workers
+    model.set_threads(1)
+    model.use_dual_simplex()
+    _node_worker.update(model=model, Graph=Graph, orig_graph=orig_graph, isolated_nodes=isolated_nodes,
+                        root_graph=BranchGraph.from_graph(Graph, branching_delta(orig_graph)),
+                        combo_executor=ThreadPoolExecutor(max_workers=1),
+                        cut_triads=cut_triad_arrays(Graph, list_of_cut_triads),
+                        rounding=rounding_arrays(Graph, orig_graph, isolated_nodes) if lp_rounding else None)
+
+
+def evaluate_node(node, incumbent, record_events=False):
+    """
+    Worker task: branches on node (see detached_node) with the worker's model and returns both children, the
+    statistics of the node and, if record_events, its LPSolved events (else None). The graphs of the children are
+    returned as their changes from the graph of node, see attach_children
+    """
+    stats = {}
+    events = [] if record_events else None
+    changes = node.graph
+    node.graph = _node_worker["root_graph"].replay(changes)
+    left_node, right_node = perform_branch(node, _node_worker["model"], incumbent, _node_worker["Graph"],
+                                           _node_worker["orig_graph"], _node_worker["isolated_nodes"],
+                                           _node_worker["cut_triads"], stats, _node_worker["rounding"], events,
+                                           _node_worker["combo_executor"])
+    # the IP leaf is returned as both children
+    for child in {left_node, right_node}:
+        child.graph = child.graph.changes()[len(changes):]
+    return left_node, right_node, stats, events
+
+
+def attach_children(node, left_node, right_node):
+    """
+    Replays the graphs of the children returned by evaluate_node on the graph of node, so that they share the
+    coordinator's tree of graphs
+    """
+    for child in {left_node, right_node}:
+        child.graph = node.graph.replay(child.graph)
+    return left_node, right_node
 
 
-def left_implied(left_fix_ones, left_fix_zeros, branch_triple):
+def child_status(node):
     """
-    Implied variable fixing for the left branch
+    Returns (lower_bound, upper_bound, status) of a child of a branch, see NodeEvaluated
     """
-    ones = left_fix_ones.copy()
-    zeros = left_fix_zeros.copy()
-    i = branch_triple[0]
-    j = branch_triple[1]
-    k = branch_triple[2]
-    for var in left_fix_zeros:
-        first, second = var.split(",")
-        if first == i:
-            zeros.append(str(j) + "," + second)
-            zeros.append(str(k) + "," + second)
-            # FIX corresponding vars to 0 and append to left_fix_zeros
-    for var in left_fix_ones:
-        first, second = var.split(",")
-        if first == i:
-            # FIX corresponding vars to 1 and append to left_fix_ones
-            ones.append(str(j) + "," + second)
-            ones.append(str(k) + "," + second)
-    return zeros, ones
+    if node.is_infeasible:
+        status = "infeasible"
+    elif node.is_integer:
+        status = "integer"
+    elif node.close:
+        status = "pruned"
+    else:
+        status = "open"
+    return node.lower_bound, node.upper_bound, status
 
 
-def right_implied(right_fix_zeros, branch_triple):
+def detached_node(node):
     """
-    Implied variable fixing for the right branch
+    Returns a shallow copy of node without its links into the tree, i.e. what is sent to a worker process. Its graph
+    is replaced by the changes from the root (see BranchGraph.changes), which the worker replays on its own root
+    """
+    copy = Node.__new__(Node)
+    copy.__dict__.update(node.__dict__)
+    copy.parent = copy.left = copy.right = None
+    copy.graph = node.graph.changes()
+    return copy
+
+
+def ragged_arrays(parts, dtype, width=None):
+    """
+    Concatenates the sequences parts (of rows of width values, if given) into one array and returns it with the
+    indptr array of their boundaries, as graph_to_arrays does for the members of the supernodes
+    """
+    shape = (-1,) if width is None else (-1, width)
+    indptr = np.zeros(len(parts) + 1, dtype=np.int64)
+    np.cumsum([len(part) for part in parts], out=indptr[1:])
+    flat = np.concatenate([np.empty((0,) + shape[1:], dtype=dtype)]
+                          + [np.asarray(part, dtype=dtype).reshape(shape) for part in parts])
+    return flat, indptr
+
+
+def ragged_lists(flat, indptr):
+    """
+    Inverse of ragged_arrays, as lists of python values
+    """
+    flat = flat.tolist()
+    return [flat[indptr[k]:indptr[k + 1]] for k in range(len(indptr) - 1)]
+
+
+def stats_arrays(stats):
+    return {"stat_names": np.array(list(stats), dtype=str),
+            "stat_values": np.array(list(stats.values()), dtype=np.float64)}
+
+
+def stats_from_arrays(arrays):
+    return {name: int(value) if value.is_integer() else value
+            for name, value in zip(arrays["stat_names"].tolist(), arrays["stat_values"].tolist())}
+
+
+def search_state_arrays(open_nodes, incumbent, best_bound, best_combo, stats, elapsed):
+    """
+    Returns the state of a search as arrays for a checkpoint (see restore_search_state): the bounds, the node of the
+    incumbent, the statistics, the Combo mode and the open nodes with their bounds, levels, branching constraints,
+    fixings, LP solutions and the changes of their graphs from the root. The bases of the nodes are left out
+    """
+    arrays = {
+        "incumbent": np.float64(incumbent),
+        "best_bound": np.float64(best_bound),
+        "elapsed": np.float64(elapsed),
+        "start_separate": np.int8(-1 if start_separate is None else start_separate),
+        "best_bounds": np.array([best_combo.lower_bound, best_combo.upper_bound], dtype=np.float64),
+        "best_is_integer": np.bool_(best_combo.is_integer),
+        "open_bounds": np.array([[node.lower_bound, node.upper_bound] for node in open_nodes],
+                                dtype=np.float64).reshape(-1, 2),
+        "open_levels": np.array([node.level for node in open_nodes], dtype=np.int64),
+        **stats_arrays(stats),
+    }
+    if best_combo.is_integer:
+        arrays["best_var_vals"] = np.asarray(best_combo.var_vals, dtype=np.float64)
+    for name, parts, dtype, width in (
+            ("best_communities", best_combo.combo_communities, np.int64, None),
+            ("open_constraints", [node.constraints for node in open_nodes], np.int64, 4),
+            ("open_changes", [node.graph.changes() for node in open_nodes], np.int64, 4),
+            ("open_fixed_ones", [node.fixed_ones for node in open_nodes], np.int64, None),
+            ("open_fixed_zeros", [node.fixed_zeros for node in open_nodes], np.int64, None),
+            ("open_var_vals", [node.var_vals for node in open_nodes], np.float64, None)):
+        arrays[name], arrays[name + "_indptr"] = ragged_arrays(parts, dtype, width)
+    return arrays
+
+
+def restore_search_state(arrays, root_graph):
+    """
+    Inverse of search_state_arrays: returns incumbent, best_bound, the node of the incumbent, the open nodes and
+    the statistics. The graphs of the open nodes are replayed from root_graph, a root BranchGraph
+    """
+    def rows(name):
+        return arrays[name], arrays[name + "_indptr"]
+
+    best_combo = Node([], arrays.get("best_var_vals"), None, ragged_lists(*rows("best_communities")))
+    best_combo.set_bounds(*arrays["best_bounds"].tolist())
+    if arrays["best_is_integer"]:
+        best_combo.set_is_integer()
+    best_combo.close_node()
+
+    open_nodes = []
+    constraints, changes, fixed_ones, fixed_zeros = (ragged_lists(*rows(name)) for name in (
+        "open_constraints", "open_changes", "open_fixed_ones", "open_fixed_zeros"))
+    var_vals, var_vals_indptr = rows("open_var_vals")
+    for k, (bounds, level) in enumerate(zip(arrays["open_bounds"].tolist(), arrays["open_levels"].tolist())):
+        node = Node([tuple(row) for row in constraints[k]], var_vals[var_vals_indptr[k]:var_vals_indptr[k + 1]].copy(),
+                    root_graph.replay(changes[k]), [])
+        node.set_bounds(*bounds)
+        node.set_level(level)
+        node.set_fixed_ones(fixed_ones[k])
+        node.set_fixed_zeros(fixed_zeros[k])
+        # left branching merged the supernodes b and c of the root graph's nodes into a, see reduce_triple
+        supernodes = np.arange(root_graph.number_of_nodes())
+        for kind, a, b, c in changes[k]:
+            if kind == 0:
+                supernodes = np.where(np.isin(supernodes, (b, c)), a, supernodes)
+        node.supernodes = supernodes
+        open_nodes.append(node)
+    return (float(arrays["incumbent"]), float(arrays["best_bound"]), best_combo, open_nodes,
+            stats_from_arrays(arrays))
+
+
+def pair_nodes(pairs, n):
+    """
+    Inverse of pair_index: returns the node arrays (i, j) of the pair indices in pairs
+    """
+    first, second = np.triu_indices(n, k=1)
+    return first[pairs], second[pairs]
+
+
+def propagate_fixings(fixed_ones, fixed_zeros, constraints, n, stats=None):
+    """
+    Returns the closure (fixed_ones, fixed_zeros, classes) of the fixings (pair indices of a graph with n nodes) and
+    branching constraints (i, j, k, t) of a node, or None if they contradict each other.
+    Pairs fixed to 0 and the triples of left branching constraints (t = 0) are in the same cluster: their nodes are
+    merged into classes, the connected components of these pairs, and every pair inside a class is fixed to 0. A pair
+    fixed to 1 separates the classes of its nodes, so every pair between them is fixed to 1. A right branching
+    constraint (t = 2) allows at most one of its pairs inside a class; the other two are then fixed to 1.
+    The fixings added and the contradictions are counted in stats
+    """
+    first, second = np.triu_indices(n, k=1)
+    constraints = np.asarray(constraints, dtype=np.int64).reshape(-1, 4)
+    left, right = constraints[constraints[:, 3] == 0, :3], constraints[constraints[:, 3] == 2, :3]
+    together_a = np.concatenate((first[fixed_zeros], left[:, 0], left[:, 0]))
+    together_b = np.concatenate((second[fixed_zeros], left[:, 1], left[:, 2]))
+    classes = connected_components(sp.coo_matrix((np.ones(len(together_a)), (together_a, together_b)), shape=(n, n)),
+                                   directed=False)[1]
+
+    apart_a, apart_b = [first[fixed_ones]], [second[fixed_ones]]
+    i, j, k = classes[right[:, 0]], classes[right[:, 1]], classes[right[:, 2]]
+    if np.any((i == j).astype(int) + (j == k) + (i == k) > 1):
+        if stats is not None:
+            stats["contradicting_fixings"] = stats.get("contradicting_fixings", 0) + 1
+        return None
+    for together, (a, b), (c, d) in (((i == j), (0, 2), (1, 2)), ((j == k), (0, 1), (0, 2)),
+                                     ((i == k), (0, 1), (1, 2))):
+        apart_a += [right[together, a], right[together, c]]
+        apart_b += [right[together, b], right[together, d]]
+    apart_a, apart_b = classes[np.concatenate(apart_a)], classes[np.concatenate(apart_b)]
+    if np.any(apart_a == apart_b):
+        if stats is not None:
+            stats["contradicting_fixings"] = stats.get("contradicting_fixings", 0) + 1
+        return None
+
+    first, second = classes[first], classes[second]
+    zeros = np.flatnonzero(first == second)
+    apart = np.unique(np.minimum(apart_a, apart_b) * n + np.maximum(apart_a, apart_b))
+    ones = np.flatnonzero(np.isin(np.minimum(first, second) * n + np.maximum(first, second), apart))
+    if stats is not None:
+        stats["implied_fixings"] = (stats.get("implied_fixings", 0) + len(ones) + len(zeros)
+                                    - len(np.unique(fixed_ones)) - len(np.unique(fixed_zeros)))
+    return ones, zeros, classes
+
+
+def right_implied(classes, branch_triple):
+    """
+    Implied branching constraints for the right branch on branch_triple: a node s in the class (see
+    propagate_fixings) of one of i, j and k takes its place in the branching constraint
     """
-    i = branch_triple[0]
-    j = branch_triple[1]
-    k = branch_triple[2]
     constraints_to_be_added = []
-    for var in right_fix_zeros:
-        first, second = var.split(",")
-        if first == i:
-            constraint = [int(second), int(j), int(k)]
-            constraint.sort()
-            constraint_tup = (constraint[0], constraint[1], constraint[2], 2)
-            constraints_to_be_added.append(constraint_tup)
+    for node in branch_triple:
+        others = [other for other in branch_triple if other != node]
+        for s in np.flatnonzero(classes == classes[node]).tolist():
+            constraint = tuple(sorted([s] + others)) + (2,)
+            if s not in branch_triple and constraint not in constraints_to_be_added:
+                constraints_to_be_added.append(constraint)
     return constraints_to_be_added
 
 
-def perform_branch(node, model, incumbent, Graph, original_graph, isolated_nodes, list_of_cut_triads):
+def triple_columns(triple, n):
+    """
+    Returns the pair indices of x_ij, x_jk and x_ik of the triple (i, j, k), i < j < k
+    """
+    i, j, k = triple[0], triple[1], triple[2]
+    return [pair_index(i, j, n), pair_index(j, k, n), pair_index(i, k, n)]
+
+
+def sync_branch_constraints(model, constraints, n):
+    """
+    Makes the branching constraints of model those of the list constraints, whose entries (i, j, k, t) stand for
+    x_ij + x_jk + x_ik = 0 (t = 0) or >= 2 (t = 2). The rows are kept as a stack on the model: only the rows after
+    the common prefix with the previously solved node are removed, and only the missing ones are added
+    """
+    stack = getattr(model, "_branch_stack", None)
+    if stack is None:
+        stack = model._branch_stack = []
+    common = 0
+    while common < min(len(stack), len(constraints)) and stack[common][0] == tuple(constraints[common]):
+        common += 1
+    if len(stack) > common:
+        model.remove_rows([row for _, row in stack[common:]])
+    del stack[common:]
+    for constr in constraints[common:]:
+        # t = 0 makes the row an equation
+        row = model.add_row(triple_columns(constr, n), [1.0, 1.0, 1.0], '=' if constr[3] == 0 else '>',
+                            float(constr[3]))
+        stack.append((tuple(constr), row))
+    model.update()
+
+
+def row_basis(cbasis):
+    """
+    Returns the CBasis array of the triangle rows as (number of rows, indices of the nonbasic rows, their CBasis).
+    At an LP optimum most triangle rows are basic (0), so an open node keeps a small fraction of a dense array
+    """
+    rows = np.flatnonzero(cbasis)
+    return len(cbasis), rows.astype(np.int32), np.asarray(cbasis, dtype=np.int8)[rows]
+
+
+def lp_basis(model):
+    """
+    Returns the optimal basis of the last LP solve of model as (VBasis, row_basis of the triangle rows, CBasis of
+    the branching rows by constraint), or None if there is none, e.g. after barrier without crossover or with HiGHS.
+    Models with lazy triangle constraints are not warm-started, their rows change between the solves
+    """
+    if getattr(model, "_lazy_triangles", None) is not None:
+        return None
+    basis = model.basis()
+    if basis is None:
+        return None
+    vbasis, cbasis = basis
+    stack = getattr(model, "_branch_stack", [])
+    num_triangle_rows = len(cbasis) - len(stack)
+    return (vbasis, row_basis(cbasis[:num_triangle_rows]),
+            dict(zip((key for key, _ in stack), cbasis[num_triangle_rows:].tolist())))
+
+
+def set_lp_basis(model, basis):
+    """
+    Warm-starts the next solve of model from basis (see lp_basis). Branching rows the basis does not know about,
+    e.g. the one that makes a child differ from its parent, start with their slack basic
+    """
+    if basis is None:
+        return
+    vbasis, (num_triangle_rows, rows, statuses), branch_cbasis = basis
+    stack = getattr(model, "_branch_stack", [])
+    cbasis = np.zeros(num_triangle_rows + len(stack), dtype=np.int8)
+    cbasis[rows] = statuses
+    cbasis[num_triangle_rows:] = [branch_cbasis.get(key, 0) for key, _ in stack]
+    model.set_basis(vbasis, cbasis)
+
+
+def solve_branch_lp(model, Graph, fixed_ones, fixed_zeros, basis, stats=None, events=None, kind="branch"):
+    """
+    run_lp warm-started from basis; the solve time and simplex iterations are added to stats if given, and an
+    LPSolved event of the given kind is appended to the list events if given
     """
-    Perform the left and right branch on input node
+    start = time.time()
+    set_lp_basis(model, basis)
+    upper_bound, var_vals, model = run_lp(model, Graph, fixed_ones, fixed_zeros)
+    elapsed = time.time() - start
+    if stats is not None:
+        stats["branch_lps"] = stats.get("branch_lps", 0) + 1
+        stats["branch_lp_time"] = stats.get("branch_lp_time", 0.0) + elapsed
+        stats["branch_lp_iterations"] = stats.get("branch_lp_iterations", 0) + model.iterations
+    if events is not None:
+        events.append(LPSolved(kind, None if var_vals is None else upper_bound, model.iterations, elapsed))
+    return upper_bound, var_vals, model
+
+
+def perform_branch(node, model, incumbent, Graph, original_graph, isolated_nodes, cut_triads, stats=None,
+                   rounding=None, events=None, combo_executor=None):
     """
-    violated_triples_dict = node.get_violated_triples(list_of_cut_triads)    
+    Perform the left and right branch on input node. cut_triads is the output of cut_triad_arrays. The Combo runs on
+    both children overlap with the LP solves, on combo_executor (a single-thread ThreadPoolExecutor kept for the
+    whole search; without it one is made for this branch). With rounding (the output of rounding_arrays) the
+    children's LP solutions are rounded as well (see round_node).
+    Both child LPs differ from the LP of node by one branching row and are solved from its basis.
+    The time of every phase is added to stats, and the LPSolved events are appended to the list events if given
+    """
+    start = time.time()
+    violated_triples_dict = node.get_violated_triples(cut_triads)
+    add_time(stats, "triad_scan_time", start)
+    n = Graph.number_of_nodes()
     prev_fixed_ones = node.get_fixed_ones().copy()
     prev_fixed_zeros = node.get_fixed_zeros().copy()
 
     if len(violated_triples_dict) == 0:
-        print('Solving IP')
-        count = 0
-        for constr in node.constraints:
-            x_ij = model.getVarByName(str(constr[0]) + "," + str(constr[1]))
-            x_jk = model.getVarByName(str(constr[1]) + "," + str(constr[2]))
-            x_ik = model.getVarByName(str(constr[0]) + "," + str(constr[2]))
-            if constr[3] == 0:
-                model.addConstr(x_ij + x_jk + x_ik == 0, 'branch_' + str(count))
-            else:
-                model.addConstr(x_ij + x_jk + x_ik >= 2, 'branch_' + str(count))
+        start = time.time()
+        sync_branch_constraints(model, node.constraints, n)
         upper_bound, var_vals, model = run_ip(model, Graph, prev_fixed_ones, prev_fixed_zeros)
+        if events is not None:
+            events.append(LPSolved("ip", None if var_vals is None else upper_bound, model.iterations,
+                                   time.time() - start))
+        model = reset_model_variables(model, prev_fixed_ones, prev_fixed_zeros)
+        add_time(stats, "ip_time", start)
 
-        leaf_node = Node(node.constraints, var_vals, Graph, [])
-        if upper_bound == -1 and var_vals == -1:
+        leaf_node = Node(node.constraints, var_vals, node.graph, [])
+        leaf_node.supernodes = node.supernodes
+        # an optimal IP solution is a partition, so it is its own lower bound
+        leaf_node.set_bounds(node.lower_bound if var_vals is None else upper_bound, upper_bound)
+        if var_vals is None:
             leaf_node.close_node()
             leaf_node.set_is_infeasible()
-            print('Infeasible IP Solution')
         else:
             if is_integer_solution(Graph, var_vals):
-                print("IP solution is integer")
                 leaf_node.set_is_integer()
                 leaf_node.close_node()
             if upper_bound <= incumbent:
                 leaf_node.close_node()
         return leaf_node, leaf_node
     
+    # the nodes keep their changes from node.graph, the materialized graphs of the children only while they are open
+    # and fit in the graph cache of the tree
+    start = time.time()
+    graph = node.graph.materialize()
+    add_time(stats, "graph_transform_time", start)
     # Select triple based on most common nodes with previous triple
-    branch_triple = get_best_triple(violated_triples_dict, node, Graph)
-    print("======== BRANCHING ON " + str(branch_triple) + " ========")
-    x_ij = model.getVarByName(str(branch_triple[0]) + "," + str(branch_triple[1]))
-    x_jk = model.getVarByName(str(branch_triple[1]) + "," + str(branch_triple[2]))
-    x_ik = model.getVarByName(str(branch_triple[0]) + "," + str(branch_triple[2]))
+    start = time.time()
+    branch_triple = get_best_triple(violated_triples_dict, node, Graph, graph)
+    graph_triple = node.supernodes[list(branch_triple)].tolist()
+    add_time(stats, "triple_selection_time", start)
+
+    # the children's graphs only depend on the triple, so Combo runs on them in the background while the LPs are
+    # solved; graph is not needed anymore after the left copy, the right child's graph is made from it in place
+    start = time.time()
+    left_graph, left_supernodes = reduce_triple(graph, branch_triple, node.graph.delta, node.supernodes)
+    right_graph = graph
+    shift_triple(right_graph, graph_triple, node.graph.delta)
+    add_time(stats, "graph_transform_time", start)
+    # the background runs get the settled Combo mode and statistics of their own, which are merged after the join,
+    # so they share no state with this thread
+    executor = combo_executor if combo_executor is not None else ThreadPoolExecutor(max_workers=1)
+    combo_stats = {}, {}
+    left_combo = executor.submit(run_combo, left_graph, original_graph, isolated_nodes, stats=combo_stats[0],
+                                 separate=start_separate)
+    right_combo = executor.submit(run_combo, right_graph, original_graph, isolated_nodes, stats=combo_stats[1],
+                                  separate=start_separate)
+    if combo_executor is None:
+        executor.shutdown(wait=False)
 
     # Left branch x_ij + x_jk + x_ik = 0
-    count = 0
-    if node.constraints == []:
-        model.addConstr(x_ij + x_jk + x_ik == 0, 'branch_0')
-        count += 1
-    else:
-        model.addConstr(x_ij + x_jk + x_ik == 0, 'branch_0')
-        count += 1
-        for constr in node.constraints:
-            x_ij = model.getVarByName(str(constr[0]) + "," + str(constr[1]))
-            x_jk = model.getVarByName(str(constr[1]) + "," + str(constr[2]))
-            x_ik = model.getVarByName(str(constr[0]) + "," + str(constr[2]))
-            if constr[3] == 0:
-                model.addConstr(x_ij + x_jk + x_ik == 0, 'branch_' + str(count))
-            else:
-                model.addConstr(x_ij + x_jk + x_ik >= 2, 'branch_' + str(count))
-            count += 1
-    model.update()
-
-    left_upper_bound, left_var_vals, model = run_lp(model, Graph, prev_fixed_ones, prev_fixed_zeros)
-    if not (left_upper_bound == -1 and left_var_vals == -1):
-        left_fix_ones, left_fix_zeros = reduced_cost_variable_fixing(model, left_var_vals, left_upper_bound, incumbent)
-        model = reset_model_variables(model, prev_fixed_ones, prev_fixed_zeros)
-        implied_zeros, implied_ones = left_implied(left_fix_ones, left_fix_zeros, branch_triple)
-
-    # remove all cutting plane constraints after solving
-    for i in range(count):
-        model.remove(model.getConstrByName('branch_' + str(i)))
-    model.update()
-
-    left_graph = reduce_triple(node.graph, branch_triple, original_graph)
-    left_lower_bound, left_decluster_combo = run_combo(left_graph, original_graph, isolated_nodes)
-
     left_constraints = node.constraints.copy()
     left_constraints.append(branch_triple + (0,))
-    left_node = Node(left_constraints, left_var_vals, left_graph, left_decluster_combo)
+    # the child's LP is solved with everything its constraints imply fixed; a contradiction makes it infeasible
+    left_upper_bound, left_var_vals = -1, None
+    start = time.time()
+    left_fixed = propagate_fixings(prev_fixed_ones, prev_fixed_zeros, left_constraints, n, stats)
+    add_time(stats, "fixing_time", start)
+    if left_fixed is not None:
+        sync_branch_constraints(model, left_constraints, n)
+        left_upper_bound, left_var_vals, model = solve_branch_lp(model, Graph, left_fixed[0], left_fixed[1],
+                                                                 node.basis, stats, events, "left")
+        if left_var_vals is not None:
+            left_basis = lp_basis(model)
+            start = time.time()
+            left_fix_ones, left_fix_zeros = reduced_cost_variable_fixing(model, left_var_vals, left_upper_bound,
+                                                                         incumbent)
+            left_fixed_after = propagate_fixings(np.concatenate((left_fixed[0], left_fix_ones)),
+                                                 np.concatenate((left_fixed[1], left_fix_zeros)),
+                                                 left_constraints, n, stats)
+            add_time(stats, "fixing_time", start)
+        model = reset_model_variables(model, left_fixed[0], left_fixed[1])
+
+    combo_wait_start = time.time()
+    left_lower_bound, left_decluster_combo = left_combo.result()
+    add_time(stats, "combo_wait_time", combo_wait_start)
+
+    left_node = Node(left_constraints, left_var_vals, node.graph.merge(graph_triple), left_decluster_combo)
+    left_node.supernodes = left_supernodes
     left_node.set_bounds(left_lower_bound, left_upper_bound)
 
-    if left_upper_bound == -1 and left_var_vals == -1:
+    if left_var_vals is None:
         left_node.close_node()
         left_node.set_is_infeasible()
     else:
-        left_node.set_fixed_ones(prev_fixed_ones + left_fix_ones + implied_ones)
-        left_node.set_fixed_zeros(prev_fixed_zeros + left_fix_zeros + implied_zeros)
+        left_node.basis = left_basis
+        if rounding is not None:
+            round_node(left_node, rounding, stats)
+        if left_fixed_after is not None:
+            left_node.set_fixed_ones(left_fixed_after[0])
+            left_node.set_fixed_zeros(left_fixed_after[1])
+        else:
+            # the reduced cost fixings contradict each other, no partition in the subtree beats the incumbent
+            left_node.close_node()
         if is_integer_solution(left_graph, left_var_vals):
-            print("LP solution is integer")
-            print('left_upper_bound', left_upper_bound)
             left_node.set_is_integer()
             left_node.close_node()
         if left_upper_bound <= incumbent:
             left_node.close_node()
 
     # Right branch x_ij + x_jk + x_ik >= 2
-    x_ij = model.getVarByName(str(branch_triple[0]) + "," + str(branch_triple[1]))
-    x_jk = model.getVarByName(str(branch_triple[1]) + "," + str(branch_triple[2]))
-    x_ik = model.getVarByName(str(branch_triple[0]) + "," + str(branch_triple[2]))
-    count = 0
-    if node.constraints == []:
-        model.addConstr(x_ij + x_jk + x_ik >= 2, 'branch_0')
-        count += 1
-    else:
-        model.addConstr(x_ij + x_jk + x_ik >= 2, 'branch_0')
-        count += 1
-        for constr in node.constraints:
-            x_ij = model.getVarByName(str(constr[0]) + "," + str(constr[1]))
-            x_jk = model.getVarByName(str(constr[1]) + "," + str(constr[2]))
-            x_ik = model.getVarByName(str(constr[0]) + "," + str(constr[2]))
-            if constr[3] == 0:
-                model.addConstr(x_ij + x_jk + x_ik == 0, 'branch_' + str(count))
-            else:
-                model.addConstr(x_ij + x_jk + x_ik >= 2, 'branch_' + str(count))
-            count += 1
-    model.update()
-
-    right_upper_bound, right_var_vals, model = run_lp(model, Graph, prev_fixed_ones, prev_fixed_zeros)
-
-    implied_constraints = []
-    if not (right_upper_bound == -1 and right_var_vals == -1):
-        right_fix_ones, right_fix_zeros = reduced_cost_variable_fixing(model, right_var_vals, right_upper_bound,
-                                                                       incumbent)
-        model = reset_model_variables(model, prev_fixed_ones, prev_fixed_zeros)
-        implied_constraints = right_implied(right_fix_zeros, branch_triple)
-
-    for i in range(count):
-        model.remove(model.getConstrByName('branch_' + str(i)))
-    model.update()
-
-    right_graph = alter_weight(node.graph, branch_triple, original_graph)
-    right_lower_bound, right_decluster_combo = run_combo(right_graph, original_graph, isolated_nodes)
-
     right_constraints = node.constraints.copy()
     right_constraints.append(branch_triple + (2,))
+    right_upper_bound, right_var_vals = -1, None
+    implied_constraints = []
+    start = time.time()
+    right_fixed = propagate_fixings(prev_fixed_ones, prev_fixed_zeros, right_constraints, n, stats)
+    add_time(stats, "fixing_time", start)
+    if right_fixed is not None:
+        sync_branch_constraints(model, right_constraints, n)
+        right_upper_bound, right_var_vals, model = solve_branch_lp(model, Graph, right_fixed[0], right_fixed[1],
+                                                                   node.basis, stats, events, "right")
+        if right_var_vals is not None:
+            right_basis = lp_basis(model)
+            start = time.time()
+            right_fix_ones, right_fix_zeros = reduced_cost_variable_fixing(model, right_var_vals, right_upper_bound,
+                                                                           incumbent)
+            right_fixed_after = propagate_fixings(np.concatenate((right_fixed[0], right_fix_ones)),
+                                                  np.concatenate((right_fixed[1], right_fix_zeros)),
+                                                  right_constraints, n, stats)
+            add_time(stats, "fixing_time", start)
+            if right_fixed_after is not None:
+                implied_constraints = right_implied(right_fixed_after[2], branch_triple)
+        model = reset_model_variables(model, right_fixed[0], right_fixed[1])
+    # both children have been solved from it
+    node.basis = None
+
+    combo_wait_start = time.time()
+    right_lower_bound, right_decluster_combo = right_combo.result()
+    add_time(stats, "combo_wait_time", combo_wait_start)
+    if stats is not None:
+        for key, value in chain(*(combo.items() for combo in combo_stats)):
+            stats[key] = stats.get(key, 0) + value
+
     right_constraints += implied_constraints
-    right_node = Node(right_constraints, right_var_vals, right_graph, right_decluster_combo)
+    right_node = Node(right_constraints, right_var_vals, node.graph.shift(graph_triple), right_decluster_combo)
+    right_node.supernodes = node.supernodes
     right_node.set_bounds(right_lower_bound, right_upper_bound)
 
-    if right_upper_bound == -1 and right_var_vals == -1:
+    if right_var_vals is None:
         right_node.close_node()
         right_node.set_is_infeasible()
     else:
-        right_node.set_fixed_ones(prev_fixed_ones + right_fix_ones)
-        right_node.set_fixed_zeros(prev_fixed_zeros + right_fix_zeros)
+        right_node.basis = right_basis
+        if rounding is not None:
+            round_node(right_node, rounding, stats)
+        if right_fixed_after is not None:
+            right_node.set_fixed_ones(right_fixed_after[0])
+            right_node.set_fixed_zeros(right_fixed_after[1])
+        else:
+            right_node.close_node()
         if is_integer_solution(right_graph, right_var_vals):
-            print("LP solution is integer")
-            print('right_upper_bound', right_upper_bound)
             right_node.set_is_integer()
             right_node.close_node()
         if right_upper_bound <= incumbent:
             right_node.close_node()
 
+    # the open children are likely branched on soon, so their graphs are kept rather than replayed again
+    for child, child_graph in ((left_node, left_graph), (right_node, right_graph)):
+        if not child.close:
+            child.graph.keep(child_graph)
     return left_node, right_node
@@ -0,0 +1,173 @@
+import hashlib
+import os
+import tempfile
+
+import networkx as nx
+import numpy as np
+
+
+def graph_fingerprint(G, weight="weight"):
+    """
+    Returns a content hash of the weighted graph G, i.e. of its node labels and its (u, v, weight) edge list.
+    The hash does not depend on the insertion order of nodes or edges
+    """
+    nodes = np.sort(np.fromiter(G.nodes(), dtype=np.int64, count=G.number_of_nodes()))
+    edges = np.array([(min(u, v), max(u, v)) for u, v in G.edges()], dtype=np.int64).reshape(-1, 2)
+    weights = np.array([data[weight] for _, _, data in G.edges(data=True)], dtype=np.float64)
+    order = np.lexsort((edges[:, 1], edges[:, 0]))
+    digest = hashlib.sha256()
+    digest.update(b"troika-graph-v1")
+    digest.update(nodes.tobytes())
+    digest.update(edges[order].tobytes())
+    digest.update(weights[order].tobytes())
+    return digest.hexdigest()
+
+
+def graph_to_arrays(Graph):
+    """
+    Flattens a reduced troika graph (integer nodes 0..n-1 with 'super node of' lists) into numpy arrays
+    """
+    n = Graph.number_of_nodes()
+    members = [Graph.nodes[i]['super node of'] for i in range(n)]
+    members_indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum([len(m) for m in members], out=members_indptr[1:])
+    edges = list(Graph.edges(data=True))
+    return {
+        "graph_num_nodes": np.int64(n),
+        "graph_members_indptr": members_indptr,
+        "graph_members": np.array([node for m in members for node in m], dtype=np.int64),
+        "graph_edges": np.array([(u, v) for u, v, _ in edges], dtype=np.int64).reshape(-1, 2),
+        "graph_weights": np.array([data['weight'] for _, _, data in edges], dtype=np.float64),
+        "graph_constrained": np.array([data['constrained_weight'] for _, _, data in edges], dtype=bool),
+    }
+
+
+def graph_from_arrays(arrays):
+    """
+    Inverse of graph_to_arrays
+    """
+    Graph = nx.Graph()
+    indptr = arrays["graph_members_indptr"]
+    members = arrays["graph_members"].tolist()
+    for i in range(int(arrays["graph_num_nodes"])):
+        Graph.add_node(i)
+        Graph.nodes[i]['super node of'] = members[indptr[i]:indptr[i + 1]]
+    for (u, v), w, c in zip(arrays["graph_edges"].tolist(), arrays["graph_weights"].tolist(),
+                            arrays["graph_constrained"].tolist()):
+        Graph.add_edge(u, v, weight=w, constrained_weight=c)
+    return Graph
+
+
+def save_arrays(path, compressed=False, **arrays):
+    """
+    Writes arrays to the .npz file path through a temporary file in the same directory
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            (np.savez_compressed if compressed else np.savez)(f, **arrays)
+        # atomic, a crash while writing never leaves a truncated file behind
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+class PreprocessingCache:
+    """
+    On-disk cache of preprocessing artifacts (reduced graph, cut triads, root LP) keyed by graph_fingerprint.
+    Every entry is a single .npz file; the total size is bounded by max_bytes with least-recently-used eviction
+    """
+
+    def __init__(self, cache_dir, max_bytes=1 << 30):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, key + ".npz")
+
+    def load(self, key):
+        """
+        Returns the dict of arrays stored under key, or None on a miss
+        """
+        path = self.path(key)
+        try:
+            with np.load(path) as data:
+                entry = {name: data[name] for name in data.files}
+        except (OSError, ValueError, EOFError):
+            return None
+        # the modification time is the recency used by evict(); another process may have evicted it meanwhile
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return entry
+
+    def store(self, key, **arrays):
+        """
+        Adds arrays to the entry under key (creating it if needed) and evicts old entries if the cache is full
+        """
+        entry = self.load(key) or {}
+        entry.update(arrays)
+        save_arrays(self.path(key), **entry)
+        self.evict(keep=key)
+
+    def evict(self, keep=None):
+        """
+        Removes the least recently used entries until the cache fits in max_bytes. Entries removed meanwhile by
+        another process sharing the directory are skipped
+        """
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".npz"):
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if keep is not None and path == self.path(keep):
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".npz"):
+                os.remove(os.path.join(self.cache_dir, name))
+
+
+class SearchCheckpoints:
+    """
+    Directory of checkpoints of troika searches, one compressed .npz file per connected component keyed by its
+    graph_fingerprint. An entry holds either the state of an unfinished search (see alg_steps) or the result of a
+    finished one (see troika), and is replaced as a whole on every save
+    """
+
+    def __init__(self, checkpoint_dir):
+        self.checkpoint_dir = checkpoint_dir
+        os.makedirs(checkpoint_dir, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.checkpoint_dir, key + ".npz")
+
+    def load(self, key):
+        """
+        Returns the dict of arrays saved under key, or None if there is none
+        """
+        try:
+            with np.load(self.path(key)) as data:
+                return {name: data[name] for name in data.files}
+        except (OSError, ValueError, EOFError):
+            return None
+
+    def save(self, key, **arrays):
+        save_arrays(self.path(key), compressed=True, **arrays)
@@ -0,0 +1,64 @@
+from collections import namedtuple
+
+
+class LPSolved(namedtuple("LPSolved", ["kind", "objective", "iterations", "time"])):
+    """
+    An LP of the search was solved. kind is "root", "left" or "right" (the children of a node) or "ip" (a node
+    without violated triples, solved as an IP); objective is None if the problem was infeasible, time is in seconds
+    """
+    __slots__ = ()
+
+
+class IncumbentImproved(namedtuple("IncumbentImproved", ["incumbent", "previous", "level"])):
+    """
+    The best lower bound (the objective value of the best partition found) rose from previous to incumbent at a node
+    of the given level; previous is None for the first incumbent of a search
+    """
+    __slots__ = ()
+
+
+class BoundUpdated(namedtuple("BoundUpdated", ["best_bound", "previous", "incumbent"])):
+    """
+    The global upper bound changed from previous to best_bound; previous is None for the first bound of a search
+    """
+    __slots__ = ()
+
+
+class NodeEvaluated(namedtuple("NodeEvaluated", ["level", "triple", "children", "incumbent", "best_bound", "timers",
+                                                 "counters"])):
+    """
+    A node was branched on. triple is the branching triple, None if the node was solved as an IP. children holds
+    (lower_bound, upper_bound, status) per child, status being "open", "pruned", "integer" or "infeasible".
+    timers are the seconds this node spent per phase (the "*_time" statistics, e.g. triad_scan_time,
+    triple_selection_time, graph_transform_time, branch_lp_time, fixing_time, combo_time), counters the search's
+    other statistics so far (nodes, branch_lp_iterations, implied_fixings, ...)
+    """
+    __slots__ = ()
+
+
+def emit(callbacks, event):
+    for callback in callbacks:
+        callback(event)
+
+
+def print_progress(event):
+    """
+    Subscriber that prints the progress of a search, as troika used to print it unconditionally
+    """
+    if isinstance(event, LPSolved):
+        if event.kind == "root":
+            print("initial lp upper bound", event.objective)
+    elif isinstance(event, IncumbentImproved):
+        if event.previous is None:
+            print("initial lower bound", event.incumbent)
+        else:
+            print("incumbent", event.incumbent, "at level", event.level)
+    elif isinstance(event, BoundUpdated):
+        print("Bounds", event.incumbent, event.best_bound)
+    elif isinstance(event, NodeEvaluated):
+        print('==============================================NODE AT LEVEL: ', event.level,
+              '==============================================')
+        if event.triple is None:
+            print("Solved as IP")
+        else:
+            print("======== BRANCHING ON " + str(event.triple) + " ========")
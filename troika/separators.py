@@ -0,0 +1,275 @@
+import numpy as np
+from collections import defaultdict
+from joblib import Parallel, delayed, parallel_backend, cpu_count
+
+
+def build_separator_csr(G):
+    """
+    Builds the flat arrays describing the auxiliary split digraph used for minimum s-t node cuts.
+    Every node v is split into vA = 2v and vB = 2v + 1 joined by an internal arc, and every edge (u, v)
+    becomes the arcs uB -> vA and vB -> uA, all with unit capacity (same digraph as networkx's
+    build_auxiliary_node_connectivity). Self loops never change a node cut and are dropped.
+    Returns the node labels and a dict of arrays that can be shipped to worker processes once
+    """
+    nodes = np.sort(np.fromiter(G.nodes(), dtype=np.int64, count=G.number_of_nodes()))
+    n = len(nodes)
+    index = {int(node): i for i, node in enumerate(nodes)}
+    rows, cols = [], []
+    for u, v in G.edges():
+        if u != v:
+            rows.append(index[u])
+            cols.append(index[v])
+    rows = np.asarray(rows, dtype=np.int64)
+    cols = np.asarray(cols, dtype=np.int64)
+    # symmetric adjacency in CSR order, i.e. sorted by the key u * n + v
+    adj_u = np.concatenate((rows, cols))
+    adj_v = np.concatenate((cols, rows))
+    keys = adj_u * n + adj_v
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    adj_u = adj_u[order]
+    adj_v = adj_v[order]
+    adj_indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(adj_u, minlength=n), out=adj_indptr[1:])
+
+    # forward arcs: 0..n-1 are the internal arcs vA -> vB, n + p is uB -> vA for CSR position p
+    num_forward = n + len(adj_u)
+    tail = np.empty(2 * num_forward, dtype=np.int64)
+    head = np.empty(2 * num_forward, dtype=np.int64)
+    tail[:n] = 2 * np.arange(n)
+    head[:n] = 2 * np.arange(n) + 1
+    tail[n:num_forward] = 2 * adj_u + 1
+    head[n:num_forward] = 2 * adj_v
+    # reverse arcs: arc a < num_forward is paired with a + num_forward
+    tail[num_forward:] = head[:num_forward]
+    head[num_forward:] = tail[:num_forward]
+    capacity = np.zeros(2 * num_forward, dtype=np.int32)
+    capacity[:num_forward] = 1
+
+    out_arcs = np.argsort(tail, kind="stable")
+    out_indptr = np.zeros(2 * n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(tail, minlength=2 * n), out=out_indptr[1:])
+
+    csr = {
+        "n": n,
+        "adj_indptr": adj_indptr,
+        "adj_indices": adj_v,
+        "adj_keys": keys,
+        "tail": tail,
+        "head": head,
+        "capacity": capacity,
+        "out_indptr": out_indptr,
+        "out_arcs": out_arcs,
+    }
+    return nodes, csr
+
+
+class SeparatorEngine:
+    """
+    Minimum s-t node cuts over a fixed split digraph. The residual and BFS buffers are allocated once
+    and reused for every pair the engine is asked about
+    """
+
+    def __init__(self, csr):
+        self.n = csr["n"]
+        self.adj_indptr = csr["adj_indptr"]
+        self.adj_indices = csr["adj_indices"]
+        self.adj_keys = csr["adj_keys"]
+        self.tail = csr["tail"]
+        self.head = csr["head"]
+        self.capacity = csr["capacity"]
+        self.out_indptr = csr["out_indptr"]
+        self.out_arcs = csr["out_arcs"]
+        self.num_forward = len(self.capacity) // 2
+        self.residual = np.empty_like(self.capacity)
+        self.level = np.full(2 * self.n, -1, dtype=np.int64)
+        self.alive = np.zeros(2 * self.n, dtype=bool)
+        self.sink_side = np.zeros(2 * self.n, dtype=bool)
+
+    def neighbors(self, u):
+        return self.adj_indices[self.adj_indptr[u]:self.adj_indptr[u + 1]]
+
+    def arc_position(self, u, v):
+        """
+        Returns the CSR positions of the edges (u, v), vectorized over v
+        """
+        return np.searchsorted(self.adj_keys, u * self.n + v)
+
+    def _gather_out_arcs(self, frontier):
+        starts = self.out_indptr[frontier]
+        counts = self.out_indptr[frontier + 1] - starts
+        offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+        return self.out_arcs[np.arange(counts.sum()) + offsets]
+
+    def _levels(self, source, sink):
+        """
+        Level-synchronous BFS over arcs with residual capacity. Leaves the BFS distances in self.level
+        (-1 if not reached or beyond the sink's level) and returns whether the sink was reached
+        """
+        level = self.level
+        level[:] = -1
+        level[source] = 0
+        frontier = np.array([source], dtype=np.int64)
+        depth = 0
+        while len(frontier) > 0:
+            depth += 1
+            arcs = self._gather_out_arcs(frontier)
+            heads = self.head[arcs[self.residual[arcs] > 0]]
+            heads = np.unique(heads[level[heads] < 0])
+            level[heads] = depth
+            if level[sink] >= 0:
+                return True
+            frontier = heads
+        return False
+
+    def _blocking_flow(self, source, sink):
+        """
+        Saturates every shortest augmenting path of the current level graph (one Dinic phase). The
+        level graph is pruned to the arcs that still lead to the sink, so the DFS only walks those
+        """
+        level = self.level
+        tail, head = self.tail, self.head
+        arcs = np.flatnonzero(self.residual > 0)
+        arcs = arcs[(level[tail[arcs]] >= 0) & (level[head[arcs]] == level[tail[arcs]] + 1)]
+        alive = self.alive
+        alive[:] = False
+        alive[sink] = True
+        for depth in range(level[sink], 0, -1):
+            into = arcs[level[head[arcs]] == depth]
+            alive[tail[into[alive[head[into]]]]] = True
+        arcs = arcs[alive[tail[arcs]] & alive[head[arcs]]]
+
+        out = defaultdict(list)
+        for a, u in zip(arcs.tolist(), tail[arcs].tolist()):
+            out[u].append(a)
+        heads = dict(zip(arcs.tolist(), head[arcs].tolist()))
+        pointer = defaultdict(int)
+        path = []
+        u = source
+        while True:
+            if u == sink:
+                for a in path:
+                    self.residual[a] -= 1
+                    self.residual[a + self.num_forward if a < self.num_forward else a - self.num_forward] += 1
+                    pointer[tail[a]] += 1
+                path = []
+                u = source
+                continue
+            candidates = out[u]
+            if pointer[u] < len(candidates):
+                a = candidates[pointer[u]]
+                path.append(a)
+                u = heads[a]
+            elif u == source:
+                return
+            else:
+                # dead end, retreat and skip the arc that led here
+                a = path.pop()
+                u = tail[a]
+                pointer[u] += 1
+
+    def _reverse_bfs(self, sink):
+        """
+        Marks in self.sink_side every H-node that can still reach the sink in the residual network
+        """
+        sink_side = self.sink_side
+        sink_side[:] = False
+        sink_side[sink] = True
+        frontier = np.array([sink], dtype=np.int64)
+        while len(frontier) > 0:
+            arcs = self._gather_out_arcs(frontier)
+            # the paired arc of an arc leaving the frontier enters it
+            paired = np.where(arcs < self.num_forward, arcs + self.num_forward, arcs - self.num_forward)
+            tails = self.head[arcs[self.residual[paired] > 0]]
+            tails = np.unique(tails[~sink_side[tails]])
+            sink_side[tails] = True
+            frontier = tails
+
+    def separating_set(self, s, t):
+        """
+        Returns the node cut between s and t (as indices) that networkx's minimum_st_node_cut returns
+        once the edge (s, t) is removed. networkx cuts along the set of H-nodes that can still reach the
+        sink in the residual network, which is the same for every maximum flow, so any augmenting order
+        gives the same cut
+        """
+        residual = self.residual
+        np.copyto(residual, self.capacity)
+        source, sink = 2 * s + 1, 2 * t
+        # drop the arcs of the edge (s, t) if there is one
+        removed = []
+        for u, v in ((s, t), (t, s)):
+            p = self.arc_position(u, v)
+            if p < len(self.adj_keys) and self.adj_keys[p] == u * self.n + v:
+                removed.append(self.n + p)
+        residual[removed] = 0
+
+        # every common neighbour k carries one unit along sB -> kA -> kB -> tA
+        common = np.intersect1d(self.neighbors(s), self.neighbors(t), assume_unique=True)
+        common = common[(common != s) & (common != t)]
+        if len(common) > 0:
+            first = self.n + self.arc_position(s, common)
+            second = common
+            third = self.n + self.arc_position(common, t)
+            for arcs in (first, second, third):
+                residual[arcs] -= 1
+                residual[arcs + self.num_forward] += 1
+
+        while self._levels(source, sink):
+            self._blocking_flow(source, sink)
+        self._reverse_bfs(sink)
+
+        # forward arcs entering the residual sink side form the edge cut of the split digraph
+        tail = self.tail[:self.num_forward]
+        head = self.head[:self.num_forward]
+        crossing = ~self.sink_side[tail] & self.sink_side[head]
+        crossing[removed] = False
+        cut = np.union1d(tail[crossing] // 2, head[crossing] // 2)
+        return cut[(cut != s) & (cut != t)]
+
+
+def separating_sets_chunk(csr, pairs):
+    """
+    Worker task: returns the cut triads (as an (m, 3) array of node indices) for a chunk of pairs
+    """
+    engine = SeparatorEngine(csr)
+    triads = []
+    for s, t in pairs:
+        cut = engine.separating_set(s, t)
+        if len(cut) > 0:
+            block = np.empty((len(cut), 3), dtype=np.int64)
+            block[:, 0] = s
+            block[:, 1] = t
+            block[:, 2] = cut
+            triads.append(block)
+    if len(triads) == 0:
+        return np.empty((0, 3), dtype=np.int64)
+    return np.concatenate(triads)
+
+
+def find_cut_triads_csr(G, n_jobs=-1, chunk_size=None):
+    """
+    Returns the cut triads of G as an (m, 3) array of sorted node labels. Every pair of nodes, with or
+    without an edge between them, is processed in chunks; chunks run in parallel over the loky backend,
+    which memory-maps the large CSR arrays once per call instead of pickling the graph into every task
+    """
+    nodes, csr = build_separator_csr(G)
+    n = len(nodes)
+    first, second = np.triu_indices(n, k=1)
+    pairs = np.column_stack((first, second))
+    if n_jobs is not None and n_jobs < 0:
+        n_jobs = max(1, cpu_count() + 1 + n_jobs)
+    n_jobs = n_jobs or 1
+    if chunk_size is None:
+        chunk_size = max(64, -(-len(pairs) // (4 * n_jobs)))
+
+    chunks = [pairs[c:c + chunk_size] for c in range(0, len(pairs), chunk_size)]
+    if n_jobs == 1 or len(chunks) == 1:
+        res = [separating_sets_chunk(csr, chunk) for chunk in chunks]
+    else:
+        with parallel_backend(backend='loky', n_jobs=n_jobs):
+            res = Parallel()(delayed(separating_sets_chunk)(csr, chunk) for chunk in chunks)
+    res = [r for r in res if len(r) > 0]
+    if len(res) == 0:
+        return np.empty((0, 3), dtype=np.int64)
+    triads = np.sort(nodes[np.concatenate(res)], axis=1)
+    return triads
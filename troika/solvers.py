@@ -0,0 +1,435 @@
+import multiprocessing
+import time
+from itertools import count
+
+import numpy as np
+import scipy.sparse as sp
+from gurobipy import GRB, GurobiError, LinExpr, Model, MVar
+from scipy.optimize import Bounds, LinearConstraint, linprog, milp
+
+
+class LPModel:
+    """
+    Interface of the models the search solves: the pair variables x in [0, 1] (in pair_index order), the objective
+    objective . x + constant to maximize, and rows A x > rhs or A x = rhs that are added and removed in blocks.
+    One model is shared by the LPs (and IPs) of all nodes of a search, which change its bounds and rows in between.
+    loop_weight is the weight of the self-loops of the graph, which lp_objective_value adds to the objective value
+    """
+    num_vars = 0
+    loop_weight = 0.0
+
+    def optimize(self):
+        raise NotImplementedError
+
+    def is_optimal(self):
+        raise NotImplementedError
+
+    def has_solution(self):
+        """
+        Returns whether the last solve found an optimal solution, False if the problem is infeasible. Any other
+        outcome (an iteration limit, numerical trouble) raises a RuntimeError: the search would take it for an
+        infeasible node and prune a subtree that may hold the optimum
+        """
+        raise NotImplementedError
+
+    def objective_value(self):
+        raise NotImplementedError
+
+    def solution(self):
+        """
+        Returns the values of the variables in the last solve as a float array
+        """
+        raise NotImplementedError
+
+    def reduced_costs(self):
+        raise NotImplementedError
+
+    def set_bounds(self, indices, lower=None, upper=None):
+        raise NotImplementedError
+
+    def set_integral(self, integral):
+        """
+        Makes the variables binary (integral=True) or continuous for the next solves
+        """
+        raise NotImplementedError
+
+    def add_rows(self, matrix, sense, rhs):
+        """
+        Adds the rows matrix x (sense) rhs, sense being '>' or '=', after the existing ones and returns one handle
+        per row for remove_rows
+        """
+        raise NotImplementedError
+
+    def add_row(self, columns, coefficients, sense, rhs):
+        """
+        Adds the row sum of coefficients * x[columns] (sense) rhs and returns its handle, see add_rows
+        """
+        raise NotImplementedError
+
+    def remove_rows(self, handles):
+        raise NotImplementedError
+
+    def update(self):
+        """
+        Applies the pending row changes, which the next solve would apply as well
+        """
+
+    def basis(self):
+        """
+        Returns the optimal basis of the last solve as (variable statuses, row statuses in row order) int8 arrays,
+        or None if the solver did not leave one
+        """
+        return None
+
+    def set_basis(self, vbasis, cbasis):
+        """
+        Warm-starts the next solve from a basis as returned by basis; ignored by solvers without warm starts
+        """
+
+    def use_dual_simplex(self):
+        raise NotImplementedError
+
+    def set_threads(self, threads):
+        """
+        Limits the threads of the solves; ignored by single-threaded solvers
+        """
+
+    @property
+    def num_rows(self):
+        raise NotImplementedError
+
+    @property
+    def iterations(self):
+        """
+        Simplex (or barrier) iterations of the last solve
+        """
+        raise NotImplementedError
+
+    @property
+    def runtime(self):
+        """
+        Seconds the solver took for the last solve
+        """
+        raise NotImplementedError
+
+    def dispose(self):
+        pass
+
+
+def gurobi_model(lp_method):
+    """
+    Returns an empty, silent gurobipy model that solves its LPs with lp_method (Gurobi's Method parameter)
+    """
+    model = Model("Clique Partitioning")
+    model.setParam(GRB.param.OutputFlag, 0)
+    model.setParam(GRB.param.Method, lp_method)
+    model.setParam(GRB.Param.Crossover, 0)
+    model.setParam(GRB.Param.Threads, min(64, multiprocessing.cpu_count()))
+    return model
+
+
+class GurobiLP(LPModel):
+    """
+    LPModel on a gurobipy model (model), whose variables are kept as the MVar x for bulk attribute access. The model
+    keeps its basis between the solves, and bases can be set, so the LPs of the children of a node are warm-started
+    """
+
+    def __init__(self, num_vars, objective, constant, lp_method=-1, names=""):
+        self.model = gurobi_model(lp_method)
+        self.x = self.model.addMVar(num_vars, lb=0, ub=1, vtype=GRB.CONTINUOUS, name=names)
+        self.model.setMObjective(None, objective, constant, sense=GRB.MAXIMIZE)
+        self.num_vars = num_vars
+        self._variables = None
+
+    @classmethod
+    def from_model(cls, model):
+        """
+        Wraps a gurobipy model (e.g. one from gurobi_model) whose variables are the pair variables in pair_index order
+        """
+        lp = cls.__new__(cls)
+        lp.model = model
+        lp.x = MVar.fromlist(model.getVars())
+        lp.num_vars = model.NumVars
+        lp._variables = None
+        return lp
+
+    def optimize(self):
+        self.model.optimize()
+
+    def is_optimal(self):
+        return self.model.Status == GRB.OPTIMAL
+
+    def has_solution(self):
+        status = self.model.Status
+        # the variables are bounded, so "infeasible or unbounded" is infeasible
+        if status in (GRB.INFEASIBLE, GRB.INF_OR_UNBD):
+            return False
+        if status != GRB.OPTIMAL:
+            raise RuntimeError(f"Gurobi stopped with status {status}")
+        return True
+
+    def objective_value(self):
+        return self.model.ObjVal
+
+    def solution(self):
+        return np.asarray(self.x.X, dtype=np.float64)
+
+    def reduced_costs(self):
+        return np.asarray(self.x.RC, dtype=np.float64)
+
+    def set_bounds(self, indices, lower=None, upper=None):
+        if lower is not None:
+            self.x[indices].LB = lower
+        if upper is not None:
+            self.x[indices].UB = upper
+
+    def set_integral(self, integral):
+        self.x.VType = GRB.BINARY if integral else GRB.CONTINUOUS
+
+    def add_rows(self, matrix, sense, rhs):
+        return self.model.addMConstr(matrix, self.x, sense, rhs).tolist()
+
+    def add_row(self, columns, coefficients, sense, rhs):
+        # a linear expression is much cheaper to add than a one-row matrix
+        if self._variables is None:
+            self.model.update()
+            self._variables = self.model.getVars()
+        return self.model.addLConstr(LinExpr(coefficients, [self._variables[c] for c in columns]), sense, rhs)
+
+    def remove_rows(self, handles):
+        self.model.remove(list(handles))
+
+    def update(self):
+        self.model.update()
+
+    def basis(self):
+        try:
+            vbasis = np.asarray(self.x.VBasis, dtype=np.int8)
+            cbasis = np.array(self.model.getAttr("CBasis"), dtype=np.int8)
+        except GurobiError:
+            # e.g. after barrier without crossover
+            return None
+        return vbasis, cbasis
+
+    def set_basis(self, vbasis, cbasis):
+        self.x.VBasis = vbasis
+        self.model.setAttr("CBasis", np.asarray(cbasis).tolist())
+
+    def use_dual_simplex(self):
+        self.model.setParam(GRB.Param.Method, GRB.METHOD_DUAL)
+
+    def set_threads(self, threads):
+        self.model.setParam(GRB.Param.Threads, threads)
+
+    @property
+    def num_rows(self):
+        return self.model.NumConstrs
+
+    @property
+    def iterations(self):
+        return int(self.model.IterCount)
+
+    @property
+    def runtime(self):
+        return self.model.Runtime
+
+    def dispose(self):
+        self.model.dispose()
+
+
+# linprog methods by Gurobi Method code; HiGHS picks one itself for the others
+HIGHS_METHODS = {0: "highs-ds", 1: "highs-ds", 2: "highs-ipm"}
+
+
+class HighsLP(LPModel):
+    """
+    LPModel solved by HiGHS through scipy.optimize.linprog (LPs) and milp (IPs), which needs no license. The blocks
+    of rows of add_rows (the triangle rows) are stacked into one constraint matrix by the first solve after they
+    change, and the single rows of add_row (the branching rows) into a small second one that is appended to it, so
+    pushing and popping branching rows does not restack the triangle rows. The bounds are kept as arrays, so fixing
+    variables costs no matrix work. linprog takes no starting basis, so every solve starts from scratch and bases
+    are ignored
+    """
+
+    def __init__(self, num_vars, objective, constant, lp_method=-1, names=None):
+        self.num_vars = num_vars
+        self.method = HIGHS_METHODS.get(lp_method, "highs")
+        # linprog minimizes
+        self._cost = -np.asarray(objective, dtype=np.float64)
+        self._constant = float(constant)
+        self._lower = np.zeros(num_vars)
+        self._upper = np.ones(num_vars)
+        self._integral = False
+        # [matrix, sense, rhs, mask of the rows not removed] by block id
+        self._blocks = {}
+        self._block_ids = count()
+        # (columns, coefficients, sense, rhs) by row id
+        self._single_rows = {}
+        self._row_ids = count()
+        # the stacked blocks, the stacked single rows and both, as linprog's (A_ub, b_ub, A_eq, b_eq); None after a
+        # change
+        self._block_rows = self._single_row_rows = self._rows = None
+        self._result = None
+        self._runtime = 0.0
+
+    def _stacked_rows(self):
+        if self._block_rows is None:
+            parts = []
+            for matrix, sense, rhs, alive in self._blocks.values():
+                if not alive.all():
+                    matrix, rhs = matrix[alive], rhs[alive]
+                parts.append((matrix, sense, rhs))
+            self._block_rows = stack_rows(parts)
+        if self._single_row_rows is None:
+            parts = []
+            for sense in (">", "="):
+                rows = [row for row in self._single_rows.values() if row[2] == sense]
+                if rows:
+                    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+                    np.cumsum([len(columns) for columns, _, _, _ in rows], out=indptr[1:])
+                    matrix = sp.csr_matrix((np.concatenate([coefficients for _, coefficients, _, _ in rows]),
+                                            np.concatenate([columns for columns, _, _, _ in rows]), indptr),
+                                           shape=(len(rows), self.num_vars))
+                    parts.append((matrix, sense, np.array([rhs for _, _, _, rhs in rows], dtype=np.float64)))
+            self._single_row_rows = stack_rows(parts)
+        if self._rows is None:
+            rows = []
+            for blocks, singles in zip(self._block_rows, self._single_row_rows):
+                if blocks is None or singles is None:
+                    rows.append(singles if blocks is None else blocks)
+                elif sp.issparse(blocks):
+                    rows.append(sp.vstack((blocks, singles), format="csr"))
+                else:
+                    rows.append(np.concatenate((blocks, singles)))
+            self._rows = tuple(rows)
+        return self._rows
+
+    def optimize(self):
+        start = time.time()
+        A_ub, b_ub, A_eq, b_eq = self._stacked_rows()
+        if self._integral:
+            constraints = []
+            if A_ub is not None:
+                constraints.append(LinearConstraint(A_ub, -np.inf, b_ub))
+            if A_eq is not None:
+                constraints.append(LinearConstraint(A_eq, b_eq, b_eq))
+            self._result = milp(self._cost, integrality=np.ones(self.num_vars), bounds=Bounds(self._lower, self._upper),
+                                constraints=constraints)
+        else:
+            self._result = linprog(self._cost, A_ub=A_ub, b_ub=b_ub, A_eq=A_eq, b_eq=b_eq,
+                                   bounds=np.column_stack((self._lower, self._upper)), method=self.method)
+        self._runtime = time.time() - start
+
+    def is_optimal(self):
+        return self._result is not None and self._result.status == 0
+
+    def has_solution(self):
+        if self._result is None or self._result.status == 2:
+            return False
+        if self._result.status != 0:
+            raise RuntimeError(f"HiGHS stopped with status {self._result.status}: {self._result.message}")
+        return True
+
+    def objective_value(self):
+        return self._constant - self._result.fun
+
+    def solution(self):
+        x = np.array(self._result.x, dtype=np.float64)
+        # basic variables at a bound come back with round-off, the search compares with 0 and 1 exactly
+        x[np.abs(x) < 1e-9] = 0.0
+        x[np.abs(x - 1.0) < 1e-9] = 1.0
+        return x
+
+    def reduced_costs(self):
+        if self._integral:
+            raise ValueError("an IP has no reduced costs")
+        # the marginals are the derivatives of the minimized objective with respect to the bounds
+        return -(self._result.lower.marginals + self._result.upper.marginals)
+
+    def set_bounds(self, indices, lower=None, upper=None):
+        if lower is not None:
+            self._lower[indices] = lower
+        if upper is not None:
+            self._upper[indices] = upper
+
+    def set_integral(self, integral):
+        self._integral = integral
+
+    def add_rows(self, matrix, sense, rhs):
+        if sense not in (">", "="):
+            raise ValueError(f"sense must be '>' or '=', got {sense!r}")
+        block = next(self._block_ids)
+        matrix = sp.csr_matrix(matrix, dtype=np.float64)
+        self._blocks[block] = [matrix, sense, np.asarray(rhs, dtype=np.float64),
+                               np.ones(matrix.shape[0], dtype=bool)]
+        self._block_rows = self._rows = None
+        return [(block, row) for row in range(matrix.shape[0])]
+
+    def add_row(self, columns, coefficients, sense, rhs):
+        if sense not in (">", "="):
+            raise ValueError(f"sense must be '>' or '=', got {sense!r}")
+        row = next(self._row_ids)
+        self._single_rows[row] = (np.asarray(columns, dtype=np.int64), np.asarray(coefficients, dtype=np.float64),
+                                  sense, float(rhs))
+        self._single_row_rows = self._rows = None
+        return row
+
+    def remove_rows(self, handles):
+        blocks = set()
+        for handle in handles:
+            if isinstance(handle, tuple):
+                block, row = handle
+                self._blocks[block][3][row] = False
+                blocks.add(block)
+            else:
+                del self._single_rows[handle]
+                self._single_row_rows = None
+        for block in blocks:
+            if not self._blocks[block][3].any():
+                del self._blocks[block]
+        if blocks:
+            self._block_rows = None
+        self._rows = None
+
+    def use_dual_simplex(self):
+        self.method = "highs-ds"
+
+    @property
+    def num_rows(self):
+        return sum(int(alive.sum()) for _, _, _, alive in self._blocks.values()) + len(self._single_rows)
+
+    @property
+    def iterations(self):
+        # milp does not report its simplex iterations
+        return int(getattr(self._result, "nit", 0) or 0)
+
+    @property
+    def runtime(self):
+        return self._runtime
+
+    def dispose(self):
+        self._blocks.clear()
+        self._single_rows.clear()
+        self._block_rows = self._single_row_rows = self._rows = self._result = None
+
+
+def stack_rows(parts):
+    """
+    Stacks (matrix, sense, rhs) parts, sense being '>' or '=', into linprog's (A_ub, b_ub, A_eq, b_eq); A x >= b is
+    passed as -A x <= -b, and a missing part as None
+    """
+    matrices = {">": [], "=": []}
+    rhs = {">": [], "=": []}
+    for matrix, sense, b in parts:
+        matrices[sense].append(matrix)
+        rhs[sense].append(b)
+    rows = []
+    for sense, sign in ((">", -1.0), ("=", 1.0)):
+        if matrices[sense]:
+            rows += [sign * sp.vstack(matrices[sense], format="csr"), sign * np.concatenate(rhs[sense])]
+        else:
+            rows += [None, None]
+    return tuple(rows)
+
+
+SOLVERS = {"gurobi": GurobiLP, "highs": HighsLP}